@@ -4,14 +4,34 @@ Provides hard coding challenges, mock interviews, and automated scoring
 """
 
 import os
+import sys
 import json
 import logging
 import time
+import queue
+import select
+import shutil
+import signal
 import subprocess
 import tempfile
+import threading
+import random
+from concurrent.futures import ThreadPoolExecutor
+from types import MappingProxyType
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Tuple
 import hashlib
+import re
+from collections import Counter
+from functools import lru_cache
+
+import numpy as np
+from scipy.sparse import csr_matrix
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+from caching import get_analysis_cache
+from code_features import extract_features
+from session_store import SessionStore, create_session_store
 
 logger = logging.getLogger(__name__)
 
@@ -36,6 +56,63 @@ class AssessmentConfig:
     
     # Assessment storage
     ASSESSMENT_RESULTS_DIR = '/tmp/assessment_results'
+    
+    # Optional JSON (or YAML, with PyYAML installed) files replacing the built-in banks.
+    # Challenges: {level: {topic: [challenge, ...]}}; questions: {level: [question, ...]}
+    CHALLENGE_BANK_PATH = os.getenv('CHALLENGE_BANK_PATH')
+    INTERVIEW_BANK_PATH = os.getenv('INTERVIEW_BANK_PATH')
+    
+    # Share of an expected point's TF-IDF weight an answer must mention to cover it
+    ANSWER_POINT_THRESHOLD = float(os.getenv('ANSWER_POINT_THRESHOLD', '0.6'))
+    
+    # Pooled Python sandbox workers
+    SANDBOX_POOL_SIZE = int(os.getenv('SANDBOX_POOL_SIZE', '4'))
+    SANDBOX_MAX_USES = int(os.getenv('SANDBOX_MAX_USES', '50'))  # Submissions before a worker is recycled
+    SANDBOX_MEMORY_MB = int(os.getenv('SANDBOX_MEMORY_MB', '512'))
+    
+    # Test cases of one submission run concurrently, within an overall deadline
+    TEST_CASE_PARALLELISM = int(os.getenv('TEST_CASE_PARALLELISM', '4'))
+    SUBMISSION_DEADLINE = float(os.getenv('SUBMISSION_DEADLINE', '15'))  # Seconds for all cases together
+    
+    # Grading modes: run every case, stop at the first erroring case, or
+    # stop at the first error with historically cheapest cases run first
+    GRADING_MODES = ('full', 'fail_fast', 'cheap_first')
+    GRADING_MODE = os.getenv('GRADING_MODE', 'full')
+    
+    # User reports
+    REPORT_HISTORY_SIZE = 10  # Most recent completed assessments kept in the aggregates
+    STRONG_AREA_SCORE = 75
+    WEAK_AREA_SCORE = 60
+    
+    # Report labels for code test rubric criteria
+    RUBRIC_AREAS = {
+        'correctness': 'Problem solving',
+        'efficiency': 'Algorithm efficiency',
+        'code_quality': 'Code quality',
+        'edge_cases': 'Edge case handling'
+    }
+
+
+def _skipped_result() -> Dict:
+    """Result for a test case not run because an earlier case errored"""
+    return {
+        'output': '',
+        'error': 'Skipped after an earlier test case failed',
+        'execution_time': 0,
+        'exit_code': None,
+        'skipped': True
+    }
+
+
+def _deadline_result() -> Dict:
+    """Result for a test case that could not run before the submission deadline"""
+    return {
+        'output': '',
+        'error': 'Submission deadline exceeded',
+        'execution_time': 0,
+        'exit_code': -1,
+        'deadline_exceeded': True
+    }
 
 
 class CodingChallenge:
@@ -44,10 +121,11 @@ class CodingChallenge:
     def __init__(self, level: str, topic: str):
         self.level = level
         self.topic = topic
-        self.challenges = self._load_challenge_bank()
+        self.bank = get_assessment_bank()
     
-    def _load_challenge_bank(self) -> Dict:
-        """Load challenge bank by difficulty and topic"""
+    @staticmethod
+    def _load_challenge_bank() -> Dict:
+        """Built-in challenge bank by difficulty and topic"""
         return {
             'junior': {
                 'arrays': [
@@ -178,13 +256,11 @@ class CodingChallenge:
     
     def get_challenge(self) -> Dict:
         """Get a random challenge for the specified level and topic"""
-        level_challenges = self.challenges.get(self.level, {})
-        topic_challenges = level_challenges.get(self.topic, [])
+        topic_challenges = self.bank.challenges_for(self.level, self.topic)
         
         if not topic_challenges:
             return self._get_fallback_challenge()
         
-        import random
         return random.choice(topic_challenges)
     
     def _get_fallback_challenge(self) -> Dict:
@@ -203,20 +279,279 @@ class CodingChallenge:
         }
 
 
+class SandboxWorker:
+    """Long-lived resource-limited interpreter running sandbox_worker.py
+    
+    The interpreter forks a fresh child for each submission, so it pays
+    startup once while submissions share no state.
+    """
+    
+    SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'sandbox_worker.py')
+    
+    def __init__(self, memory_mb: int):
+        self.workdir = tempfile.mkdtemp(prefix='sandbox_')
+        self.process = subprocess.Popen(
+            [sys.executable, '-I', self.SCRIPT, str(memory_mb)],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            cwd=self.workdir,
+            start_new_session=True
+        )
+        self.uses = 0
+        self.ready = False
+        self._buffer = b''
+    
+    @property
+    def alive(self) -> bool:
+        return self.process.poll() is None
+    
+    def wait_ready(self, timeout: float) -> bool:
+        """Wait for the interpreter to finish starting up"""
+        if not self.ready:
+            self.ready = bool(self._read_line(time.time() + timeout))
+        return self.ready
+    
+    def run(self, code: str, test_inputs: List[str], timeout: float, deadline: float = None) -> List[Dict]:
+        """Run the code against each input in order
+        
+        Stops after the first case that times out, runs past the deadline or
+        kills the interpreter; that case gets an error result and the worker
+        must be discarded.
+        """
+        self.uses += 1
+        results = []
+        
+        if not self.wait_ready(timeout):
+            self.close()
+            return [self._crash_result()]
+        
+        try:
+            self.process.stdin.write(json.dumps({'code': code, 'inputs': test_inputs}).encode() + b'\n')
+            self.process.stdin.flush()
+        except (BrokenPipeError, OSError):
+            self.close()
+            return [self._crash_result()]
+        
+        for _ in test_inputs:
+            case_deadline = time.time() + timeout
+            line = self._read_line(case_deadline if deadline is None else min(case_deadline, deadline))
+            if line is None:
+                self.close()
+                if deadline is not None and deadline < case_deadline:
+                    results.append(_deadline_result())
+                else:
+                    results.append({
+                        'output': '',
+                        'error': 'Execution timeout exceeded',
+                        'execution_time': timeout,
+                        'exit_code': -1
+                    })
+                break
+            if not line:
+                # The interpreter died mid-case (os._exit, memory limit, signal)
+                try:
+                    self.process.wait(timeout=1)
+                except subprocess.TimeoutExpired:
+                    pass
+                results.append(self._crash_result())
+                self.close()
+                break
+            results.append(json.loads(line))
+        
+        return results
+    
+    def close(self):
+        # The whole session, so a submission child still running is killed too;
+        # the worker is not reaped yet, so its pid still names the group
+        try:
+            os.killpg(self.process.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+        self.process.wait()
+        for pipe in (self.process.stdin, self.process.stdout):
+            try:
+                pipe.close()
+            except OSError:
+                pass
+        shutil.rmtree(self.workdir, ignore_errors=True)
+    
+    def _read_line(self, deadline: float) -> Optional[bytes]:
+        """Next protocol line; None on timeout, b'' if the process exited"""
+        fd = self.process.stdout.fileno()
+        while b'\n' not in self._buffer:
+            remaining = deadline - time.time()
+            if remaining <= 0 or not select.select([fd], [], [], remaining)[0]:
+                return None
+            chunk = os.read(fd, 65536)
+            if not chunk:
+                return b''
+            self._buffer += chunk
+        line, self._buffer = self._buffer.split(b'\n', 1)
+        return line
+    
+    def _crash_result(self) -> Dict:
+        return {
+            'output': '',
+            'error': 'Sandbox process exited unexpectedly',
+            'execution_time': 0,
+            'exit_code': self.process.returncode if self.process.returncode is not None else -1
+        }
+
+
+class SandboxPool:
+    """Pre-started Python sandbox workers shared by all submissions
+    
+    A submission's code is sent to one worker once and every test input runs
+    in a child forked from that warm interpreter, so only the pool pays
+    interpreter startup.
+    Workers are replaced after max_uses submissions or when a case times out.
+    """
+    
+    STARTUP_TIMEOUT = 10  # Seconds an interpreter may take to start
+    
+    def __init__(self, size: int = None, max_uses: int = None, memory_mb: int = None):
+        self.size = size or AssessmentConfig.SANDBOX_POOL_SIZE
+        self.max_uses = max_uses or AssessmentConfig.SANDBOX_MAX_USES
+        self.memory_mb = memory_mb or AssessmentConfig.SANDBOX_MEMORY_MB
+        self._idle = queue.Queue()
+        self._pid = None
+        self._lock = threading.Lock()
+    
+    def run(self, code: str, test_inputs: List[str], timeout: float, deadline: float = None) -> List[Dict]:
+        """Results for every input, in order"""
+        results = []
+        while len(results) < len(test_inputs):
+            if deadline is not None and time.time() >= deadline:
+                results.extend(_deadline_result() for _ in test_inputs[len(results):])
+                break
+            worker = self._acquire()
+            try:
+                results.extend(worker.run(code, test_inputs[len(results):], timeout, deadline))
+            finally:
+                self._release(worker)
+        return results
+    
+    def shutdown(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+    
+    def start(self):
+        """Start the workers if this process has none yet (first use, or a forked gunicorn worker)
+        
+        Returns once the interpreters are up, so startup is not charged to
+        the first submission's deadline.
+        """
+        with self._lock:
+            if self._pid != os.getpid():
+                self._idle = queue.Queue()
+                workers = [SandboxWorker(self.memory_mb) for _ in range(self.size)]
+                for worker in workers:
+                    worker.wait_ready(self.STARTUP_TIMEOUT)
+                    self._idle.put(worker)
+                self._pid = os.getpid()
+    
+    def _acquire(self) -> SandboxWorker:
+        self.start()
+        worker = self._idle.get()
+        if not worker.alive:
+            worker.close()
+            worker = SandboxWorker(self.memory_mb)
+        return worker
+    
+    def _release(self, worker: SandboxWorker):
+        if worker.alive and worker.uses < self.max_uses:
+            self._idle.put(worker)
+        else:
+            worker.close()
+            self._idle.put(SandboxWorker(self.memory_mb))
+
+
 class CodeExecutor:
     """Execute and test submitted code safely"""
     
     def __init__(self):
         self.timeout = 5  # 5 seconds max per test case
+        self.sandbox_pool = SandboxPool()
+        self.max_parallel = AssessmentConfig.TEST_CASE_PARALLELISM
+        self.deadline = AssessmentConfig.SUBMISSION_DEADLINE
+        # Shared by all submissions, so total concurrent cases stay bounded
+        self._case_pool = ThreadPoolExecutor(max_workers=self.sandbox_pool.size, thread_name_prefix='test-case')
     
     def execute_code(self, code: str, language: str, test_input: str = '') -> Dict:
         """Execute code with given input and return result"""
+        return self.execute_tests(code, language, [test_input])[0]
+    
+    def execute_tests(self, code: str, language: str, test_inputs: List[str], fail_fast: bool = False,
+                      order: Optional[List[int]] = None) -> List[Dict]:
+        """Execute code once per input and return the results in input order
+        
+        Inputs are spread round-robin over up to max_parallel concurrent
+        groups, so wall time tracks the slowest case rather than the sum.
+        Cases not finished when the submission deadline passes get an error.
+        `order` sets which inputs start first; with fail_fast, cases not yet
+        started when any case errors are skipped.
+        """
+        if language not in ('python', 'javascript'):
+            return [{'error': f'Unsupported language: {language}'} for _ in test_inputs]
+        if not test_inputs:
+            return []
+        if language == 'python':
+            # Starting the pool must not use up the first submission's deadline
+            try:
+                self.sandbox_pool.start()
+            except Exception as e:
+                logger.warning(f"Sandbox pool failed to start: {e}")
+        
+        deadline = time.time() + self.deadline
+        stop = threading.Event() if fail_fast else None
+        order = list(order) if order is not None else list(range(len(test_inputs)))
+        parallel = max(1, min(self.max_parallel, len(test_inputs)))
+        groups = [order[start::parallel] for start in range(parallel)]
+        
+        futures = [
+            self._case_pool.submit(self._execute_group, code, language, [test_inputs[i] for i in group], deadline, stop)
+            for group in groups
+        ]
+        
+        results = [None] * len(test_inputs)
+        for group, future in zip(groups, futures):
+            for i, result in zip(group, future.result()):
+                results[i] = result
+        return results
+    
+    def _execute_group(self, code: str, language: str, test_inputs: List[str], deadline: float,
+                       stop: threading.Event = None) -> List[Dict]:
+        """Run a group of inputs one after another"""
+        if stop is not None:
+            # Fail-fast: one case at a time so other groups' errors are seen between cases
+            results = []
+            for test_input in test_inputs:
+                if stop.is_set():
+                    results.append(_skipped_result())
+                    continue
+                result = self._execute_group(code, language, [test_input], deadline)[0]
+                if result.get('error') is not None:
+                    stop.set()
+                results.append(result)
+            return results
+        
         if language == 'python':
-            return self._execute_python(code, test_input)
-        elif language == 'javascript':
-            return self._execute_javascript(code, test_input)
+            try:
+                return self.sandbox_pool.run(code, test_inputs, self.timeout, deadline)
+            except Exception as e:
+                logger.warning(f"Sandbox pool unavailable, using one process per test case: {e}")
+                execute = self._execute_python
         else:
-            return {'error': f'Unsupported language: {language}'}
+            execute = self._execute_javascript
+        
+        return [
+            execute(code, test_input) if time.time() < deadline else _deadline_result()
+            for test_input in test_inputs
+        ]
     
     def _execute_python(self, code: str, test_input: str = '') -> Dict:
         """Execute Python code safely"""
@@ -309,9 +644,16 @@ class CodeExecutor:
 class CodeScorer:
     """Score submitted code based on rubric"""
     
+    # Bump when the code-only scoring rules change so cached scores are not reused
+    SCORER_VERSION = '1'
+    
+    def __init__(self):
+        self.cache = get_analysis_cache()
+    
     def score_submission(self, code: str, language: str, challenge: Dict, test_results: List[Dict]) -> Dict:
         """Score code submission comprehensively"""
         rubric = challenge.get('scoring_rubric', {})
+        code_scores = self._score_code(code, language, rubric)
         
         scores = {}
         
@@ -321,11 +663,11 @@ class CodeScorer:
         
         # Efficiency score
         if 'efficiency' in rubric:
-            scores['efficiency'] = self._score_efficiency(code, test_results, rubric['efficiency'])
+            scores['efficiency'] = self._score_efficiency(code_scores['efficiency_factor'], test_results, rubric['efficiency'])
         
         # Code quality score
         if 'code_quality' in rubric:
-            scores['code_quality'] = self._score_code_quality(code, language, rubric['code_quality'])
+            scores['code_quality'] = code_scores['code_quality']
         
         # Edge cases score
         if 'edge_cases' in rubric:
@@ -352,20 +694,29 @@ class CodeScorer:
         
         return (passed / total) * max_points
     
-    def _score_efficiency(self, code: str, test_results: List[Dict], max_points: int) -> float:
+    def _score_code(self, code: str, language: str, rubric: Dict) -> Dict:
+        """Rubric parts that depend only on the code, reused across resubmissions of it"""
+        version = f"{self.SCORER_VERSION}:{rubric.get('code_quality')}"
+        # Cheap to recompute, so only the in-process tier; a Redis round trip would cost more
+        return self.cache.get_or_compute('score', version, code, language, lambda: {
+            'efficiency_factor': self._efficiency_factor(code, language),
+            'code_quality': self._score_code_quality(code, language, rubric['code_quality']) if 'code_quality' in rubric else None
+        }, shared=False)
+    
+    def _efficiency_factor(self, code: str, language: str) -> float:
+        """Multiplier for efficient patterns in the code"""
+        # Penalize nested loops (potential O(n^2))
+        if extract_features(code, language)['max_loop_depth'] >= 2:
+            return 0.7
+        return 1.0
+    
+    def _score_efficiency(self, efficiency_factor: float, test_results: List[Dict], max_points: int) -> float:
         """Score based on time complexity and execution time"""
-        # Check for efficient patterns
-        score = max_points
+        score = max_points * efficiency_factor
         
-        # Penalize nested loops (potential O(n^2))
-        if code.count('for') >= 2 and 'for' in code:
-            lines = code.split('\n')
-            nested = any('for' in line and any('for' in lines[i+1:i+10] for i in range(len(lines)-1)) for line in lines)
-            if nested:
-                score *= 0.7
-        
-        # Penalize slow execution
-        avg_time = sum(r.get('execution_time', 0) for r in test_results) / max(len(test_results), 1)
+        # Penalize slow execution (skipped cases did not run)
+        ran = [r for r in test_results if not r.get('skipped', False)]
+        avg_time = sum(r.get('execution_time', 0) for r in ran) / max(len(ran), 1)
         if avg_time > 1.0:
             score *= 0.8
         
@@ -374,14 +725,11 @@ class CodeScorer:
     def _score_code_quality(self, code: str, language: str, max_points: int) -> float:
         """Score based on code quality metrics"""
         score = max_points
+        features = extract_features(code, language)
         
         if language == 'python':
-            # Check PEP8 compliance
-            lines = code.split('\n')
-            
-            # Penalize very long lines
-            long_lines = sum(1 for line in lines if len(line) > 100)
-            if long_lines > 0:
+            # Check PEP8 compliance: penalize very long lines
+            if features['long_lines'] > 0:
                 score *= 0.9
             
             # Check for proper naming
@@ -389,7 +737,7 @@ class CodeScorer:
                 score *= 0.95
             
             # Reward comments and docstrings
-            if '#' in code or '"""' in code or "'''" in code:
+            if features['has_comments'] or features['has_docstrings']:
                 score *= 1.05
         
         # Check for magic numbers
@@ -421,10 +769,12 @@ class MockInterview:
     
     def __init__(self, level: str):
         self.level = level
-        self.questions = self._load_interview_questions()
+        self.bank = get_assessment_bank()
+        self.questions = self.bank.questions_for(level)
     
-    def _load_interview_questions(self) -> List[Dict]:
-        """Load interview questions by level"""
+    @staticmethod
+    def _load_interview_questions() -> Dict[str, List[Dict]]:
+        """Built-in interview questions by level"""
         questions = {
             'junior': [
                 {
@@ -474,38 +824,44 @@ class MockInterview:
             ]
         }
         
-        return questions.get(self.level, questions['junior'])
+        return questions
     
     def get_questions(self, count: int = 5) -> List[Dict]:
         """Get interview questions"""
-        import random
         return random.sample(self.questions, min(count, len(self.questions)))
     
     def score_answer(self, question_id: str, answer: str) -> Dict:
-        """Score interview answer using AI"""
-        question = next((q for q in self.questions if q['id'] == question_id), None)
-        
-        if not question:
-            return {'error': 'Question not found'}
-        
-        expected_points = question.get('expected_points', [])
-        
-        # Simple keyword-based scoring (could be enhanced with AI)
-        answer_lower = answer.lower()
-        points_covered = sum(1 for point in expected_points if any(keyword in answer_lower for keyword in point.lower().split()))
+        """Score interview answer against the question's expected points"""
+        return self.score_answers([(question_id, answer)])[0]
+    
+    def score_answers(self, answers: List[Tuple[str, str]]) -> List[Dict]:
+        """Score many (question_id, answer) pairs with one vectorized pass"""
+        coverage = self.bank.answer_scorer.coverage(answers)
+        results = []
         
-        score = (points_covered / len(expected_points)) * 100 if expected_points else 0
+        for (question_id, answer), covered in zip(answers, coverage):
+            question = self.bank.question(question_id)
+            if not question:
+                results.append({'error': 'Question not found'})
+                continue
+            
+            expected_points = question.get('expected_points', [])
+            points_covered = sum(covered)
+            score = (points_covered / len(expected_points)) * 100 if expected_points else 0
+            missed = [point for point, hit in zip(expected_points, covered) if not hit]
+            
+            results.append({
+                'question_id': question_id,
+                'score': score,
+                'points_covered': points_covered,
+                'total_points': len(expected_points),
+                'feedback': self._generate_feedback(score, missed, answer)
+            })
         
-        return {
-            'question_id': question_id,
-            'score': score,
-            'points_covered': points_covered,
-            'total_points': len(expected_points),
-            'feedback': self._generate_feedback(score, expected_points, answer)
-        }
+        return results
     
     def _generate_feedback(self, score: float, expected_points: List[str], answer: str) -> str:
-        """Generate feedback for interview answer"""
+        """Generate feedback for interview answer (expected_points: the points it missed)"""
         if score >= 80:
             return "Excellent answer! You covered the key points well."
         elif score >= 60:
@@ -514,12 +870,174 @@ class MockInterview:
             return f"Your answer needs improvement. Key points to cover: {', '.join(expected_points)}"
 
 
+@lru_cache(maxsize=65536)
+def _answer_term(token: str) -> str:
+    """Fold a token to its scoring term; cached since answers reuse a small vocabulary"""
+    token = token.replace('-', '')
+    if token.endswith('ies') and len(token) > 4:
+        token = token[:-3] + 'y'
+    elif token.endswith('s') and not token.endswith(('ss', 'us')) and len(token) > 3:
+        token = token[:-1]
+    if token.endswith('ing') and len(token) > 5:
+        token = token[:-3]
+    return token
+
+
+class AnswerScorer:
+    """Scores interview answers by TF-IDF weighted coverage of expected points
+    
+    Every expected point in the bank is vectorized once, L1-normalized so
+    each row sums to 1. A point's coverage is then the share of its term
+    weight that appears in the answer, and a batch of answers is scored with
+    one sparse product: (answers x terms) . (terms x points).
+    """
+    
+    STOP_WORDS = frozenset(['a', 'an', 'the', 'and', 'or', 'of', 'to', 'in', 'on', 'for', 'with', 'is', 'are', 'be', 'vs', 'it', 'its'])
+    TOKEN_PATTERN = re.compile(r"o\([^)]*\)|[a-z0-9][a-z0-9+#^-]*")
+    
+    def __init__(self, questions: Dict[str, Dict], threshold: float = None):
+        self.threshold = threshold if threshold is not None else AssessmentConfig.ANSWER_POINT_THRESHOLD
+        self._rows: Dict[str, Tuple[int, int]] = {}  # question id -> row range in the point matrix
+        points = []
+        for question_id, question in questions.items():
+            expected = question.get('expected_points', [])
+            self._rows[question_id] = (len(points), len(points) + len(expected))
+            points.extend(expected)
+        
+        self.vectorizer = TfidfVectorizer(analyzer=self.terms, norm='l1')
+        if points:
+            self._points_t = self.vectorizer.fit_transform(points).T.tocsr()
+        else:
+            self._points_t = None
+    
+    @classmethod
+    def terms(cls, text: str) -> List[str]:
+        """Lowercased words and big-O terms, stop words dropped, plurals/-ing folded"""
+        terms = [_answer_term(token) for token in cls.TOKEN_PATTERN.findall(text.lower())]
+        return [term for term in terms if term and term not in cls.STOP_WORDS]
+    
+    def coverage(self, answers: List[Tuple[str, str]]) -> List[List[bool]]:
+        """Per answer, whether each expected point of its question is covered"""
+        if self._points_t is None or not answers:
+            return [[] for _ in answers]
+        
+        # Presence, not frequency, of each known term: repeating a word earns nothing
+        vocabulary = self.vectorizer.vocabulary_
+        indices, indptr = [], [0]
+        for _, answer in answers:
+            indices.extend({vocabulary[term] for term in self.terms(answer) if term in vocabulary})
+            indptr.append(len(indices))
+        mentioned = csr_matrix(
+            (np.ones(len(indices)), indices, indptr), shape=(len(answers), len(vocabulary))
+        )
+        weights = mentioned @ self._points_t  # Sparse: only points sharing a term with the answer
+        
+        results = []
+        for i, (question_id, _) in enumerate(answers):
+            start, end = self._rows.get(question_id, (0, 0))
+            covered = [False] * (end - start)
+            row = slice(weights.indptr[i], weights.indptr[i + 1])
+            for point, weight in zip(weights.indices[row], weights.data[row]):
+                if start <= point < end and weight >= self.threshold - 1e-9:
+                    covered[point - start] = True
+            results.append(covered)
+        return results
+
+
+class AssessmentBank:
+    """Challenge and interview question banks, built once and indexed for lookup
+    
+    Indexes are read-only mappings and tuples shared by every request. The
+    entry dicts are shared too (they stay plain dicts so sessions can be
+    JSON-serialized) and must not be modified by callers.
+    """
+    
+    def __init__(self, challenges: Dict[str, Dict[str, List[Dict]]], questions: Dict[str, List[Dict]]):
+        self._challenges = MappingProxyType({
+            level: MappingProxyType({topic: tuple(items) for topic, items in topics.items()})
+            for level, topics in challenges.items()
+        })
+        self._challenges_by_id = MappingProxyType({
+            item['id']: item for topics in challenges.values() for items in topics.values() for item in items
+        })
+        self._questions = MappingProxyType({level: tuple(items) for level, items in questions.items()})
+        self._questions_by_id = MappingProxyType({
+            item['id']: item for items in questions.values() for item in items
+        })
+        self.answer_scorer = AnswerScorer(self._questions_by_id)
+    
+    @classmethod
+    def load(cls, challenge_path: str = None, question_path: str = None) -> 'AssessmentBank':
+        """Built-in banks, each replaced by its external file when one is configured"""
+        challenges = _read_bank_file(challenge_path) if challenge_path else CodingChallenge._load_challenge_bank()
+        questions = _read_bank_file(question_path) if question_path else MockInterview._load_interview_questions()
+        
+        bank = cls(challenges, questions)
+        logger.info(f"Assessment bank loaded: {len(bank._challenges_by_id)} challenges, "
+                    f"{len(bank._questions_by_id)} interview questions")
+        return bank
+    
+    def challenges_for(self, level: str, topic: str) -> Tuple[Dict, ...]:
+        return self._challenges.get(level, MappingProxyType({})).get(topic, ())
+    
+    def challenge(self, challenge_id: str) -> Optional[Dict]:
+        return self._challenges_by_id.get(challenge_id)
+    
+    def questions_for(self, level: str) -> Tuple[Dict, ...]:
+        """Questions for a level; unknown levels get the junior set"""
+        return self._questions.get(level) or self._questions.get('junior', ())
+    
+    def question(self, question_id: str) -> Optional[Dict]:
+        return self._questions_by_id.get(question_id)
+
+
+def _read_bank_file(path: str) -> Dict:
+    """Parse a bank file; ids must be unique since lookups are keyed by them"""
+    with open(path, 'r') as f:
+        if path.endswith(('.yaml', '.yml')):
+            import yaml  # Optional dependency, only needed for YAML banks
+            data = yaml.safe_load(f)
+        else:
+            data = json.load(f)
+    
+    groups = [group for entries in data.values() for group in (entries.values() if isinstance(entries, dict) else [entries])]
+    counts = Counter(entry['id'] for group in groups for entry in group)
+    duplicates = [entry_id for entry_id, count in counts.items() if count > 1]
+    if duplicates:
+        raise ValueError(f"Duplicate ids in {path}: {sorted(duplicates)}")
+    return data
+
+
+_assessment_bank = None
+_assessment_bank_lock = threading.Lock()
+
+
+def get_assessment_bank() -> AssessmentBank:
+    """Get or build the process-wide assessment bank"""
+    global _assessment_bank
+    if _assessment_bank is None:
+        with _assessment_bank_lock:
+            if _assessment_bank is None:
+                _assessment_bank = AssessmentBank.load(
+                    AssessmentConfig.CHALLENGE_BANK_PATH,
+                    AssessmentConfig.INTERVIEW_BANK_PATH
+                )
+    return _assessment_bank
+
+
 class AssessmentEngine:
     """Main assessment engine coordinating all assessment activities"""
     
-    def __init__(self):
+    def __init__(self, grading_mode: str = None, session_store: SessionStore = None):
         self.executor = CodeExecutor()
         self.scorer = CodeScorer()
+        self.sessions = session_store or create_session_store()
+        # Build the challenge/question banks now rather than on the first request
+        self.bank = get_assessment_bank()
+        self.grading_mode = grading_mode or AssessmentConfig.GRADING_MODE
+        # Average runtime per test case, keyed by challenge id, for cheap_first ordering
+        self._case_runtimes: Dict[str, List[Optional[float]]] = {}
+        self._runtimes_lock = threading.Lock()
         os.makedirs(AssessmentConfig.ASSESSMENT_RESULTS_DIR, exist_ok=True)
     
     def start_code_test(self, user_id: str, level: str, topic: str) -> Dict:
@@ -540,6 +1058,7 @@ class AssessmentEngine:
         
         # Save session
         self._save_session(test_session)
+        self._update_user_stats(user_id, self._count_started)
         
         return {
             'session_id': test_session['session_id'],
@@ -552,8 +1071,12 @@ class AssessmentEngine:
             }
         }
     
-    def submit_code_test(self, session_id: str, code: str, language: str) -> Dict:
+    def submit_code_test(self, session_id: str, code: str, language: str, grading_mode: str = None) -> Dict:
         """Submit code for testing"""
+        grading_mode = grading_mode or self.grading_mode
+        if grading_mode not in AssessmentConfig.GRADING_MODES:
+            return {'error': f'Unknown grading mode: {grading_mode}'}
+        
         session = self._load_session(session_id)
         
         if not session:
@@ -570,13 +1093,22 @@ class AssessmentEngine:
                 'time_limit': session['time_limit']
             }
         
+        # A resubmission replaces the earlier result in the user's aggregates
+        previous = dict(session) if session.get('status') == 'completed' else None
+        
         # Run test cases
         challenge = session['challenge']
         test_results = []
+        results = self.executor.execute_tests(
+            code,
+            language,
+            [tc['input'] for tc in challenge['test_cases']],
+            fail_fast=grading_mode != 'full',
+            order=self._cheap_first_order(challenge) if grading_mode == 'cheap_first' else None
+        )
+        self._record_runtimes(challenge, results)
         
-        for i, test_case in enumerate(challenge['test_cases']):
-            result = self.executor.execute_code(code, language, test_case['input'])
-            
+        for i, (test_case, result) in enumerate(zip(challenge['test_cases'], results)):
             passed = result.get('output') == test_case['expected'] and result.get('error') is None
             
             test_results.append({
@@ -587,6 +1119,7 @@ class AssessmentEngine:
                 'passed': passed,
                 'execution_time': result.get('execution_time', 0),
                 'error': result.get('error'),
+                'skipped': result.get('skipped', False),
                 'is_edge_case': i >= len(challenge['test_cases']) - 2  # Last 2 are edge cases
             })
         
@@ -602,15 +1135,36 @@ class AssessmentEngine:
         session['score'] = score_data
         
         self._save_session(session)
+        self._update_user_stats(session['user_id'], lambda stats: self._apply_completed(stats, session, previous))
         
         return {
             'session_id': session_id,
             'score': score_data,
             'test_results': test_results,
+            'grading_mode': grading_mode,
+            'skipped_cases': [r['test_case'] for r in test_results if r['skipped']],
             'time_taken': elapsed,
             'passed': score_data['passed']
         }
     
+    def _cheap_first_order(self, challenge: Dict) -> List[int]:
+        """Case indices by average past runtime; cases never timed go first"""
+        with self._runtimes_lock:
+            runtimes = list(self._case_runtimes.get(challenge['id'], []))
+        runtimes += [None] * (len(challenge['test_cases']) - len(runtimes))
+        return sorted(range(len(challenge['test_cases'])), key=lambda i: runtimes[i] or 0.0)
+    
+    def _record_runtimes(self, challenge: Dict, results: List[Dict]):
+        """Fold this submission's case runtimes into the moving averages"""
+        with self._runtimes_lock:
+            runtimes = self._case_runtimes.setdefault(challenge['id'], [None] * len(results))
+            for i, result in enumerate(results[:len(runtimes)]):
+                if result.get('skipped') or result.get('deadline_exceeded') or result.get('exit_code') is None:
+                    continue
+                previous = runtimes[i]
+                current = result.get('execution_time', 0)
+                runtimes[i] = current if previous is None else 0.8 * previous + 0.2 * current
+    
     def start_interview(self, user_id: str, level: str) -> Dict:
         """Start mock interview session"""
         interview = MockInterview(level)
@@ -628,6 +1182,7 @@ class AssessmentEngine:
         }
         
         self._save_session(session)
+        self._update_user_stats(user_id, self._count_started)
         
         return {
             'session_id': session['session_id'],
@@ -668,6 +1223,8 @@ class AssessmentEngine:
         if not session:
             return {'error': 'Session not found'}
         
+        previous = dict(session) if session.get('status') == 'completed' else None
+        
         # Calculate overall score
         answers = session.get('answers', {})
         total_score = sum(a['score']['score'] for a in answers.values()) / max(len(answers), 1)
@@ -680,6 +1237,7 @@ class AssessmentEngine:
         session['passed'] = total_score >= pass_threshold
         
         self._save_session(session)
+        self._update_user_stats(session['user_id'], lambda stats: self._apply_completed(stats, session, previous))
         
         return {
             'session_id': session_id,
@@ -703,58 +1261,190 @@ class AssessmentEngine:
     
     def _save_session(self, session: Dict):
         """Save session data"""
-        session_file = os.path.join(AssessmentConfig.ASSESSMENT_RESULTS_DIR, f"{session['session_id']}.json")
-        with open(session_file, 'w') as f:
-            json.dump(session, f, indent=2)
+        self.sessions.save(session)
     
     def _load_session(self, session_id: str) -> Optional[Dict]:
         """Load session data"""
-        session_file = os.path.join(AssessmentConfig.ASSESSMENT_RESULTS_DIR, f"{session_id}.json")
-        if os.path.exists(session_file):
-            with open(session_file, 'r') as f:
-                return json.load(f)
-        return None
+        return self.sessions.load(session_id)
     
     def get_user_report(self, user_id: str) -> Dict:
         """Generate comprehensive report for user"""
-        # Load all sessions for user
-        sessions = []
-        for filename in os.listdir(AssessmentConfig.ASSESSMENT_RESULTS_DIR):
-            if filename.endswith('.json'):
-                session = self._load_session(filename[:-5])
-                if session and session.get('user_id') == user_id:
-                    sessions.append(session)
-        
-        if not sessions:
-            return {'error': 'No assessment data found for user'}
+        # Read the running aggregates instead of recomputing from every session
+        stats = self.sessions.load_user_stats(user_id)
+        if stats is None:
+            stats = self._update_user_stats(user_id, None)
         
-        # Calculate stats
-        completed_tests = [s for s in sessions if s.get('status') == 'completed' and s.get('type') != 'interview']
-        completed_interviews = [s for s in sessions if s.get('status') == 'completed' and s.get('type') == 'interview']
+        if not stats['total_assessments']:
+            return {'error': 'No assessment data found for user'}
         
-        avg_test_score = sum(s.get('score', {}).get('percentage', 0) for s in completed_tests) / max(len(completed_tests), 1)
-        avg_interview_score = sum(s.get('total_score', 0) for s in completed_interviews) / max(len(completed_interviews), 1)
+        avg_test_score = self._average(stats['code_tests'])
+        avg_interview_score = self._average(stats['interviews'])
         
         return {
             'user_id': user_id,
-            'total_assessments': len(sessions),
-            'completed_tests': len(completed_tests),
-            'completed_interviews': len(completed_interviews),
+            'total_assessments': stats['total_assessments'],
+            'completed_tests': stats['code_tests']['count'],
+            'completed_interviews': stats['interviews']['count'],
             'average_test_score': avg_test_score,
             'average_interview_score': avg_interview_score,
-            'strong_areas': self._identify_strong_areas(sessions),
-            'weak_areas': self._identify_weak_areas(sessions),
+            'topic_scores': {topic: self._average(bucket) for topic, bucket in stats['by_topic'].items()},
+            'level_scores': {
+                level: {kind: self._average(bucket) for kind, bucket in buckets.items()}
+                for level, buckets in stats['by_level'].items()
+            },
+            'recent_assessments': stats['history'],
+            'strong_areas': self._identify_strong_areas(stats),
+            'weak_areas': self._identify_weak_areas(stats),
             'readiness_level': self._determine_readiness(avg_test_score, avg_interview_score)
         }
     
-    def _identify_strong_areas(self, sessions: List[Dict]) -> List[str]:
-        """Identify user's strong areas"""
-        # Simple implementation - would be more sophisticated in production
-        return ['Problem solving', 'Code quality']
+    def _identify_strong_areas(self, stats: Dict) -> List[str]:
+        """Areas averaging at least STRONG_AREA_SCORE, best first"""
+        areas = self._area_scores(stats)
+        strong = [area for area, score in areas.items() if score >= AssessmentConfig.STRONG_AREA_SCORE]
+        return sorted(strong, key=lambda area: -areas[area])[:3]
+    
+    def _identify_weak_areas(self, stats: Dict) -> List[str]:
+        """Areas averaging below WEAK_AREA_SCORE, worst first"""
+        areas = self._area_scores(stats)
+        weak = [area for area, score in areas.items() if score < AssessmentConfig.WEAK_AREA_SCORE]
+        return sorted(weak, key=lambda area: areas[area])[:3]
+    
+    def _area_scores(self, stats: Dict) -> Dict[str, float]:
+        """Average percentage per rubric criterion, challenge topic and interview category"""
+        merged: Dict[str, Dict] = {}
+        sources = [
+            (AssessmentConfig.RUBRIC_AREAS.get(name, name.replace('_', ' ').capitalize()), bucket)
+            for name, bucket in stats['rubric'].items()
+        ] + [
+            (name.replace('_', ' ').capitalize(), bucket)
+            for name, bucket in list(stats['by_topic'].items()) + list(stats['interview_categories'].items())
+        ]
+        for label, bucket in sources:
+            total = merged.setdefault(label, {'count': 0, 'score_sum': 0.0})
+            total['count'] += bucket['count']
+            total['score_sum'] += bucket['score_sum']
+        return {label: self._average(bucket) for label, bucket in merged.items() if bucket['count'] > 0}
+    
+    def _update_user_stats(self, user_id: str, update) -> Dict:
+        """Apply an incremental update to a user's aggregates and save them
+        
+        The store runs the read-modify-write atomically, so submissions
+        handled by different gunicorn workers do not lose each other's
+        updates. Users without aggregates yet (e.g. sessions migrated from
+        JSON files) get them rebuilt once from their sessions, which already
+        include the change being applied.
+        """
+        result = {}
+        
+        def apply(stats: Optional[Dict]) -> Optional[Dict]:
+            if stats is None:
+                stats = self._stats_from_sessions(user_id)
+            elif update is not None:
+                update(stats)
+            result['stats'] = stats
+            return stats if stats['total_assessments'] else None
+        
+        self.sessions.update_user_stats(user_id, apply)
+        return result['stats']
+    
+    def rebuild_user_stats(self, user_id: str) -> Dict:
+        """Recompute a user's aggregates from all their sessions, replacing the stored ones
+        
+        For sessions written to the store without going through the engine,
+        such as a migration from JSON files: the incremental updates never
+        saw them.
+        """
+        result = {}
+        
+        def apply(stats: Optional[Dict]) -> Dict:
+            result['stats'] = self._stats_from_sessions(user_id)
+            return result['stats']
+        
+        self.sessions.update_user_stats(user_id, apply)
+        return result['stats']
+    
+    def _stats_from_sessions(self, user_id: str) -> Dict:
+        """Aggregates for a user built from scratch out of their stored sessions"""
+        stats = self._empty_user_stats(user_id)
+        sessions = self.sessions.list_user_sessions(user_id)
+        for session in sorted(sessions, key=lambda s: s.get('end_time') or s.get('start_time', '')):
+            self._count_started(stats)
+            if session.get('status') == 'completed':
+                self._apply_completed(stats, session, None)
+        return stats
+    
+    @staticmethod
+    def _empty_user_stats(user_id: str) -> Dict:
+        return {
+            'user_id': user_id,
+            'total_assessments': 0,
+            'code_tests': {'count': 0, 'score_sum': 0.0},
+            'interviews': {'count': 0, 'score_sum': 0.0},
+            'by_topic': {},
+            'by_level': {},
+            'rubric': {},
+            'interview_categories': {},
+            'history': []
+        }
+    
+    @staticmethod
+    def _count_started(stats: Dict):
+        stats['total_assessments'] += 1
+    
+    def _apply_completed(self, stats: Dict, session: Dict, previous: Optional[Dict]):
+        """Add a completed session to the aggregates, first removing its earlier result"""
+        if previous is not None:
+            self._fold_session(stats, previous, -1)
+        self._fold_session(stats, session, 1)
+        
+        is_interview = session.get('type') == 'interview'
+        history = [h for h in stats['history'] if h['session_id'] != session['session_id']]
+        history.append({
+            'session_id': session['session_id'],
+            'type': 'interview' if is_interview else 'code_test',
+            'level': session.get('level'),
+            'topic': session.get('topic'),
+            'score': session.get('total_score', 0) if is_interview else session.get('score', {}).get('percentage', 0),
+            'passed': session.get('passed', session.get('score', {}).get('passed')),
+            'completed_at': session.get('end_time')
+        })
+        stats['history'] = history[-AssessmentConfig.REPORT_HISTORY_SIZE:]
+    
+    def _fold_session(self, stats: Dict, session: Dict, sign: int):
+        """Add (sign=1) or remove (sign=-1) one completed session's scores"""
+        level = session.get('level', 'unknown')
+        
+        if session.get('type') == 'interview':
+            score = session.get('total_score', 0)
+            self._add(stats['interviews'], score, sign)
+            self._add(stats['by_level'].setdefault(level, {}).setdefault('interviews', {}), score, sign)
+            
+            categories = {q['id']: q.get('category', 'general') for q in session.get('questions', [])}
+            for question_id, answer in session.get('answers', {}).items():
+                if 'score' in answer.get('score', {}):
+                    category = categories.get(question_id, 'general')
+                    self._add(stats['interview_categories'].setdefault(category, {}), answer['score']['score'], sign)
+        else:
+            score_data = session.get('score', {})
+            score = score_data.get('percentage', 0)
+            self._add(stats['code_tests'], score, sign)
+            self._add(stats['by_topic'].setdefault(session.get('topic', 'general'), {}), score, sign)
+            self._add(stats['by_level'].setdefault(level, {}).setdefault('code_tests', {}), score, sign)
+            
+            rubric = session.get('challenge', {}).get('scoring_rubric', {})
+            for criterion, points in score_data.get('breakdown', {}).items():
+                if rubric.get(criterion):
+                    self._add(stats['rubric'].setdefault(criterion, {}), points / rubric[criterion] * 100, sign)
+    
+    @staticmethod
+    def _add(bucket: Dict, value: float, sign: int):
+        bucket['count'] = bucket.get('count', 0) + sign
+        bucket['score_sum'] = bucket.get('score_sum', 0.0) + sign * value
     
-    def _identify_weak_areas(self, sessions: List[Dict]) -> List[str]:
-        """Identify user's weak areas"""
-        return ['Algorithm efficiency', 'Edge case handling']
+    @staticmethod
+    def _average(bucket: Dict) -> float:
+        return bucket['score_sum'] / bucket['count'] if bucket.get('count', 0) > 0 else 0
     
     def _determine_readiness(self, test_score: float, interview_score: float) -> str:
         """Determine overall readiness level"""
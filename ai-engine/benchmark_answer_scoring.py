@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Accuracy and speed benchmark for interview answer scoring
+Generates a synthetic corpus of answers with known point coverage and scores
+it with the original keyword check and with the TF-IDF AnswerScorer.
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from assessment import AnswerScorer, get_assessment_bank
+
+FILLER = [
+    "I think this is an important topic in interviews.",
+    "In my last project we ran into this quite often.",
+    "It depends on the situation and the team.",
+    "There are a few things to keep in mind here.",
+    "Overall it is a common question and the answer is not always obvious."
+]
+
+
+def keyword_coverage(expected_points, answer):
+    """The original check: a point counts if any of its words appears anywhere in the answer"""
+    answer_lower = answer.lower()
+    return [any(keyword in answer_lower for keyword in point.lower().split()) for point in expected_points]
+
+
+def inflect(point, rng):
+    """A light paraphrase of a point: plural/-ing forms and changed word order"""
+    words = point.split()
+    if len(words) > 1 and '(' not in point and rng.random() < 0.5:
+        words = words[::-1]
+    return ' '.join(
+        word + 's' if word.isalpha() and len(word) > 3 and not word.endswith('s') and rng.random() < 0.3 else word
+        for word in words
+    )
+
+
+def build_corpus(questions, count, rng):
+    """(question_id, answer, truth) triples; truth marks the points the answer covers"""
+    corpus = []
+    for _ in range(count):
+        question = rng.choice(questions)
+        points = question['expected_points']
+        truth = [rng.random() < 0.5 for _ in points]
+        sentences = [rng.choice(FILLER) for _ in range(rng.randint(1, 3))]
+        for point, covered in zip(points, truth):
+            if covered:
+                sentences.append(f"It is about {inflect(point, rng)}.")
+            elif len(point.split()) > 1 and rng.random() < 0.5:
+                # Mention one word of the point without covering it
+                sentences.append(f"The {rng.choice(point.split())} part matters less.")
+        rng.shuffle(sentences)
+        corpus.append((question['id'], ' '.join(sentences), truth))
+    return corpus
+
+
+def accuracy(predicted, corpus):
+    """Point precision, recall and mean absolute score error (0-100 scale)"""
+    tp = fp = fn = 0
+    abs_error = 0.0
+    for covered, (_, _, truth) in zip(predicted, corpus):
+        tp += sum(1 for p, t in zip(covered, truth) if p and t)
+        fp += sum(1 for p, t in zip(covered, truth) if p and not t)
+        fn += sum(1 for p, t in zip(covered, truth) if t and not p)
+        if truth:
+            abs_error += abs(sum(covered) - sum(truth)) / len(truth) * 100
+    return tp / max(tp + fp, 1), tp / max(tp + fn, 1), abs_error / len(corpus)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark interview answer scoring")
+    parser.add_argument('--answers', type=int, default=5000)
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    bank = get_assessment_bank()
+    questions = [q for level in ('junior', 'middle', 'senior') for q in bank.questions_for(level) if q.get('expected_points')]
+    corpus = build_corpus(questions, args.answers, random.Random(args.seed))
+
+    print("=" * 60)
+    print("CodeMentor AI - Interview Answer Scoring Benchmark")
+    print("=" * 60)
+    print(f"Questions: {len(questions)}  Answers: {len(corpus)}")
+
+    started = time.time()
+    keyword = [keyword_coverage(bank.question(qid)['expected_points'], answer) for qid, answer, _ in corpus]
+    keyword_time = time.time() - started
+
+    started = time.time()
+    scorer = AnswerScorer({q['id']: q for q in questions})
+    build_time = time.time() - started
+
+    pairs = [(qid, answer) for qid, answer, _ in corpus]
+    started = time.time()
+    for pair in pairs[:500]:
+        scorer.coverage([pair])
+    single_time = (time.time() - started) / min(len(pairs), 500) * len(pairs)
+
+    started = time.time()
+    tfidf = scorer.coverage(pairs)
+    batch_time = time.time() - started
+
+    print(f"\n{'Scorer':<22}{'Precision':>10}{'Recall':>10}{'Score MAE':>11}{'Answers/s':>12}")
+    print("-" * 65)
+    for name, predicted, elapsed in (
+        ('keyword (original)', keyword, keyword_time),
+        ('tfidf, one by one', tfidf, single_time),
+        ('tfidf, batch', tfidf, batch_time)
+    ):
+        precision, recall, mae = accuracy(predicted, corpus)
+        print(f"{name:<22}{precision:>10.3f}{recall:>10.3f}{mae:>11.1f}{len(corpus) / elapsed:>12.0f}")
+    print(f"\nVectorizing {sum(len(q['expected_points']) for q in questions)} expected points took {build_time * 1000:.1f} ms (once per process)")
+    print("=" * 60)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
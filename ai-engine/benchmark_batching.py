@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Load benchmark for chat request batching
+Fires concurrent tutor requests with batching disabled and enabled and
+compares throughput. Requires the chat model (run init_models.py first).
+"""
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from models import ModelConfig, ModelLoader, get_custom_tutor
+
+SAMPLE_QUESTIONS = [
+    "How do for loops work in Python?",
+    "What is the difference between a list and a tuple?",
+    "Can you explain recursion with an example?",
+    "How do I reverse a string?",
+    "What does a dictionary comprehension look like?",
+    "Why is my while loop never ending?",
+    "How do I read a file line by line?",
+    "What is Big O notation?"
+]
+
+
+def run_load(tutor, tokenizer, concurrency: int, total_requests: int) -> dict:
+    """Send total_requests chat messages from `concurrency` threads"""
+    def ask(i):
+        started = time.time()
+        response = tutor.generate_response(
+            SAMPLE_QUESTIONS[i % len(SAMPLE_QUESTIONS)],
+            {'skill_level': 'beginner', 'current_topic': 'python'},
+            'encouraging'
+        )
+        return response, time.time() - started
+
+    started = time.time()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(ask, range(total_requests)))
+    elapsed = time.time() - started
+
+    # Re-tokenize the cleaned responses to approximate generated tokens
+    tokens = sum(len(tokenizer(r['message'])['input_ids']) for r, _ in results)
+    latencies = sorted(latency for _, latency in results)
+
+    return {
+        'elapsed': elapsed,
+        'requests_per_sec': total_requests / elapsed,
+        'tokens_per_sec': tokens / elapsed,
+        'p50_latency': latencies[len(latencies) // 2],
+        'p95_latency': latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))],
+        'fallbacks': sum(1 for r, _ in results if r.get('model_used') == 'fallback')
+    }
+
+
+def print_result(label: str, result: dict):
+    print(f"\n{label}")
+    print("-" * 60)
+    print(f"  Wall time:      {result['elapsed']:.2f}s")
+    print(f"  Requests/sec:   {result['requests_per_sec']:.2f}")
+    print(f"  Tokens/sec:     {result['tokens_per_sec']:.1f}")
+    print(f"  p50 latency:    {result['p50_latency']:.2f}s")
+    print(f"  p95 latency:    {result['p95_latency']:.2f}s")
+    print(f"  Fallbacks:      {result['fallbacks']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark chat request batching")
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--requests', type=int, default=32)
+    parser.add_argument('--max-batch-size', type=int, default=ModelConfig.CHAT_BATCH_MAX_SIZE)
+    parser.add_argument('--max-wait-ms', type=int, default=ModelConfig.CHAT_BATCH_MAX_WAIT_MS)
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("CodeMentor AI - Chat Batching Benchmark")
+    print("=" * 60)
+    print(f"Device: {ModelConfig.DEVICE}  Concurrency: {args.concurrency}  Requests: {args.requests}")
+
+    _, tokenizer = ModelLoader().load_chat_model()
+    tutor = get_custom_tutor()
+    tutor.scheduler.max_batch_size = max(1, args.max_batch_size)
+    tutor.scheduler.max_wait = args.max_wait_ms / 1000.0
+
+    # Warm up so neither run pays for lazy initialisation
+    tutor.generate_response("Hello", {}, 'encouraging')
+
+    ModelConfig.CHAT_BATCHING_ENABLED = False
+    sequential = run_load(tutor, tokenizer, args.concurrency, args.requests)
+    print_result("Batching disabled (one generate per request)", sequential)
+
+    ModelConfig.CHAT_BATCHING_ENABLED = True
+    batched = run_load(tutor, tokenizer, args.concurrency, args.requests)
+    print_result(
+        f"Batching enabled (max batch {tutor.scheduler.max_batch_size}, "
+        f"wait {args.max_wait_ms}ms)", batched
+    )
+
+    stats = tutor.scheduler.get_stats()
+    print(f"\nScheduler: {stats['batches']} batches, avg size {stats['avg_batch_size']:.1f}")
+    print("=" * 60)
+    print(f"Throughput speedup: {batched['tokens_per_sec'] / max(sequential['tokens_per_sec'], 1e-9):.2f}x")
+    print("=" * 60)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
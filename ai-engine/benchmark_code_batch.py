@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Throughput benchmark for bulk code analysis
+Analyzes the same set of submissions one by one (the /code/analyze path)
+and through CodeAnalyzer.analyze_batch (the /code/analyze/batch path).
+Requires the code model (run init_models.py first).
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from models import ModelConfig, ModelLoader
+
+SAMPLE_SUBMISSIONS = [
+    "def total(nums):\n    s = 0\n    for i in range(len(nums)):\n        s = s + nums[i]\n    return s",
+    "def is_palindrome(s):\n    return s == s[::-1]",
+    "def fib(n):\n    if n < 2:\n        return n\n    return fib(n - 1) + fib(n - 2)",
+    "def find_max(items):\n    best = items[0]\n    for item in items:\n        if item > best:\n            best = item\n    print(best)\n    return best",
+    "from math import *\n\ndef area(r):\n    return pi * r * r",
+    "def count_words(text):\n    counts = {}\n    for word in text.split():\n        counts[word] = counts.get(word, 0) + 1\n    return counts"
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark batched code analysis")
+    parser.add_argument('--items', type=int, default=32)
+    parser.add_argument('--batch-sizes', default='4,8,16', help='Comma-separated CodeT5 batch sizes')
+    args = parser.parse_args()
+
+    # Imported here so the Flask app setup doesn't run on --help
+    from main import code_analyzer
+
+    items = [
+        {'code': SAMPLE_SUBMISSIONS[i % len(SAMPLE_SUBMISSIONS)], 'language': 'python'}
+        for i in range(args.items)
+    ]
+
+    print("=" * 60)
+    print("CodeMentor AI - Batched Code Analysis Benchmark")
+    print("=" * 60)
+    print(f"Device: {ModelConfig.DEVICE}  Items: {args.items}")
+
+    # Load and warm the model so neither path pays for it
+    ModelLoader().load_code_model()
+    code_analyzer.analyze_code(items[0]['code'], 'python')
+
+    started = time.time()
+    for item in items:
+        code_analyzer.analyze_code(item['code'], item['language'])
+    per_item = time.time() - started
+    print(f"\n{'Path':<20}{'Wall s':>10}{'Items/s':>12}{'Speedup':>10}")
+    print("-" * 60)
+    print(f"{'per item':<20}{per_item:>10.2f}{args.items / per_item:>12.2f}{1.0:>9.2f}x")
+
+    for batch_size in [int(b) for b in args.batch_sizes.split(',') if b.strip()]:
+        started = time.time()
+        first_result = None
+        for _ in code_analyzer.analyze_batch(items, batch_size):
+            if first_result is None:
+                first_result = time.time() - started
+        elapsed = time.time() - started
+        label = f"batch {batch_size}"
+        print(f"{label:<20}{elapsed:>10.2f}{args.items / elapsed:>12.2f}{per_item / elapsed:>9.2f}x"
+              f"   (first result after {first_result:.2f}s)")
+
+    print("=" * 60)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
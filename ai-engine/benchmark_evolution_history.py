@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the evolution history log
+Records synthetic evolution cycles with the original rewrite-the-file JSON
+history and with the append-only log, timing appends and status reads as
+the history grows.
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from self_evolve import EvolutionHistory
+
+
+class RewriteHistory:
+    """The original store: one indented JSON array, loaded and rewritten on every append"""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'w') as f:
+            json.dump([], f)
+
+    def load_history(self):
+        with open(self.path) as f:
+            return json.load(f)
+
+    def add_evolution(self, entry):
+        history = self.load_history()
+        history.append(entry)
+        with open(self.path, 'w') as f:
+            json.dump(history, f, indent=2)
+
+    def status(self):
+        # get_evolution_status loaded the file three times
+        latest = self.load_history()[-1]
+        best = max(self.load_history(), key=lambda x: x.get('metrics', {}).get('performance_score', 0))
+        return len(self.load_history()), latest, best
+
+
+def make_entry(i, code_lines):
+    return {
+        'variant_name': f"variant_{i}",
+        'analysis': {'weaknesses': ['Low user success rate in challenges'], 'metrics': {'success_rate': 0.5}},
+        'variant': {'code': 'def handler():\n    return 1\n' * code_lines, 'generator': 'ollama'},
+        'test_results': {'tests_passed': 3, 'tests_failed': 1},
+        'deployed': False,
+        'metrics': {'performance_score': (i * 7919 % 1000) / 1000, 'tests_passed': i % 5, 'tests_failed': 1}
+    }
+
+
+def run(store, status, entries, checkpoints):
+    """Append all entries, timing the append and a status read at each checkpoint"""
+    rows = []
+    started = time.time()
+    for i, entry in enumerate(entries, 1):
+        store.add_evolution(dict(entry))
+        if i in checkpoints:
+            elapsed = time.time() - started
+            t0 = time.time()
+            store.add_evolution(dict(entry))
+            append_ms = (time.time() - t0) * 1000
+            t0 = time.time()
+            status()
+            status_ms = (time.time() - t0) * 1000
+            rows.append((i, elapsed, append_ms, status_ms))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark evolution history appends and status reads")
+    parser.add_argument('--cycles', type=int, default=2000, help="Evolution cycles to record")
+    parser.add_argument('--code-lines', type=int, default=100, help="Lines of generated code per variant")
+    parser.add_argument('--skip-rewrite', action='store_true', help="Only run the append-only log")
+    args = parser.parse_args()
+
+    entries = [make_entry(i, args.code_lines) for i in range(args.cycles)]
+    checkpoints = {n for n in (100, 1000, 10000, 50000, args.cycles) if n <= args.cycles}
+
+    print("=" * 60)
+    print("CodeMentor AI - Evolution History Benchmark")
+    print("=" * 60)
+    print(f"Cycles: {args.cycles}  Entry size: ~{len(json.dumps(entries[0])) / 1024:.1f} KB")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        stores = []
+        if not args.skip_rewrite:
+            rewrite = RewriteHistory(os.path.join(tmp, 'history.json'))
+            stores.append(('rewrite JSON', rewrite, rewrite.status))
+        log = EvolutionHistory(os.path.join(tmp, 'history.jsonl'))
+        stores.append(('append-only log', log, lambda: (log.count(), log.get_latest_evolution(), log.get_best_variant())))
+
+        print(f"\n{'Store':<18}{'Entries':>9}{'Total s':>10}{'Append ms':>11}{'Status ms':>11}")
+        print("-" * 59)
+        for name, store, status in stores:
+            for entries_so_far, elapsed, append_ms, status_ms in run(store, status, entries, checkpoints):
+                print(f"{name:<18}{entries_so_far:>9}{elapsed:>10.2f}{append_ms:>11.2f}{status_ms:>11.2f}")
+
+    print("=" * 60)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Accuracy/latency comparison for CPU quantization modes
+Loads the chat and code models once per MODEL_QUANTIZATION mode, runs the
+same greedy prompts through each and reports weight size, latency and how
+closely the output matches the float32 baseline.
+Requires the models to be cached (run init_models.py first).
+"""
+
+import argparse
+import difflib
+import gc
+import io
+import os
+import sys
+import time
+from typing import Tuple
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+import torch
+
+from models import ModelConfig, ModelLoader, _cpu_supports_bf16
+
+CHAT_PROMPTS = [
+    "How do for loops work in Python?",
+    "What is the difference between a list and a tuple?",
+    "Explain recursion with a short example."
+]
+
+CODE_SNIPPETS = [
+    "def total(nums):\n    s = 0\n    for i in range(len(nums)):\n        s = s + nums[i]\n    return s",
+    "def is_palindrome(s):\n    return s == s[::-1]"
+]
+
+
+def model_size_mb(model) -> float:
+    """Serialized state_dict size - counts packed int8 weights correctly"""
+    buffer = io.BytesIO()
+    torch.save(model.state_dict(), buffer)
+    return buffer.tell() / (1024 * 1024)
+
+
+def greedy(model, tokenizer, text: str, max_new_tokens: int) -> Tuple[str, float]:
+    inputs = tokenizer(text, return_tensors="pt", truncation=True, max_length=ModelConfig.MAX_LENGTH)
+    started = time.time()
+    with torch.no_grad():
+        outputs = model.generate(
+            **inputs,
+            max_new_tokens=max_new_tokens,
+            do_sample=False,
+            pad_token_id=tokenizer.eos_token_id
+        )
+    elapsed = time.time() - started
+    if model.config.is_encoder_decoder:
+        return tokenizer.decode(outputs[0], skip_special_tokens=True), elapsed
+    return tokenizer.decode(outputs[0][inputs['input_ids'].shape[1]:], skip_special_tokens=True), elapsed
+
+
+def run_mode(mode: str, max_new_tokens: int) -> dict:
+    """Load both models under one quantization mode and time the sample prompts"""
+    ModelConfig.QUANTIZATION = mode
+    loader = ModelLoader()
+    loader.chat_model = loader.chat_tokenizer = None
+    loader.code_model = loader.code_tokenizer = None
+    gc.collect()
+
+    started = time.time()
+    chat_model, chat_tokenizer = loader.load_chat_model()
+    code_model, code_tokenizer = loader.load_code_model()
+    load_time = time.time() - started
+
+    outputs, latencies = [], []
+    for prompt in CHAT_PROMPTS:
+        text, elapsed = greedy(chat_model, chat_tokenizer, f"<|user|>\n{prompt}</s>\n<|assistant|>\n", max_new_tokens)
+        outputs.append(text)
+        latencies.append(elapsed)
+    for snippet in CODE_SNIPPETS:
+        text, elapsed = greedy(code_model, code_tokenizer, f"Analyze this python code:\n\n{snippet}", max_new_tokens)
+        outputs.append(text)
+        latencies.append(elapsed)
+
+    return {
+        'mode': mode,
+        'load_time': load_time,
+        'chat_size_mb': model_size_mb(chat_model),
+        'code_size_mb': model_size_mb(code_model),
+        'avg_latency': sum(latencies) / len(latencies),
+        'outputs': outputs
+    }
+
+
+def similarity(a: str, b: str) -> float:
+    return difflib.SequenceMatcher(None, a, b).ratio()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare CPU quantization modes")
+    parser.add_argument('--modes', default='none,int8,bf16', help='Comma-separated MODEL_QUANTIZATION values')
+    parser.add_argument('--max-new-tokens', type=int, default=64)
+    args = parser.parse_args()
+
+    if ModelConfig.DEVICE != "cpu":
+        print("Quantization modes only apply on CPU; run with CUDA_VISIBLE_DEVICES=''")
+        return 1
+
+    modes = [m.strip() for m in args.modes.split(',') if m.strip()]
+    if 'bf16' in modes and not _cpu_supports_bf16():
+        print("Note: this CPU lacks native bf16 - the bf16 run falls back to float32")
+
+    print("=" * 70)
+    print("CodeMentor AI - Quantization Comparison")
+    print("=" * 70)
+
+    results = [run_mode(mode, args.max_new_tokens) for mode in modes]
+    baseline = results[0]
+
+    print(f"\n{'Mode':<8}{'Chat MB':>10}{'Code MB':>10}{'Load s':>10}{'Avg gen s':>12}{'Match vs ' + baseline['mode']:>16}")
+    print("-" * 70)
+    for result in results:
+        match = sum(
+            similarity(a, b) for a, b in zip(baseline['outputs'], result['outputs'])
+        ) / len(result['outputs'])
+        print(
+            f"{result['mode']:<8}{result['chat_size_mb']:>10.0f}{result['code_size_mb']:>10.0f}"
+            f"{result['load_time']:>10.1f}{result['avg_latency']:>12.2f}{match:>16.1%}"
+        )
+    print("=" * 70)
+    print("Match is the mean character-level similarity of greedy outputs to the first mode.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Tokens/sec benchmark for speculative decoding of tutor responses
+Generates replies to the same tutor prompts plainly, with prompt-lookup
+drafting and with a draft model, one prompt at a time (the case that
+speculation applies to). Requires the chat model (run init_models.py first);
+the draft model is downloaded on first use.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import torch
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from models import CustomAITutor, ModelConfig, ModelLoader
+
+TUTOR_PROMPTS = [
+    ("Why does this print the same number every time?\n\nfor i in range(5):\n    x = 1\n    print(x)", 'loops'),
+    ("Can you explain what a list comprehension is and rewrite this with one?\n\n"
+     "squares = []\nfor n in numbers:\n    squares.append(n * n)", 'lists'),
+    ("My function returns None instead of the total:\n\ndef total(items):\n    s = 0\n"
+     "    for item in items:\n        s += item\n    print(s)", 'functions'),
+    ("What is the difference between a list and a tuple in Python?", 'data structures'),
+    ("How do I fix 'IndexError: list index out of range' in this code?\n\n"
+     "nums = [1, 2, 3]\nfor i in range(len(nums) + 1):\n    print(nums[i])", 'debugging'),
+    ("When should I use recursion instead of a loop?", 'recursion')
+]
+
+
+def run(model, tokenizer, prompts, gen_kwargs, speculative):
+    """Generate for every prompt; returns (new tokens, seconds, texts)"""
+    tokens = 0
+    texts = []
+    started = time.time()
+    for prompt in prompts:
+        inputs = tokenizer(prompt, return_tensors="pt").to(model.device)
+        with torch.no_grad():
+            outputs = model.generate(**inputs, **gen_kwargs, **speculative)
+        new_tokens = outputs[0][inputs['input_ids'].shape[1]:]
+        tokens += len(new_tokens)
+        texts.append(tokenizer.decode(new_tokens, skip_special_tokens=True))
+    return tokens, time.time() - started, texts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark speculative decoding for tutor responses")
+    parser.add_argument('--modes', default='none,prompt_lookup,draft', help='Comma-separated SPECULATIVE_DECODING modes')
+    parser.add_argument('--max-new-tokens', type=int, default=128)
+    parser.add_argument('--sample', action='store_true', help='Use the tutor sampling settings instead of greedy decoding')
+    args = parser.parse_args()
+
+    loader = ModelLoader()
+    model, tokenizer = loader.load_chat_model()
+    tutor = CustomAITutor()
+    prompts = [
+        tutor._build_prefix({'skill_level': 'beginner', 'current_topic': topic}, 'encouraging')[1]
+        + tutor._format_user_turn(question)
+        for question, topic in TUTOR_PROMPTS
+    ]
+
+    gen_kwargs = tutor._generation_kwargs(tokenizer, tutor.policy.chat_budget())
+    gen_kwargs['max_new_tokens'] = args.max_new_tokens
+    del gen_kwargs['max_time']  # Measure full-length generations, not the request deadline
+    if not args.sample:
+        # Greedy output is identical with and without speculation, so only speed differs
+        gen_kwargs = {'max_new_tokens': args.max_new_tokens, 'do_sample': False, 'pad_token_id': tokenizer.eos_token_id}
+
+    print("=" * 60)
+    print("CodeMentor AI - Speculative Decoding Benchmark")
+    print("=" * 60)
+    print(f"Device: {ModelConfig.DEVICE}  Quantization: {ModelConfig.QUANTIZATION}  "
+          f"Decoding: {'sampled' if args.sample else 'greedy'}  Prompts: {len(prompts)}")
+
+    # Warm up so the first mode doesn't pay for kernel initialisation
+    run(model, tokenizer, prompts[:1], dict(gen_kwargs, max_new_tokens=4), {})
+
+    print(f"\n{'Mode':<16}{'Tokens':>8}{'Wall s':>10}{'Tokens/s':>10}{'Speedup':>10}{'Same text':>11}")
+    print("-" * 65)
+    baseline = None
+    for mode in [m.strip() for m in args.modes.split(',') if m.strip()]:
+        ModelConfig.SPECULATIVE_DECODING = mode
+        if mode == 'draft' and loader.draft_model is None:
+            loader._load_draft_model()
+            if loader.draft_model is None:
+                print(f"{mode:<16}  draft model unavailable ({ModelConfig.SPECULATIVE_DRAFT_MODEL})")
+                continue
+
+        tokens, elapsed, texts = run(model, tokenizer, prompts, gen_kwargs, loader.speculative_kwargs())
+        rate = tokens / elapsed
+        if baseline is None:
+            baseline = (rate, texts)
+        same = sum(a == b for a, b in zip(texts, baseline[1]))
+        print(f"{mode:<16}{tokens:>8}{elapsed:>10.2f}{rate:>10.2f}{rate / baseline[0]:>9.2f}x{same:>7}/{len(texts)}")
+
+    print("=" * 60)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,356 @@
+"""
+Response Caching Module
+Redis-backed caches that let repeated requests skip model generation and
+re-analysis
+"""
+
+import os
+import re
+import json
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.metrics.pairwise import cosine_similarity
+
+logger = logging.getLogger(__name__)
+
+
+class CacheConfig:
+    """Configuration for response caching"""
+    
+    # Tutor chat response cache
+    TUTOR_CACHE_ENABLED = os.getenv('TUTOR_CACHE_ENABLED', 'true').lower() == 'true'
+    TUTOR_CACHE_TTL = int(os.getenv('TUTOR_CACHE_TTL', '86400'))  # 24 hours
+    
+    # Near-duplicate lookup with TF-IDF similarity (exact match is always tried first)
+    TUTOR_CACHE_SIMILARITY_ENABLED = os.getenv('TUTOR_CACHE_SIMILARITY', 'false').lower() == 'true'
+    TUTOR_CACHE_SIMILARITY_THRESHOLD = float(os.getenv('TUTOR_CACHE_SIMILARITY_THRESHOLD', '0.8'))
+    TUTOR_CACHE_MAX_QUESTIONS = int(os.getenv('TUTOR_CACHE_MAX_QUESTIONS', '500'))  # Per context bucket
+    
+    # Code analysis cache, keyed by the submitted code itself
+    ANALYSIS_CACHE_ENABLED = os.getenv('ANALYSIS_CACHE_ENABLED', 'true').lower() == 'true'
+    ANALYSIS_CACHE_LRU_SIZE = int(os.getenv('ANALYSIS_CACHE_LRU_SIZE', '2048'))  # Entries per process
+    ANALYSIS_CACHE_TTL = int(os.getenv('ANALYSIS_CACHE_TTL', '604800'))  # 7 days in Redis
+
+
+# Question filler words ignored by similarity matching. Deliberately not
+# sklearn's English list, which drops keywords like "for", "while" and "if".
+QUESTION_STOP_WORDS = frozenset([
+    'a', 'an', 'the', 'how', 'what', 'why', 'when', 'where', 'which', 'do', 'does', 'did',
+    'is', 'are', 'was', 'i', 'me', 'my', 'you', 'can', 'could', 'would', 'should', 'please',
+    'to', 'of', 'in', 'on', 'it', 'this', 'that', 'work', 'works', 'explain', 'tell', 'about'
+])
+
+
+def _question_terms(text: str) -> List[str]:
+    """Content words of a normalized question, with plural 's' folded"""
+    return [
+        word[:-1] if word.endswith('s') and len(word) > 3 else word
+        for word in text.split()
+        if word not in QUESTION_STOP_WORDS
+    ]
+
+
+class TutorResponseCache:
+    """Cache of tutor responses keyed by normalized question and tutoring context
+    
+    Responses are stored under a hash of (personality, skill level, topic,
+    normalized message). When similarity lookup is enabled, each context
+    bucket also keeps an index of its cached questions so a new question can
+    be matched against them by TF-IDF cosine similarity.
+    """
+    
+    KEY_PREFIX = 'tutor:resp:'
+    INDEX_PREFIX = 'tutor:idx:'
+    STATS_KEY = 'tutor:cache:stats'
+    
+    def __init__(self, redis_client=None):
+        self.redis = redis_client
+        self.enabled = CacheConfig.TUTOR_CACHE_ENABLED and redis_client is not None
+        # Fitted vectorizers per bucket, refit when the bucket's question set changes
+        self._vectorizers: Dict[str, Tuple[frozenset, TfidfVectorizer, object, List[str]]] = {}
+        self._lock = threading.Lock()
+    
+    def get(self, user_message: str, context: Dict, personality: str) -> Optional[Dict]:
+        """Return a cached response for this question, or None"""
+        if not self.enabled:
+            return None
+        
+        try:
+            normalized = self._normalize(user_message)
+            bucket = self._bucket(context, personality)
+            
+            cached = self.redis.get(self._response_key(bucket, normalized))
+            if cached is not None:
+                self._count('hits_exact')
+                return dict(json.loads(cached), cache='exact')
+            
+            if CacheConfig.TUTOR_CACHE_SIMILARITY_ENABLED:
+                response = self._get_similar(bucket, normalized)
+                if response is not None:
+                    self._count('hits_similar')
+                    return dict(response, cache='similar')
+            
+            self._count('misses')
+        except Exception as e:
+            logger.warning(f"Tutor cache lookup failed: {e}")
+        
+        return None
+    
+    def set(self, user_message: str, context: Dict, personality: str, response: Dict):
+        """Store a generated response (fallback and load-degraded responses are never cached)"""
+        if not self.enabled or response.get('model_used') in (None, 'fallback'):
+            return
+        if response.get('generation', {}).get('degraded'):
+            return
+        
+        try:
+            normalized = self._normalize(user_message)
+            bucket = self._bucket(context, personality)
+            key = self._response_key(bucket, normalized)
+            
+            # The generation budget reflects the load when this reply ran, not when it is replayed
+            stored = {k: v for k, v in response.items() if k != 'generation'}
+            pipe = self.redis.pipeline()
+            pipe.setex(key, CacheConfig.TUTOR_CACHE_TTL, json.dumps(stored))
+            if CacheConfig.TUTOR_CACHE_SIMILARITY_ENABLED:
+                index_key = self.INDEX_PREFIX + bucket
+                pipe.hlen(index_key)
+                results = pipe.execute()
+                # Keep the similarity index bounded; the exact-match entry is stored regardless
+                if results[1] < CacheConfig.TUTOR_CACHE_MAX_QUESTIONS:
+                    pipe = self.redis.pipeline()
+                    pipe.hset(index_key, normalized, key)
+                    pipe.expire(index_key, CacheConfig.TUTOR_CACHE_TTL)
+                    pipe.execute()
+            else:
+                pipe.execute()
+            
+            self._count('stores')
+        except Exception as e:
+            logger.warning(f"Tutor cache store failed: {e}")
+    
+    def get_stats(self) -> Dict:
+        """Hit/miss counters shared by all workers using this Redis"""
+        stats = {'enabled': self.enabled, 'similarity_enabled': CacheConfig.TUTOR_CACHE_SIMILARITY_ENABLED}
+        counters = {'hits_exact': 0, 'hits_similar': 0, 'misses': 0, 'stores': 0}
+        
+        if self.enabled:
+            try:
+                for name, value in self.redis.hgetall(self.STATS_KEY).items():
+                    name = name.decode() if isinstance(name, bytes) else name
+                    counters[name] = int(value)
+            except Exception as e:
+                logger.warning(f"Tutor cache stats unavailable: {e}")
+        
+        lookups = counters['hits_exact'] + counters['hits_similar'] + counters['misses']
+        stats.update(counters)
+        stats['hit_ratio'] = (counters['hits_exact'] + counters['hits_similar']) / lookups if lookups else 0.0
+        return stats
+    
+    def _get_similar(self, bucket: str, normalized: str) -> Optional[Dict]:
+        """Find the most similar cached question in the bucket above the threshold"""
+        index_key = self.INDEX_PREFIX + bucket
+        index = {
+            (k.decode() if isinstance(k, bytes) else k): (v.decode() if isinstance(v, bytes) else v)
+            for k, v in self.redis.hgetall(index_key).items()
+        }
+        if not index:
+            return None
+        
+        vectorizer, matrix, questions = self._get_vectorizer(bucket, index)
+        query = vectorizer.transform([normalized])
+        if query.nnz == 0:
+            return None
+        scores = cosine_similarity(query, matrix)[0]
+        best = scores.argmax()
+        if scores[best] < CacheConfig.TUTOR_CACHE_SIMILARITY_THRESHOLD:
+            return None
+        
+        cached = self.redis.get(index[questions[best]])
+        if cached is None:
+            # Response expired before its index entry - drop the stale question
+            self.redis.hdel(index_key, questions[best])
+            return None
+        return json.loads(cached)
+    
+    def _get_vectorizer(self, bucket: str, index: Dict[str, str]):
+        """Fitted TF-IDF model over the bucket's questions, reused until the set changes"""
+        questions_set = frozenset(index)
+        with self._lock:
+            entry = self._vectorizers.get(bucket)
+            if entry is not None and entry[0] == questions_set:
+                return entry[1], entry[2], entry[3]
+        
+        questions = sorted(questions_set)
+        vectorizer = TfidfVectorizer(analyzer=_question_terms)
+        matrix = vectorizer.fit_transform(questions)
+        
+        with self._lock:
+            self._vectorizers[bucket] = (questions_set, vectorizer, matrix, questions)
+        return vectorizer, matrix, questions
+    
+    def _count(self, name: str):
+        try:
+            self.redis.hincrby(self.STATS_KEY, name, 1)
+        except Exception:
+            pass
+    
+    @staticmethod
+    def _normalize(message: str) -> str:
+        """Lowercase, drop punctuation and collapse whitespace"""
+        return ' '.join(re.sub(r'[^\w\s]', ' ', message.lower()).split())
+    
+    @staticmethod
+    def _bucket(context: Dict, personality: str) -> str:
+        """Stable id for the tutoring context a response depends on"""
+        skill_level = context.get('skill_level', 'beginner')
+        topic = context.get('current_topic', 'general programming')
+        raw = f"{personality}|{skill_level}|{topic}".lower()
+        return hashlib.sha256(raw.encode()).hexdigest()[:16]
+    
+    def _response_key(self, bucket: str, normalized: str) -> str:
+        return self.KEY_PREFIX + hashlib.sha256(f"{bucket}|{normalized}".encode()).hexdigest()
+
+
+class AnalysisCache:
+    """Content-addressed cache for code analysis results
+    
+    Entries are keyed by sha256 of (kind, analyzer version, language, code),
+    so identical resubmissions reuse earlier work and bumping an analyzer's
+    version retires its old entries. Lookups try an in-process LRU first,
+    then Redis (shared by all workers), which also refills the LRU. Values
+    are stored as JSON, so every hit returns a fresh copy the caller may
+    modify.
+    """
+    
+    KEY_PREFIX = 'analysis:'
+    COUNTERS = ('hits_local', 'hits_redis', 'misses', 'stores')
+    
+    def __init__(self, redis_client=None, max_entries: int = None):
+        self.enabled = CacheConfig.ANALYSIS_CACHE_ENABLED
+        self.redis = redis_client
+        self.max_entries = max_entries if max_entries is not None else CacheConfig.ANALYSIS_CACHE_LRU_SIZE
+        self._entries: 'OrderedDict[str, str]' = OrderedDict()
+        self._stats: Dict[str, Dict[str, int]] = {}  # kind -> counters, for this process
+        self._lock = threading.Lock()
+    
+    def connect(self, redis_client):
+        """Enable (or replace) the shared Redis tier"""
+        self.redis = redis_client
+    
+    @staticmethod
+    def key(kind: str, version: str, code: str, language: str) -> str:
+        digest = hashlib.sha256('\0'.join((kind, version, language, code)).encode('utf-8')).hexdigest()
+        return f"{kind}:{digest}"
+    
+    def get(self, kind: str, version: str, code: str, language: str, shared: bool = True):
+        """Cached value, or None (shared=False skips the Redis tier)"""
+        if not self.enabled:
+            return None
+        
+        key = self.key(kind, version, code, language)
+        with self._lock:
+            raw = self._entries.get(key)
+            if raw is not None:
+                self._entries.move_to_end(key)
+        if raw is not None:
+            self._count(kind, 'hits_local')
+            return json.loads(raw)
+        
+        if shared and self.redis is not None:
+            try:
+                raw = self.redis.get(self.KEY_PREFIX + key)
+            except Exception as e:
+                logger.warning(f"Analysis cache lookup failed: {e}")
+                raw = None
+            if raw is not None:
+                raw = raw.decode('utf-8') if isinstance(raw, bytes) else raw
+                self._remember(key, raw)
+                self._count(kind, 'hits_redis')
+                return json.loads(raw)
+        
+        self._count(kind, 'misses')
+        return None
+    
+    def set(self, kind: str, version: str, code: str, language: str, value, shared: bool = True):
+        """Store a JSON-serializable result in the local tier and, if shared, in Redis"""
+        if not self.enabled:
+            return
+        
+        key = self.key(kind, version, code, language)
+        raw = json.dumps(value)
+        self._remember(key, raw)
+        if shared and self.redis is not None:
+            try:
+                self.redis.setex(self.KEY_PREFIX + key, CacheConfig.ANALYSIS_CACHE_TTL, raw)
+            except Exception as e:
+                logger.warning(f"Analysis cache store failed: {e}")
+        self._count(kind, 'stores')
+    
+    def get_or_compute(self, kind: str, version: str, code: str, language: str,
+                       compute: Callable, cacheable: Callable = None, shared: bool = True):
+        """Cached value, or compute() stored if cacheable(result) allows it"""
+        cached = self.get(kind, version, code, language, shared)
+        if cached is not None:
+            return cached
+        
+        result = compute()
+        if cacheable is None or cacheable(result):
+            self.set(kind, version, code, language, result, shared)
+        return result
+    
+    def get_stats(self) -> Dict:
+        """Hit ratios per kind of analysis, counted by this process"""
+        with self._lock:
+            kinds = {kind: dict(counters) for kind, counters in self._stats.items()}
+            size = len(self._entries)
+        
+        totals = {name: sum(counters[name] for counters in kinds.values()) for name in self.COUNTERS}
+        for counters in list(kinds.values()) + [totals]:
+            lookups = counters['hits_local'] + counters['hits_redis'] + counters['misses']
+            counters['hit_ratio'] = (counters['hits_local'] + counters['hits_redis']) / lookups if lookups else 0.0
+        
+        return dict(
+            totals,
+            enabled=self.enabled,
+            redis_enabled=self.redis is not None,
+            local_entries=size,
+            local_capacity=self.max_entries,
+            kinds=kinds
+        )
+    
+    def clear_local(self):
+        """Drop the in-process tier (Redis entries are kept)"""
+        with self._lock:
+            self._entries.clear()
+    
+    def _remember(self, key: str, raw: str):
+        with self._lock:
+            self._entries[key] = raw
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+    
+    def _count(self, kind: str, name: str):
+        with self._lock:
+            counters = self._stats.setdefault(kind, dict.fromkeys(self.COUNTERS, 0))
+            counters[name] += 1
+
+
+_analysis_cache = None
+_analysis_cache_lock = threading.Lock()
+
+
+def get_analysis_cache() -> AnalysisCache:
+    """Process-wide analysis cache (in-process only until connect() gives it Redis)"""
+    global _analysis_cache
+    if _analysis_cache is None:
+        with _analysis_cache_lock:
+            if _analysis_cache is None:
+                _analysis_cache = AnalysisCache()
+    return _analysis_cache
@@ -0,0 +1,367 @@
+"""
+Static Code Features
+One pass over a submission producing the structural counts that the code
+analyzer, explanations and assessment scoring share. Python is walked as an
+AST; other languages (and Python that does not parse) fall back to a token
+scan. Results are cached per code hash.
+"""
+
+import io
+import os
+import re
+import ast
+import tokenize
+import hashlib
+import threading
+from collections import OrderedDict
+from types import MappingProxyType
+from typing import Dict, Mapping
+
+FEATURE_CACHE_SIZE = int(os.getenv('FEATURE_CACHE_SIZE', '1024'))
+
+# Keywords seen by the token fallback, across the supported languages
+LOOP_KEYWORDS = frozenset(['for', 'while', 'foreach', 'loop'])
+BRANCH_KEYWORDS = frozenset(['if', 'elif', 'case', 'when'])
+FUNCTION_KEYWORDS = frozenset(['def', 'function', 'func', 'fn', 'fun'])
+IMPORT_KEYWORDS = frozenset(['import', 'require', 'include', 'using', 'use'])
+HANDLER_KEYWORDS = frozenset(['except', 'catch', 'rescue'])
+
+# Strings and comments are blanked before the token scan so "for" in a message is not a loop
+_STRING_OR_COMMENT = re.compile(
+    r'"""[\s\S]*?"""|\'\'\'[\s\S]*?\'\'\'|"(?:\\.|[^"\\\n])*"|\'(?:\\.|[^\'\\\n])*\'|`[^`]*`'
+    r'|/\*[\s\S]*?\*/|//[^\n]*|#(?!include)[^\n]*'
+)
+_TOKEN = re.compile(r'[A-Za-z_][A-Za-z0-9_]*|=>|\+=|[{}()\[\]@]')
+
+_cache: 'OrderedDict[str, Mapping]' = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def extract_features(code: str, language: str = 'python') -> Mapping:
+    """Structural features of a submission (read-only, shared between callers)"""
+    key = hashlib.sha256(f"{language}\0{code}".encode('utf-8')).hexdigest()
+    with _cache_lock:
+        features = _cache.get(key)
+        if features is not None:
+            _cache.move_to_end(key)
+            return features
+    
+    features = MappingProxyType(_compute(code, language))
+    with _cache_lock:
+        _cache[key] = features
+        while len(_cache) > FEATURE_CACHE_SIZE:
+            _cache.popitem(last=False)
+    return features
+
+
+def _compute(code: str, language: str) -> Dict:
+    lines = code.split('\n')
+    features = {
+        'parser': 'tokens',
+        'lines': len(lines),
+        'non_empty_lines': sum(1 for line in lines if line.strip()),
+        'code_lines': 0,
+        'max_line_length': max((len(line) for line in lines), default=0),
+        'avg_line_length': sum(len(line) for line in lines) / max(len(lines), 1),
+        'long_lines': sum(1 for line in lines if len(line) > 100),
+        'has_comments': False,
+        'has_docstrings': False,
+        'loops': 0,
+        'max_loop_depth': 0,
+        'max_nesting': 0,
+        'branches': 0,
+        'bool_ops': 0,
+        'exception_handlers': 0,
+        'try_blocks': 0,
+        'with_blocks': 0,
+        'functions': 0,
+        'recursive_functions': 0,
+        'classes': 0,
+        'lambdas': 0,
+        'decorators': 0,
+        'async_constructs': 0,
+        'comprehensions': 0,
+        'imports': 0,
+        'wildcard_imports': 0,
+        'returns': 0,
+        'prints': 0,
+        'range_len_loops': 0,
+        'uses_lists': False,
+        'collection_growth': False
+    }
+    
+    if language == 'python':
+        try:
+            tree = ast.parse(code)
+        except (SyntaxError, ValueError):
+            tree = None
+        if tree is not None:
+            _PythonFeatureVisitor(features).visit(tree)
+            features['parser'] = 'ast'
+            features['has_comments'] = '#' in code and _has_python_comment(code)
+            features['code_lines'] = sum(
+                1 for line in lines if line.strip() and not line.strip().startswith('#')
+            )
+            return features
+    
+    _scan_tokens(code, language, features)
+    return features
+
+
+def _has_python_comment(code: str) -> bool:
+    try:
+        return any(tok.type == tokenize.COMMENT for tok in tokenize.generate_tokens(io.StringIO(code).readline))
+    except (tokenize.TokenError, SyntaxError):
+        return True
+
+
+class _PythonFeatureVisitor(ast.NodeVisitor):
+    """Fills the feature record in a single walk of the module AST"""
+    
+    def __init__(self, features: Dict):
+        self.f = features
+        self.loop_depth = 0
+        self.nesting = 0
+        self.function_names = []
+    
+    def _block(self, node, loop=False):
+        self.nesting += 1
+        self.f['max_nesting'] = max(self.f['max_nesting'], self.nesting)
+        if loop:
+            self.loop_depth += 1
+            self.f['loops'] += 1
+            self.f['max_loop_depth'] = max(self.f['max_loop_depth'], self.loop_depth)
+        self.generic_visit(node)
+        if loop:
+            self.loop_depth -= 1
+        self.nesting -= 1
+    
+    def visit_For(self, node):
+        call = node.iter
+        if (isinstance(call, ast.Call) and isinstance(call.func, ast.Name) and call.func.id == 'range'
+                and len(call.args) == 1 and isinstance(call.args[0], ast.Call)
+                and isinstance(call.args[0].func, ast.Name) and call.args[0].func.id == 'len'):
+            self.f['range_len_loops'] += 1
+        self._block(node, loop=True)
+    
+    visit_AsyncFor = visit_For
+    
+    def visit_While(self, node):
+        self._block(node, loop=True)
+    
+    def visit_If(self, node):
+        self.f['branches'] += 1
+        self._block(node)
+    
+    def visit_IfExp(self, node):
+        self.f['branches'] += 1
+        self.generic_visit(node)
+    
+    def visit_Match(self, node):
+        self.f['branches'] += len(node.cases)
+        self._block(node)
+    
+    def visit_BoolOp(self, node):
+        self.f['bool_ops'] += len(node.values) - 1
+        self.generic_visit(node)
+    
+    def visit_Try(self, node):
+        self.f['try_blocks'] += 1
+        self.f['exception_handlers'] += len(node.handlers)
+        self._block(node)
+    
+    visit_TryStar = visit_Try
+    
+    def visit_With(self, node):
+        self.f['with_blocks'] += 1
+        self._block(node)
+    
+    def visit_AsyncWith(self, node):
+        self.f['async_constructs'] += 1
+        self.visit_With(node)
+    
+    def visit_FunctionDef(self, node):
+        self.f['functions'] += 1
+        self.f['decorators'] += len(node.decorator_list)
+        if ast.get_docstring(node) is not None:
+            self.f['has_docstrings'] = True
+        self.function_names.append(node.name)
+        # Loops in an enclosing function do not multiply with this one's
+        outer_loop_depth, self.loop_depth = self.loop_depth, 0
+        self._block(node)
+        self.loop_depth = outer_loop_depth
+        self.function_names.pop()
+    
+    def visit_AsyncFunctionDef(self, node):
+        self.f['async_constructs'] += 1
+        self.visit_FunctionDef(node)
+    
+    def visit_ClassDef(self, node):
+        self.f['classes'] += 1
+        self.f['decorators'] += len(node.decorator_list)
+        if ast.get_docstring(node) is not None:
+            self.f['has_docstrings'] = True
+        self._block(node)
+    
+    def visit_Module(self, node):
+        if ast.get_docstring(node) is not None:
+            self.f['has_docstrings'] = True
+        self.generic_visit(node)
+    
+    def visit_Lambda(self, node):
+        self.f['lambdas'] += 1
+        self.generic_visit(node)
+    
+    def visit_Await(self, node):
+        self.f['async_constructs'] += 1
+        self.generic_visit(node)
+    
+    def _comprehension(self, node):
+        # Each generator is a loop nested in the ones before it
+        self.f['comprehensions'] += 1
+        if isinstance(node, ast.ListComp):
+            self.f['uses_lists'] = True
+        self.f['loops'] += len(node.generators)
+        self.f['branches'] += sum(len(gen.ifs) for gen in node.generators)
+        self.f['max_loop_depth'] = max(self.f['max_loop_depth'], self.loop_depth + len(node.generators))
+        self.loop_depth += len(node.generators)
+        self.generic_visit(node)
+        self.loop_depth -= len(node.generators)
+    
+    visit_ListComp = visit_SetComp = visit_DictComp = visit_GeneratorExp = _comprehension
+    
+    def visit_Import(self, node):
+        self.f['imports'] += 1
+    
+    def visit_ImportFrom(self, node):
+        self.f['imports'] += 1
+        if any(alias.name == '*' for alias in node.names):
+            self.f['wildcard_imports'] += 1
+    
+    def visit_Return(self, node):
+        self.f['returns'] += 1
+        self.generic_visit(node)
+    
+    def visit_Call(self, node):
+        func = node.func
+        if isinstance(func, ast.Name):
+            if func.id == 'print':
+                self.f['prints'] += 1
+            elif func.id in ('list', 'sorted'):
+                self.f['uses_lists'] = True
+            elif self.function_names and func.id == self.function_names[-1]:
+                self.f['recursive_functions'] += 1
+        elif isinstance(func, ast.Attribute) and func.attr in ('append', 'extend', 'insert', 'add', 'update'):
+            self.f['collection_growth'] = True
+        self.generic_visit(node)
+    
+    def visit_AugAssign(self, node):
+        if isinstance(node.op, ast.Add):
+            self.f['collection_growth'] = True
+        self.generic_visit(node)
+    
+    def visit_List(self, node):
+        self.f['uses_lists'] = True
+        self.generic_visit(node)
+    
+    def visit_Subscript(self, node):
+        self.f['uses_lists'] = True
+        self.generic_visit(node)
+
+
+def _scan_tokens(code: str, language: str, features: Dict):
+    """Keyword and bracket counts for code that has no AST available"""
+    def blank(match):
+        text = match.group(0)
+        if text.startswith(('#', '//', '/*')):
+            features['has_comments'] = True
+        elif text.startswith(('"""', "'''")):
+            features['has_docstrings'] = True
+        return '\n' * text.count('\n')
+    
+    stripped = _STRING_OR_COMMENT.sub(blank, code)
+    features['code_lines'] = sum(1 for line in stripped.split('\n') if line.strip())
+    
+    if language == 'python':
+        _scan_indented(stripped, features)
+    
+    # Brace languages: a block is a loop block if a loop keyword opened it
+    blocks = []
+    pending_loop = False
+    previous = None
+    for token in _TOKEN.findall(stripped):
+        if token in LOOP_KEYWORDS:
+            if language == 'python':
+                pass  # Counted by the indentation scan
+            elif not (token == 'while' and previous == '}'):  # do { ... } while
+                features['loops'] += 1
+                pending_loop = True
+        elif token in BRANCH_KEYWORDS and language != 'python':
+            features['branches'] += 1
+        elif token in FUNCTION_KEYWORDS or token == '=>':
+            features['functions'] += 1
+            if token == '=>':
+                features['lambdas'] += 1
+        elif token in IMPORT_KEYWORDS and language != 'python':
+            features['imports'] += 1
+        elif token in HANDLER_KEYWORDS and language != 'python':
+            features['exception_handlers'] += 1
+        elif token == 'try' and language != 'python':
+            features['try_blocks'] += 1
+        elif token == 'class':
+            features['classes'] += 1
+        elif token == 'return':
+            features['returns'] += 1
+        elif token in ('async', 'await'):
+            features['async_constructs'] += 1
+        elif token in ('print', 'println', 'printf', 'log'):
+            features['prints'] += 1
+        elif token in ('append', 'push', 'add', 'extend', '+='):
+            features['collection_growth'] = True
+        elif token in ('list', 'List', 'array', 'Array', 'vector', 'ArrayList', '['):
+            features['uses_lists'] = True
+        elif token == '@':
+            features['decorators'] += 1
+        elif token == '{' and language != 'python':
+            blocks.append(pending_loop)
+            pending_loop = False
+            features['max_nesting'] = max(features['max_nesting'], len(blocks))
+            features['max_loop_depth'] = max(features['max_loop_depth'], sum(blocks))
+        elif token == '}' and blocks:
+            blocks.pop()
+        previous = token
+    
+    if language != 'python':
+        features['bool_ops'] += stripped.count('&&') + stripped.count('||')
+    features['wildcard_imports'] += len(re.findall(r'import\s+\*|from\s+\S+\s+import\s+\*|\.\*;', stripped))
+
+
+def _scan_indented(stripped: str, features: Dict):
+    """Loops, branches and nesting from indentation, for Python that does not parse"""
+    stack = []  # (indent, is_loop)
+    for line in stripped.split('\n'):
+        content = line.strip()
+        if not content:
+            continue
+        indent = len(line) - len(line.lstrip())
+        while stack and stack[-1][0] >= indent:
+            stack.pop()
+        first = re.match(r'[A-Za-z_]+', content)
+        keyword = first.group(0) if first else ''
+        if keyword in ('for', 'while'):
+            features['loops'] += 1
+        elif keyword in ('if', 'elif'):
+            features['branches'] += 1
+        elif keyword == 'except':
+            features['exception_handlers'] += 1
+        elif keyword == 'try':
+            features['try_blocks'] += 1
+        elif keyword == 'with':
+            features['with_blocks'] += 1
+        elif keyword in ('import', 'from'):
+            features['imports'] += 1
+        if content.endswith(':'):
+            stack.append((indent, keyword in ('for', 'while')))
+            features['max_nesting'] = max(features['max_nesting'], len(stack))
+            features['max_loop_depth'] = max(features['max_loop_depth'], sum(1 for _, loop in stack if loop))
+        features['bool_ops'] += len(re.findall(r'\b(?:and|or)\b', content))
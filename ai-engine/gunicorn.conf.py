@@ -0,0 +1,40 @@
+"""
+Gunicorn configuration for the CodeMentor AI Engine
+Picked up automatically by `gunicorn main:app` when run from this directory.
+
+Set PRELOAD_MODELS=true to load the models once in the master process; the
+forked workers then share the weight memory copy-on-write instead of each
+loading its own copy.
+"""
+
+import logging
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8080')}"
+workers = int(os.getenv('GUNICORN_WORKERS', '2'))
+# Request threads per worker feed the chat batch scheduler concurrently
+threads = int(os.getenv('GUNICORN_THREADS', '4'))
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '300'))
+
+preload_app = os.getenv('PRELOAD_MODELS', 'false').lower() == 'true'
+
+logger = logging.getLogger('gunicorn.error')
+
+
+def post_fork(server, worker):
+    """Split CPU cores between workers so their matmul thread pools don't oversubscribe"""
+    import torch
+    threads_per_worker = max(1, (os.cpu_count() or 1) // max(1, workers))
+    torch.set_num_threads(threads_per_worker)
+
+
+def post_worker_init(worker):
+    """Log each worker's memory footprint and start warm-up after fork"""
+    from models import ModelConfig, ModelLoader, process_memory_usage
+    report = process_memory_usage()
+    logger.info(f"Worker {worker.pid} memory: {report}")
+    
+    # Preloaded weights are already resident; the warm-up generation has to
+    # run here rather than in the master, whose thread pools don't survive fork
+    if preload_app and ModelConfig.WARMUP_ON_STARTUP:
+        ModelLoader().warm_up()
@@ -0,0 +1,157 @@
+"""
+Background Job Queue Module
+Runs slow work (AI code analysis, evolution cycles) outside the request
+thread so web workers stay free; clients poll for the result by job id
+"""
+
+import os
+import json
+import time
+import uuid
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class JobConfig:
+    """Configuration for background analysis jobs"""
+    
+    ANALYSIS_WORKERS = int(os.getenv('ANALYSIS_WORKERS', '2'))
+    ANALYSIS_MAX_PENDING = int(os.getenv('ANALYSIS_MAX_PENDING', '100'))  # Queued + running jobs per process
+    ANALYSIS_JOB_TTL = int(os.getenv('ANALYSIS_JOB_TTL', '3600'))  # Seconds a job record is kept
+    EVOLUTION_WORKERS = int(os.getenv('EVOLUTION_WORKERS', '1'))  # Cycles run at once; each may benchmark variants
+    EVOLUTION_MAX_PENDING = int(os.getenv('EVOLUTION_MAX_PENDING', '4'))
+
+
+class JobQueueFull(Exception):
+    """Raised when too many jobs are already waiting"""
+
+
+class AnalysisJobQueue:
+    """In-process worker pool with job records in Redis (or memory without Redis)
+    
+    Jobs execute on the process that accepted them. Records live in Redis
+    when it is available so any worker behind the load balancer can answer
+    a status poll; otherwise they are kept in a local dict.
+    """
+    
+    KEY_PREFIX = 'analysis:job:'
+    
+    def __init__(self, handler: Callable[..., Dict], redis_client=None, max_workers: int = None,
+                 max_pending: int = None, ttl: int = None):
+        self.handler = handler
+        self.redis = redis_client
+        self.max_workers = max_workers or JobConfig.ANALYSIS_WORKERS
+        self.max_pending = max_pending or JobConfig.ANALYSIS_MAX_PENDING
+        self.ttl = ttl or JobConfig.ANALYSIS_JOB_TTL
+        
+        self._executor = None
+        self._local_jobs: Dict[str, tuple] = {}  # job_id -> (expires_at, record)
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._stats = {'submitted': 0, 'completed': 0, 'failed': 0, 'rejected': 0}
+    
+    def submit(self, **kwargs) -> str:
+        """Queue handler(**kwargs) and return the new job id"""
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self._stats['rejected'] += 1
+                raise JobQueueFull(f"{self._pending} jobs already pending")
+            self._pending += 1
+            self._stats['submitted'] += 1
+            # Created lazily so a gunicorn --preload master never owns worker threads
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='analysis-job')
+        
+        job_id = uuid.uuid4().hex
+        self._save(job_id, {
+            'job_id': job_id,
+            'status': 'queued',
+            'submitted_at': datetime.now().isoformat()
+        })
+        
+        try:
+            self._executor.submit(self._run, job_id, kwargs)
+        except Exception:
+            with self._lock:
+                self._pending -= 1
+            raise
+        return job_id
+    
+    def get(self, job_id: str) -> Optional[Dict]:
+        """Current job record, or None for unknown or expired jobs"""
+        if self.redis is not None:
+            try:
+                raw = self.redis.get(self.KEY_PREFIX + job_id)
+                return json.loads(raw) if raw is not None else None
+            except Exception as e:
+                logger.warning(f"Job lookup in Redis failed, checking local store: {e}")
+        
+        with self._lock:
+            entry = self._local_jobs.get(job_id)
+            if entry is None or entry[0] < time.time():
+                self._local_jobs.pop(job_id, None)
+                return None
+            return dict(entry[1])
+    
+    def get_stats(self) -> Dict:
+        """Queue counters for this process"""
+        with self._lock:
+            return dict(self._stats, pending=self._pending, workers=self.max_workers)
+    
+    def _run(self, job_id: str, kwargs: Dict):
+        record = self.get(job_id) or {'job_id': job_id}
+        record.update(status='running', started_at=datetime.now().isoformat())
+        self._save(job_id, record)
+        
+        try:
+            result = self.handler(**kwargs)
+            json.dumps(result)  # A result Redis cannot store fails the job rather than leaving it 'running'
+            record['result'] = result
+            record['status'] = 'completed'
+            outcome = 'completed'
+        except Exception as e:
+            logger.error(f"Job {job_id} failed: {e}")
+            record['error'] = str(e)
+            record['status'] = 'failed'
+            outcome = 'failed'
+        
+        record['completed_at'] = datetime.now().isoformat()
+        self._save(job_id, record)
+        with self._lock:
+            self._pending -= 1
+            self._stats[outcome] += 1
+    
+    def _save(self, job_id: str, record: Dict):
+        if self.redis is not None:
+            try:
+                self.redis.setex(self.KEY_PREFIX + job_id, self.ttl, json.dumps(record))
+                return
+            except Exception as e:
+                logger.warning(f"Job store in Redis failed, keeping job locally: {e}")
+                try:
+                    # get() reads Redis first, so an older record there would hide the local one
+                    self.redis.delete(self.KEY_PREFIX + job_id)
+                except Exception:
+                    pass
+        
+        with self._lock:
+            now = time.time()
+            # Drop expired records while we hold the lock
+            for expired in [k for k, (expires_at, _) in self._local_jobs.items() if expires_at < now]:
+                del self._local_jobs[expired]
+            self._local_jobs[job_id] = (now + self.ttl, record)
+
+
+class EvolutionJobQueue(AnalysisJobQueue):
+    """Background evolution cycles; generation and benchmarks take minutes"""
+    
+    KEY_PREFIX = 'evolution:job:'
+    
+    def __init__(self, handler: Callable[..., Dict], redis_client=None):
+        super().__init__(handler, redis_client, max_workers=JobConfig.EVOLUTION_WORKERS,
+                         max_pending=JobConfig.EVOLUTION_MAX_PENDING)
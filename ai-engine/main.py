@@ -3,10 +3,11 @@ CodeMentor AI - Python AI Engine
 Main Flask application for AI-powered learning features
 """
 
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, stream_with_context
 from flask_cors import CORS
 import os
 import json
+import time
 import redis
 from datetime import datetime
 from sklearn.feature_extraction.text import TfidfVectorizer
@@ -14,10 +15,16 @@ from sklearn.metrics.pairwise import cosine_similarity
 import logging
 os.environ.setdefault("TRANSFORMERS_NO_TF", "1")
 os.environ.setdefault("TRANSFORMERS_NO_TORCHVISION", "1")
-from models import get_custom_tutor, get_custom_analyzer
+from models import (
+    get_custom_tutor, get_custom_analyzer, get_generation_policy, ModelConfig, ModelLoader, process_memory_usage
+)
 from self_evolve import SelfEvolutionEngine, migrate_to_local
 from assessment import AssessmentEngine
+from session_store import create_session_store
 from gcp_integration import GCPIntegrationManager
+from caching import TutorResponseCache, get_analysis_cache
+from code_features import extract_features
+from jobs import AnalysisJobQueue, EvolutionJobQueue, JobQueueFull
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -31,6 +38,12 @@ CORS(app)
 app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'dev-secret-key')
 # Note: OpenAI API key is no longer required - using custom ML models
 
+# Upper bound on submissions accepted by /code/analyze/batch
+CODE_BATCH_MAX_ITEMS = int(os.getenv('CODE_BATCH_MAX_ITEMS', '500'))
+
+# Bump when the explain-code rules change so cached explanations are not reused
+EXPLANATION_VERSION = '1'
+
 # Initialize Redis for caching
 try:
     redis_client = redis.from_url(os.getenv('REDIS_URL', 'redis://localhost:6379'))
@@ -50,14 +63,21 @@ class AITutor:
             'creative': "You are a creative and innovative programming tutor. Encourage out-of-the-box thinking and creative solutions.",
             'practical': "You are a practical and results-oriented programming tutor. Focus on real-world applications and industry best practices."
         }
+        self.response_cache = TutorResponseCache(redis_client)
     
     def generate_response(self, user_message, context, personality='encouraging'):
         """Generate AI tutor response based on user input and context"""
         try:
+            # Repeated questions in the same context skip generation entirely
+            cached = self.response_cache.get(user_message, context, personality)
+            if cached is not None:
+                return cached
+            
             # Use custom local ML model instead of OpenAI
             custom_tutor = get_custom_tutor()
             response = custom_tutor.generate_response(user_message, context, personality)
             
+            self.response_cache.set(user_message, context, personality, response)
             return response
             
         except Exception as e:
@@ -68,6 +88,20 @@ class AITutor:
                 'resources': []
             }
     
+    def stream_response(self, user_message, context, personality='encouraging'):
+        """Stream AI tutor response events as they are generated"""
+        cached = self.response_cache.get(user_message, context, personality)
+        if cached is not None:
+            yield dict(cached, event='done')
+            return
+        
+        custom_tutor = get_custom_tutor()
+        for event in custom_tutor.stream_response(user_message, context, personality):
+            if event['event'] == 'done':
+                response = {k: v for k, v in event.items() if k != 'event'}
+                self.response_cache.set(user_message, context, personality, response)
+            yield event
+    
     def _extract_suggestions(self, response_text):
         """Extract actionable suggestions from AI response"""
         # Simple keyword-based suggestion extraction
@@ -269,19 +303,32 @@ class ChallengeGenerator:
 class CodeAnalyzer:
     """Analyze code for feedback and suggestions"""
     
+    # Bump when the rule-based checks change so cached analyses are not reused
+    ANALYSIS_VERSION = '1'
+    
+    def __init__(self):
+        self.cache = get_analysis_cache()
+    
     def analyze_code(self, code, language, challenge_context=None):
-        """Analyze submitted code and provide feedback"""
+        """Analyze submitted code and provide feedback, reusing the result for identical code"""
+        version = '|'.join((
+            self.ANALYSIS_VERSION,
+            get_custom_analyzer().cache_version(),
+            json.dumps(challenge_context, sort_keys=True, default=str)
+        ))
+        return self.cache.get_or_compute(
+            'analysis', version, code, language,
+            lambda: self._analyze(code, language, challenge_context),
+            cacheable=lambda analysis: 'error' not in analysis and get_custom_analyzer().is_cacheable(analysis['ai_insights'])
+        )
+    
+    def _analyze(self, code, language, challenge_context=None):
+        """Uncached static and AI analysis"""
         try:
             # Get custom analyzer for AI-enhanced analysis
             custom_analyzer = get_custom_analyzer()
             
-            analysis = {
-                'syntax_errors': self._check_syntax(code, language),
-                'code_quality': self._analyze_quality(code, language),
-                'performance': self._analyze_performance(code, language),
-                'best_practices': self._check_best_practices(code, language),
-                'suggestions': self._generate_suggestions(code, language, challenge_context)
-            }
+            analysis = self._static_analysis(code, language, challenge_context)
             
             # Add AI-powered analysis if available
             try:
@@ -301,6 +348,47 @@ class CodeAnalyzer:
             logger.error(f"Code analysis error: {e}")
             return {'error': 'Analysis failed', 'details': str(e)}
     
+    def analyze_batch(self, items, batch_size=None):
+        """Analyze many submissions, yielding (index, analysis) as each model batch completes
+        
+        Static checks run for every item up front; the AI step goes through
+        CodeT5 in padded batches instead of one beam search per item.
+        """
+        analyses = []
+        for item in items:
+            try:
+                analyses.append(self._static_analysis(item['code'], item['language'], item.get('challenge_context')))
+            except Exception as e:
+                logger.error(f"Code analysis error: {e}")
+                analyses.append({'error': 'Analysis failed', 'details': str(e)})
+        
+        # Items whose static analysis failed are not sent to the model
+        pending = [i for i, analysis in enumerate(analyses) if 'error' not in analysis]
+        for i, analysis in enumerate(analyses):
+            if 'error' in analysis:
+                yield i, analysis
+        
+        batches = get_custom_analyzer().analyze_batch_with_ai(
+            [(items[i]['code'], items[i]['language']) for i in pending], batch_size
+        )
+        done = 0
+        for ai_results in batches:
+            for i, ai_analysis in zip(pending[done:done + len(ai_results)], ai_results):
+                analyses[i]['ai_insights'] = ai_analysis
+                yield i, analyses[i]
+            done += len(ai_results)
+    
+    def _static_analysis(self, code, language, challenge_context=None):
+        """Rule-based checks that need no model"""
+        features = extract_features(code, language)
+        return {
+            'syntax_errors': self._check_syntax(code, language),
+            'code_quality': self._analyze_quality(features),
+            'performance': self._analyze_performance(code, language),
+            'best_practices': self._check_best_practices(features, language),
+            'suggestions': self._generate_suggestions(features, language, challenge_context)
+        }
+    
     def _check_syntax(self, code, language):
         """Check for syntax errors"""
         errors = []
@@ -317,12 +405,12 @@ class CodeAnalyzer:
         
         return errors
     
-    def _analyze_quality(self, code, language):
+    def _analyze_quality(self, features):
         """Analyze code quality metrics"""
         return {
-            'readability_score': self._calculate_readability(code),
-            'complexity_score': self._calculate_complexity(code),
-            'maintainability_score': self._calculate_maintainability(code)
+            'readability_score': self._calculate_readability(features),
+            'complexity_score': self._calculate_complexity(features),
+            'maintainability_score': self._calculate_maintainability(features)
         }
     
     def _analyze_performance(self, code, language):
@@ -333,56 +421,51 @@ class CodeAnalyzer:
             'optimization_opportunities': []
         }
     
-    def _check_best_practices(self, code, language):
+    def _check_best_practices(self, features, language):
         """Check adherence to best practices"""
         issues = []
         
         if language == 'python':
-            if 'import *' in code:
+            if features['wildcard_imports']:
                 issues.append('Avoid wildcard imports')
-            if len([line for line in code.split('\n') if line.strip()]) > 50:
+            if features['non_empty_lines'] > 50:
                 issues.append('Consider breaking down into smaller functions')
         
         return issues
     
-    def _generate_suggestions(self, code, language, context):
+    def _generate_suggestions(self, features, language, context):
         """Generate improvement suggestions"""
         suggestions = []
         
         # Basic suggestions based on code patterns
-        if 'for i in range(len(' in code:
+        if features['range_len_loops']:
             suggestions.append('Consider using enumerate() instead of range(len())')
         
-        if language == 'python' and 'print(' in code:
+        if language == 'python' and features['prints']:
             suggestions.append('Remove debug print statements for production code')
         
         return suggestions
     
-    def _calculate_readability(self, code):
+    def _calculate_readability(self, features):
         """Calculate readability score (0-100)"""
         # Simple readability calculation
-        lines = code.split('\n')
-        avg_line_length = sum(len(line) for line in lines) / max(len(lines), 1)
+        avg_line_length = features['avg_line_length']
         
         # Penalize very long lines
         if avg_line_length > 80:
             return max(50, 100 - (avg_line_length - 80) * 2)
         return min(100, 80 + avg_line_length / 4)
     
-    def _calculate_complexity(self, code):
+    def _calculate_complexity(self, features):
         """Calculate cyclomatic complexity"""
-        # Simple complexity calculation
-        complexity_keywords = ['if', 'elif', 'else', 'for', 'while', 'try', 'except', 'with']
-        complexity = 1  # Base complexity
-        
-        for keyword in complexity_keywords:
-            complexity += code.count(keyword)
+        # One per decision point: branches, loops, exception handlers and and/or operands
+        complexity = 1 + features['branches'] + features['loops'] + features['exception_handlers'] + features['bool_ops']
         
         return min(10, complexity)
     
-    def _calculate_maintainability(self, code):
+    def _calculate_maintainability(self, features):
         """Calculate maintainability score"""
-        lines = len([line for line in code.split('\n') if line.strip()])
+        lines = features['non_empty_lines']
         
         # Penalize very long functions
         if lines > 50:
@@ -391,15 +474,26 @@ class CodeAnalyzer:
         return min(100, 70 + lines)
 
 # Initialize AI components
+if redis_client is not None:
+    get_analysis_cache().connect(redis_client)
 ai_tutor = AITutor()
 challenge_generator = ChallengeGenerator()
 code_analyzer = CodeAnalyzer()
+analysis_jobs = AnalysisJobQueue(code_analyzer.analyze_code, redis_client)
 
 # Initialize new components for self-evolution and assessment
 self_evolution_engine = SelfEvolutionEngine()
-assessment_engine = AssessmentEngine()
+evolution_jobs = EvolutionJobQueue(self_evolution_engine.evolve, redis_client)
+assessment_engine = AssessmentEngine(session_store=create_session_store(redis_client=redis_client))
 gcp_manager = GCPIntegrationManager()
 
+# With gunicorn --preload this runs once in the master; workers share the weights.
+# Warm-up generation must then wait until after fork (see gunicorn.conf.py).
+if ModelConfig.PRELOAD_MODELS:
+    ModelLoader().preload()
+elif ModelConfig.WARMUP_ON_STARTUP:
+    ModelLoader().warm_up()
+
 # API Routes
 
 @app.route('/health', methods=['GET'])
@@ -411,6 +505,33 @@ def health_check():
         'version': '1.0.0'
     })
 
+@app.route('/ready', methods=['GET'])
+def readiness_check():
+    """Readiness endpoint - 503 until the models are loaded and warmed up"""
+    loader = ModelLoader()
+    ready = loader.is_ready()
+    return jsonify({
+        'status': 'ready' if ready else 'not_ready',
+        'models': loader.get_status(),
+        'generation': get_generation_policy().get_stats(),
+        'warmup_enabled': ModelConfig.WARMUP_ON_STARTUP,
+        'timestamp': datetime.now().isoformat()
+    }), 200 if ready else 503
+
+@app.route('/metrics/memory', methods=['GET'])
+def memory_metrics():
+    """Memory usage of the worker process serving this request"""
+    loader = ModelLoader()
+    return jsonify({
+        'success': True,
+        'memory': process_memory_usage(),
+        'models_loaded': {
+            'chat': loader.chat_model is not None,
+            'code': loader.code_model is not None
+        },
+        'preloaded': ModelConfig.PRELOAD_MODELS
+    })
+
 @app.route('/ai/mentorship/welcome', methods=['POST'])
 def ai_mentorship_welcome():
     """
@@ -643,6 +764,45 @@ def ai_tutor_chat():
         logger.error(f"AI tutor chat error: {e}")
         return jsonify({'error': 'Internal server error'}), 500
 
+@app.route('/ai-tutor/chat/stream', methods=['POST'])
+def ai_tutor_chat_stream():
+    """Stream AI tutor chat response as Server-Sent Events"""
+    try:
+        data = request.get_json()
+        
+        user_message = data.get('message', '')
+        context = data.get('context', {})
+        personality = data.get('personality', 'encouraging')
+        
+        if not user_message:
+            return jsonify({'error': 'Message is required'}), 400
+        
+        def event_stream():
+            for event in ai_tutor.stream_response(user_message, context, personality):
+                event_type = event.pop('event')
+                yield f"event: {event_type}\ndata: {json.dumps(event)}\n\n"
+        
+        return Response(
+            stream_with_context(event_stream()),
+            mimetype='text/event-stream',
+            headers={
+                'Cache-Control': 'no-cache',
+                'X-Accel-Buffering': 'no'  # Disable proxy buffering so tokens flush immediately
+            }
+        )
+        
+    except Exception as e:
+        logger.error(f"AI tutor chat stream error: {e}")
+        return jsonify({'error': 'Internal server error'}), 500
+
+@app.route('/ai-tutor/cache/stats', methods=['GET'])
+def tutor_cache_stats():
+    """Tutor response cache hit/miss metrics"""
+    return jsonify({
+        'success': True,
+        'stats': ai_tutor.response_cache.get_stats()
+    })
+
 @app.route('/challenges/generate', methods=['POST'])
 def generate_challenge():
     """Generate adaptive programming challenge"""
@@ -682,6 +842,20 @@ def analyze_code():
         if not code:
             return jsonify({'error': 'Code is required'}), 400
         
+        if data.get('async'):
+            # Return immediately; the client polls /code/analyze/<job_id>
+            try:
+                job_id = analysis_jobs.submit(code=code, language=language, challenge_context=challenge_context)
+            except JobQueueFull as e:
+                return jsonify({'error': 'Analysis queue is full, try again later', 'details': str(e)}), 503
+            
+            return jsonify({
+                'success': True,
+                'job_id': job_id,
+                'status': 'queued',
+                'status_url': f'/code/analyze/{job_id}'
+            }), 202
+        
         analysis = code_analyzer.analyze_code(code, language, challenge_context)
         
         return jsonify({
@@ -693,6 +867,83 @@ def analyze_code():
         logger.error(f"Code analysis error: {e}")
         return jsonify({'error': 'Analysis failed'}), 500
 
+@app.route('/code/analyze/batch', methods=['POST'])
+def analyze_code_batch():
+    """Analyze many submissions, streaming each result as Server-Sent Events"""
+    try:
+        data = request.get_json()
+        
+        items = data.get('items', [])
+        default_language = data.get('language', 'python')
+        
+        if not items:
+            return jsonify({'error': 'Items are required'}), 400
+        if len(items) > CODE_BATCH_MAX_ITEMS:
+            return jsonify({'error': f'At most {CODE_BATCH_MAX_ITEMS} items per request'}), 400
+        if any(not item.get('code') for item in items):
+            return jsonify({'error': 'Every item needs code'}), 400
+        
+        # Checked before streaming starts: afterwards only a 200 can be sent
+        batch_size = data.get('batch_size', ModelConfig.CODE_BATCH_SIZE)
+        if isinstance(batch_size, bool) or not isinstance(batch_size, (int, str)):
+            return jsonify({'error': 'batch_size must be an integer'}), 400
+        try:
+            batch_size = int(batch_size)
+        except ValueError:
+            return jsonify({'error': 'batch_size must be an integer'}), 400
+        batch_size = max(1, min(batch_size, ModelConfig.CODE_BATCH_SIZE))
+        
+        items = [
+            {
+                'id': item.get('id', index),
+                'code': item['code'],
+                'language': item.get('language', default_language),
+                'challenge_context': item.get('challenge_context')
+            }
+            for index, item in enumerate(items)
+        ]
+        
+        def event_stream():
+            started = time.time()
+            for index, analysis in code_analyzer.analyze_batch(items, batch_size):
+                result = {'index': index, 'id': items[index]['id'], 'analysis': analysis}
+                yield f"event: result\ndata: {json.dumps(result)}\n\n"
+            summary = {'count': len(items), 'elapsed_seconds': round(time.time() - started, 3)}
+            yield f"event: done\ndata: {json.dumps(summary)}\n\n"
+        
+        return Response(
+            stream_with_context(event_stream()),
+            mimetype='text/event-stream',
+            headers={
+                'Cache-Control': 'no-cache',
+                'X-Accel-Buffering': 'no'
+            }
+        )
+        
+    except Exception as e:
+        logger.error(f"Batch code analysis error: {e}")
+        return jsonify({'error': 'Analysis failed'}), 500
+
+@app.route('/code/analyze/<job_id>', methods=['GET'])
+def get_analysis_job(job_id):
+    """Status and result of an asynchronous code analysis job"""
+    job = analysis_jobs.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found or expired'}), 404
+    
+    return jsonify({
+        'success': True,
+        **job
+    })
+
+@app.route('/code/analyze/cache/stats', methods=['GET'])
+def analysis_cache_stats():
+    """Analysis cache hit ratios for this worker, per kind of analysis"""
+    return jsonify({
+        'success': True,
+        'stats': get_analysis_cache().get_stats()
+    })
+
 @app.route('/learning-path/recommend', methods=['POST'])
 def recommend_learning_path():
     """Recommend personalized learning path"""
@@ -751,14 +1002,58 @@ def evolution_status():
         logger.error(f"Evolution status error: {e}")
         return jsonify({'error': 'Failed to get evolution status'}), 500
 
+@app.route('/evolution/top', methods=['GET'])
+def evolution_top_variants():
+    """Best variants by a metric (default performance_score) with their lineage"""
+    try:
+        metric = request.args.get('metric', 'performance_score')
+        k = max(1, min(request.args.get('k', 5, type=int), 100))
+        return jsonify({
+            'success': True,
+            'metric': metric,
+            'variants': self_evolution_engine.get_top_variants(metric, k)
+        })
+    except Exception as e:
+        logger.error(f"Evolution top variants error: {e}")
+        return jsonify({'error': 'Failed to get top variants'}), 500
+
 @app.route('/evolution/evolve', methods=['POST'])
 def trigger_evolution():
-    """Trigger evolution cycle"""
+    """Trigger evolution cycle
+    
+    With ``"async": true`` the cycle runs as a background job and the
+    response is a job id to poll instead of the result. Only background
+    cycles benchmark the candidates: a replay takes longer than a web
+    worker may block, so synchronous cycles use the static checks alone.
+    """
     try:
         data = request.get_json()
         analytics_data = data.get('analytics', {})
+        population_size = data.get('population_size')  # Defaults to EVOLUTION_POPULATION_SIZE
+        if population_size is not None:
+            if isinstance(population_size, bool) or not isinstance(population_size, (int, str)):
+                return jsonify({'error': 'population_size must be an integer'}), 400
+            try:
+                population_size = int(population_size)
+            except ValueError:
+                return jsonify({'error': 'population_size must be an integer'}), 400
+            population_size = max(1, min(population_size, 32))
         
-        result = self_evolution_engine.evolve(analytics_data)
+        if data.get('async'):
+            # Generation, testing and benchmarks take minutes; the client polls /evolution/jobs/<job_id>
+            try:
+                job_id = evolution_jobs.submit(analytics_data=analytics_data, population_size=population_size)
+            except JobQueueFull as e:
+                return jsonify({'error': 'Evolution queue is full, try again later', 'details': str(e)}), 503
+            
+            return jsonify({
+                'success': True,
+                'job_id': job_id,
+                'status': 'queued',
+                'status_url': f'/evolution/jobs/{job_id}'
+            }), 202
+        
+        result = self_evolution_engine.evolve(analytics_data, population_size, benchmark=False)
         
         return jsonify({
             'success': True,
@@ -768,6 +1063,43 @@ def trigger_evolution():
         logger.error(f"Evolution trigger error: {e}")
         return jsonify({'error': 'Failed to trigger evolution'}), 500
 
+@app.route('/evolution/jobs/<job_id>', methods=['GET'])
+def get_evolution_job(job_id):
+    """Status and result of a background evolution cycle"""
+    job = evolution_jobs.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found or expired'}), 404
+    
+    return jsonify({
+        'success': True,
+        **job
+    })
+
+@app.route('/evolution/generate/stream', methods=['POST'])
+def stream_evolution_variant():
+    """Stream one variant as Server-Sent Events while the model writes it (not tested or recorded)"""
+    try:
+        data = request.get_json() or {}
+        analytics_data = data.get('analytics', {})
+        variant_type = data.get('focus', 'general')
+        
+        def event_stream():
+            for event in self_evolution_engine.stream_variant(analytics_data, variant_type):
+                event_type = event.pop('event')
+                yield f"event: {event_type}\ndata: {json.dumps(event)}\n\n"
+        
+        return Response(
+            stream_with_context(event_stream()),
+            mimetype='text/event-stream',
+            headers={
+                'Cache-Control': 'no-cache',
+                'X-Accel-Buffering': 'no'
+            }
+        )
+    except Exception as e:
+        logger.error(f"Evolution stream error: {e}")
+        return jsonify({'error': 'Failed to stream variant'}), 500
+
 @app.route('/evolution/migrate', methods=['POST'])
 def migrate_to_ollama():
     """Migrate from GCP to local Ollama"""
@@ -816,7 +1148,7 @@ def submit_code_test():
         if not session_id or not code:
             return jsonify({'error': 'session_id and code are required'}), 400
         
-        result = assessment_engine.submit_code_test(session_id, code, language)
+        result = assessment_engine.submit_code_test(session_id, code, language, data.get('grading_mode'))
         
         return jsonify({
             'success': True,
@@ -953,14 +1285,14 @@ def generate_hint():
             code_issues.append(f"Error encountered: {error_message}")
         
         # Analyze code patterns
-        code_lower = user_code.lower()
+        features = extract_features(user_code, language)
         
         # Detect common issues
         if 'syntax' in str(error_message).lower():
             code_issues.append("Syntax error detected")
         if user_code.count('(') != user_code.count(')'):
             code_issues.append("Mismatched parentheses")
-        if not any(keyword in code_lower for keyword in ['return', 'print']):
+        if not features['returns'] and not features['prints']:
             code_issues.append("No return or output statement found")
         
         # Generate progressive hints based on attempts
@@ -1047,69 +1379,79 @@ def explain_code():
         if not code:
             return jsonify({'error': 'Code is required'}), 400
         
-        # Analyze code structure
-        lines = code.split('\n')
-        non_empty_lines = [l for l in lines if l.strip() and not l.strip().startswith('#')]
-        
-        # Generate explanation based on mode
-        explanation = ""
-        key_points = []
-        
-        if mode == 'eli5':
-            explanation = _generate_eli5_explanation(code, language)
-            key_points = [
-                "The code is like a recipe with step-by-step instructions",
-                "Each line tells the computer to do something specific",
-                "Variables are like labeled boxes that store information",
-                "Functions are reusable blocks of code that perform specific tasks"
-            ]
-        elif mode == 'beginner':
-            explanation = _generate_beginner_explanation(code, language)
-            key_points = _extract_code_concepts(code, language)
-        elif mode == 'technical':
-            explanation = _generate_technical_explanation(code, language)
-            key_points = _extract_technical_details(code, language)
-        else:  # advanced
-            explanation = _generate_advanced_explanation(code, language)
-            key_points = _extract_advanced_patterns(code, language)
-        
-        # Analyze complexity
-        complexity = {
-            'time': _estimate_time_complexity(code),
-            'space': _estimate_space_complexity(code),
-            'readability': 'high' if len(non_empty_lines) < 20 and '#' in code else 'medium'
-        }
-        
-        # Suggest improvements
-        improvements = []
-        if len(non_empty_lines) > 30:
-            improvements.append("Consider breaking this into smaller functions for better readability")
-        
-        # Check for nested loops
-        for_count = code.lower().count('for')
-        while_count = code.lower().count('while')
-        loop_count = for_count + while_count
-        if loop_count > 2:
-            improvements.append(f"You have {loop_count} loops - consider if there's a more efficient approach to reduce complexity")
-        
-        if '#' not in code and len(non_empty_lines) > 5:
-            improvements.append("Add comments to explain complex logic")
-        if language == 'python' and 'def' in code and 'return' not in code:
-            improvements.append("Function should return a value")
+        explanation = get_analysis_cache().get_or_compute(
+            'explanation', f"{EXPLANATION_VERSION}:{mode}", code, language,
+            lambda: _explain_code(code, language, mode),
+            shared=False  # Rule-based and cheap; a Redis round trip would cost more than it saves
+        )
         
         return jsonify({
             'success': True,
-            'explanation': explanation,
-            'keyPoints': key_points,
-            'complexity': complexity,
-            'improvements': improvements,
-            'mode': mode
+            **explanation
         })
         
     except Exception as e:
         logger.error(f"Code explanation error: {e}")
         return jsonify({'error': 'Failed to explain code'}), 500
 
+def _explain_code(code, language, mode):
+    """Explanation, key points, complexity and improvements for one explain-code mode"""
+    # Analyze code structure
+    features = extract_features(code, language)
+    code_lines = features['code_lines']
+    
+    # Generate explanation based on mode
+    explanation = ""
+    key_points = []
+    
+    if mode == 'eli5':
+        explanation = _generate_eli5_explanation(code, language)
+        key_points = [
+            "The code is like a recipe with step-by-step instructions",
+            "Each line tells the computer to do something specific",
+            "Variables are like labeled boxes that store information",
+            "Functions are reusable blocks of code that perform specific tasks"
+        ]
+    elif mode == 'beginner':
+        explanation = _generate_beginner_explanation(code, language)
+        key_points = _extract_code_concepts(code, language)
+    elif mode == 'technical':
+        explanation = _generate_technical_explanation(code, language)
+        key_points = _extract_technical_details(code, language)
+    else:  # advanced
+        explanation = _generate_advanced_explanation(code, language)
+        key_points = _extract_advanced_patterns(code, language)
+    
+    # Analyze complexity
+    complexity = {
+        'time': _estimate_time_complexity(code, language),
+        'space': _estimate_space_complexity(code, language),
+        'readability': 'high' if code_lines < 20 and features['has_comments'] else 'medium'
+    }
+    
+    # Suggest improvements
+    improvements = []
+    if code_lines > 30:
+        improvements.append("Consider breaking this into smaller functions for better readability")
+    
+    # Check for nested loops
+    loop_count = features['loops']
+    if loop_count > 2:
+        improvements.append(f"You have {loop_count} loops - consider if there's a more efficient approach to reduce complexity")
+    
+    if not features['has_comments'] and code_lines > 5:
+        improvements.append("Add comments to explain complex logic")
+    if language == 'python' and features['functions'] and not features['returns']:
+        improvements.append("Function should return a value")
+    
+    return {
+        'explanation': explanation,
+        'keyPoints': key_points,
+        'complexity': complexity,
+        'improvements': improvements,
+        'mode': mode
+    }
+
 def _get_algorithm_template(language, challenge_title):
     """Get an algorithm template hint"""
     if language == 'python':
@@ -1134,20 +1476,20 @@ def solution(input_data):
 
 def _generate_eli5_explanation(code, language):
     """Generate ELI5 (Explain Like I'm 5) explanation"""
-    code_lower = code.lower()
+    features = extract_features(code, language)
     
     explanation = "Let me explain this code like you're 5 years old:\n\n"
     
-    if 'def' in code_lower or 'function' in code_lower:
+    if features['functions']:
         explanation += "Imagine you have a magic box (a function) that does something special. "
     
-    if 'for' in code_lower or 'while' in code_lower:
+    if features['loops']:
         explanation += "The code goes through items one by one, like counting toys. "
     
-    if 'if' in code_lower:
+    if features['branches']:
         explanation += "It makes decisions, like 'if it's raining, take an umbrella'. "
     
-    if 'return' in code_lower:
+    if features['returns']:
         explanation += "At the end, it gives you back an answer, like when you ask 'what's 2+2?' and get '4'. "
     
     explanation += "\n\nIn simple terms: This code takes some information, does something with it, and gives you a result!"
@@ -1166,7 +1508,7 @@ The code follows a clear logical flow from start to finish, making it easier to
 
 def _generate_technical_explanation(code, language):
     """Generate technical explanation"""
-    lines = len(code.split('\n'))
+    lines = extract_features(code, language)['lines']
     return f"""Technical Analysis of this {language} code ({lines} lines):
 
 This implementation uses standard {language} constructs to solve the problem. The algorithm follows a structured approach with clear separation of concerns. The code demonstrates understanding of fundamental programming concepts including control flow, data structures, and problem decomposition.
@@ -1188,17 +1530,17 @@ The solution balances readability, performance, and maintainability. Consider pr
 def _extract_code_concepts(code, language):
     """Extract key programming concepts from code"""
     concepts = []
-    code_lower = code.lower()
+    features = extract_features(code, language)
     
-    if 'def' in code_lower or 'function' in code_lower:
+    if features['functions']:
         concepts.append("Uses functions to organize code")
-    if 'for' in code_lower or 'while' in code_lower:
+    if features['loops']:
         concepts.append("Implements loops for iteration")
-    if 'if' in code_lower:
+    if features['branches']:
         concepts.append("Uses conditional logic for decision-making")
-    if '[' in code or 'list' in code_lower or 'array' in code_lower:
+    if features['uses_lists']:
         concepts.append("Works with arrays/lists for data storage")
-    if 'return' in code_lower:
+    if features['returns']:
         concepts.append("Returns a value from the function")
     
     return concepts
@@ -1206,13 +1548,14 @@ def _extract_code_concepts(code, language):
 def _extract_technical_details(code, language):
     """Extract technical details"""
     details = []
+    features = extract_features(code, language)
     
     if language == 'python':
-        if 'lambda' in code:
+        if features['lambdas']:
             details.append("Uses lambda functions for concise operations")
-        if 'list comprehension' in code or '[' in code and 'for' in code:
+        if features['comprehensions']:
             details.append("Utilizes list comprehensions")
-        if 'try' in code.lower():
+        if features['try_blocks']:
             details.append("Implements error handling")
     
     return details if details else ["Standard programming constructs", "Clear variable naming", "Logical flow control"]
@@ -1220,32 +1563,33 @@ def _extract_technical_details(code, language):
 def _extract_advanced_patterns(code, language):
     """Extract advanced patterns"""
     patterns = []
+    features = extract_features(code, language)
     
-    if 'class' in code.lower():
+    if features['classes']:
         patterns.append("Object-oriented design with classes")
-    if 'async' in code.lower() or 'await' in code.lower():
+    if features['async_constructs']:
         patterns.append("Asynchronous programming patterns")
-    if 'decorator' in code.lower() or '@' in code:
+    if features['decorators']:
         patterns.append("Uses decorators for metaprogramming")
     
     return patterns if patterns else ["Procedural programming approach", "Functional decomposition", "Clear abstraction layers"]
 
-def _estimate_time_complexity(code):
-    """Estimate time complexity based on loop keywords"""
-    loop_count = code.lower().count('for') + code.lower().count('while')
+def _estimate_time_complexity(code, language='python'):
+    """Estimate time complexity from how deeply loops are nested"""
+    loop_depth = extract_features(code, language)['max_loop_depth']
     
-    if loop_count == 0:
+    if loop_depth == 0:
         return "O(1) - Constant time"
-    elif loop_count == 1:
+    elif loop_depth == 1:
         return "O(n) - Linear time"
-    elif loop_count == 2:
+    elif loop_depth == 2:
         return "O(n²) - Quadratic time"
     else:
         return "O(n³) or higher - Consider optimization"
 
-def _estimate_space_complexity(code):
+def _estimate_space_complexity(code, language='python'):
     """Estimate space complexity"""
-    if 'append' in code.lower() or '+=' in code:
+    if extract_features(code, language)['collection_growth']:
         return "O(n) - Linear space (creates new data structures)"
     else:
         return "O(1) - Constant space (in-place operations)"
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Import legacy per-file JSON assessment sessions into the session store
+Safe to re-run: sessions are upserted by session_id and the JSON files are
+left in place. Each migrated user's report aggregates are then rebuilt from
+all of their sessions, old and new.
+"""
+
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from assessment import AssessmentEngine
+from session_store import JsonFileSessionStore, SessionStoreConfig, create_session_store
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Migrate JSON assessment sessions to SQLite or Redis")
+    parser.add_argument('--source', default=SessionStoreConfig.SESSION_JSON_DIR, help='Directory of <session_id>.json files')
+    parser.add_argument('--backend', default='sqlite', choices=['sqlite', 'redis'])
+    parser.add_argument('--db', help='SQLite database path (defaults to SESSION_DB_PATH)')
+    parser.add_argument('--redis-url', default=os.getenv('REDIS_URL', 'redis://localhost:6379'))
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.source):
+        print(f"Source directory not found: {args.source}")
+        return 1
+
+    if args.backend == 'redis':
+        import redis
+        redis_client = redis.from_url(args.redis_url)
+        redis_client.ping()
+        target = create_session_store('redis', redis_client)
+    else:
+        if args.db:
+            SessionStoreConfig.SESSION_DB_PATH = args.db
+        target = create_session_store('sqlite')
+
+    print("=" * 60)
+    print("CodeMentor AI - Session Migration")
+    print("=" * 60)
+    print(f"Source: {args.source}")
+    print(f"Target: {args.backend}")
+
+    migrated = 0
+    users = set()
+    for session in JsonFileSessionStore(args.source).iter_all():
+        target.save(session)
+        users.add(session.get('user_id'))
+        migrated += 1
+
+    # Aggregates kept by the engine since the switch to this store never saw the imported sessions
+    engine = AssessmentEngine(session_store=target)
+    users.discard(None)
+    for user_id in users:
+        engine.rebuild_user_stats(user_id)
+
+    print(f"\n✓ Migrated {migrated} sessions for {len(users)} users")
+    print(f"✓ Rebuilt report aggregates for {len(users)} users")
+    print("=" * 60)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -8,14 +8,39 @@ import logging
 from transformers import (
     AutoTokenizer, 
     AutoModelForCausalLM,
-    AutoModelForSeq2SeqLM
+    AutoModelForSeq2SeqLM,
+    StoppingCriteria,
+    StoppingCriteriaList,
+    TextIteratorStreamer
 )
-from typing import Dict, List, Optional
+from typing import Dict, Iterator, List, Optional, Tuple
+from collections import OrderedDict
 import threading
+import copy
+import gc
+import queue
+import time
 import os
+import warnings
+
+from caching import get_analysis_cache
 
 logger = logging.getLogger(__name__)
 
+# CPU weight formats understood by ModelLoader
+QUANTIZATION_MODES = ("none", "int8", "bf16")
+
+
+def _quantization_mode(value: str) -> str:
+    """Validate MODEL_QUANTIZATION, falling back to float32 weights on unknown values"""
+    mode = value.strip().lower()
+    if mode not in QUANTIZATION_MODES:
+        logger.warning(
+            f"Unsupported MODEL_QUANTIZATION={value!r} (expected one of {', '.join(QUANTIZATION_MODES)}), using none"
+        )
+        return "none"
+    return mode
+
 
 class ModelConfig:
     """Configuration for ML models"""
@@ -34,6 +59,49 @@ class ModelConfig:
     
     # Cache directory for models
     CACHE_DIR = os.getenv("MODEL_CACHE_DIR", "/tmp/model_cache")
+    
+    # CPU weight format: "none" (float32), "int8" (dynamic int8 linear layers) or "bf16"
+    QUANTIZATION = _quantization_mode(os.getenv("MODEL_QUANTIZATION", "none"))
+    
+    # Load weights in the gunicorn master so forked workers share them copy-on-write
+    PRELOAD_MODELS = os.getenv("PRELOAD_MODELS", "false").lower() == "true"
+    
+    # Load and warm up both models in the background at startup; /ready reports progress
+    WARMUP_ON_STARTUP = os.getenv("MODEL_WARMUP", "false").lower() == "true"
+    
+    # Dynamic batching of concurrent chat requests
+    CHAT_BATCHING_ENABLED = os.getenv("CHAT_BATCHING_ENABLED", "true").lower() == "true"
+    CHAT_BATCH_MAX_SIZE = int(os.getenv("CHAT_BATCH_MAX_SIZE", "8"))
+    CHAT_BATCH_MAX_WAIT_MS = int(os.getenv("CHAT_BATCH_MAX_WAIT_MS", "25"))
+    CHAT_BATCH_TIMEOUT = float(os.getenv("CHAT_BATCH_TIMEOUT", "300"))
+    
+    # Maximum seconds to wait for the next token when streaming
+    CHAT_STREAM_TOKEN_TIMEOUT = float(os.getenv("CHAT_STREAM_TOKEN_TIMEOUT", "60"))
+    
+    # Reuse of precomputed key/values for the shared system-prompt prefix
+    PREFIX_CACHE_ENABLED = os.getenv("PREFIX_CACHE_ENABLED", "true").lower() == "true"
+    PREFIX_CACHE_SIZE = int(os.getenv("PREFIX_CACHE_SIZE", "16"))  # ~8MB per prefix for TinyLlama fp32
+    
+    # Code snippets per padded CodeT5 forward pass in bulk analysis
+    CODE_BATCH_SIZE = int(os.getenv("CODE_BATCH_SIZE", "8"))
+    
+    # Speculative (assisted) decoding of single chat generations: "none", "prompt_lookup"
+    # (drafts copied from matching n-grams of the prompt, no extra weights) or "draft"
+    # (a small draft model proposes tokens that TinyLlama verifies in one forward pass)
+    SPECULATIVE_DECODING = os.getenv("SPECULATIVE_DECODING", "none").lower()
+    SPECULATIVE_DRAFT_MODEL = os.getenv("SPECULATIVE_DRAFT_MODEL", "JackFram/llama-68m")  # Must share TinyLlama's vocabulary
+    SPECULATIVE_NUM_TOKENS = int(os.getenv("SPECULATIVE_NUM_TOKENS", "10"))  # Tokens proposed per draft
+    SPECULATIVE_NGRAM_SIZE = int(os.getenv("SPECULATIVE_NGRAM_SIZE", "3"))  # Longest prompt n-gram matched
+    
+    # Per-request generation budgets: shorter, cheaper decoding as more generations are in flight
+    ADAPTIVE_BUDGETS = os.getenv("ADAPTIVE_BUDGETS", "true").lower() == "true"
+    CHAT_MAX_NEW_TOKENS = int(os.getenv("CHAT_MAX_NEW_TOKENS", "256"))
+    CHAT_MIN_NEW_TOKENS = int(os.getenv("CHAT_MIN_NEW_TOKENS", "64"))  # Floor when shortened under load
+    CHAT_GENERATION_MAX_SECONDS = float(os.getenv("CHAT_GENERATION_MAX_SECONDS", "60"))  # Stop and return what we have
+    CODE_NUM_BEAMS = int(os.getenv("CODE_NUM_BEAMS", "4"))
+    CODE_MAX_LENGTH = int(os.getenv("CODE_MAX_LENGTH", "256"))
+    BUDGET_BUSY_IN_FLIGHT = int(os.getenv("BUDGET_BUSY_IN_FLIGHT", "4"))  # Other generations running or queued
+    BUDGET_OVERLOAD_IN_FLIGHT = int(os.getenv("BUDGET_OVERLOAD_IN_FLIGHT", "12"))
 
 
 class ModelLoader:
@@ -59,7 +127,14 @@ class ModelLoader:
         self.chat_tokenizer = None
         self.code_model = None
         self.code_tokenizer = None
+        self.draft_model = None
         self.device = ModelConfig.DEVICE
+        self._load_locks = {'chat': threading.Lock(), 'code': threading.Lock()}
+        self._status_lock = threading.Lock()
+        self._status = {
+            name: {'state': 'not_loaded', 'load_seconds': None, 'warmup_seconds': None, 'error': None}
+            for name in ('chat', 'code')
+        }
         
         logger.info(f"ModelLoader initialized. Using device: {self.device}")
     
@@ -68,66 +143,660 @@ class ModelLoader:
         if self.chat_model is not None:
             return self.chat_model, self.chat_tokenizer
         
-        try:
-            logger.info(f"Loading chat model: {ModelConfig.CHAT_MODEL}")
+        with self._load_locks['chat']:
+            # Another thread (e.g. warm-up) may have finished loading while we waited
+            if self.chat_model is not None:
+                return self.chat_model, self.chat_tokenizer
             
-            self.chat_tokenizer = AutoTokenizer.from_pretrained(
-                ModelConfig.CHAT_MODEL,
+            self._set_status('chat', state='loading', error=None)
+            started = time.time()
+            try:
+                logger.info(f"Loading chat model: {ModelConfig.CHAT_MODEL}")
+                
+                self.chat_tokenizer = AutoTokenizer.from_pretrained(
+                    ModelConfig.CHAT_MODEL,
+                    cache_dir=ModelConfig.CACHE_DIR,
+                    trust_remote_code=True
+                )
+                
+                model = AutoModelForCausalLM.from_pretrained(
+                    ModelConfig.CHAT_MODEL,
+                    cache_dir=ModelConfig.CACHE_DIR,
+                    dtype=self._load_dtype(),
+                    device_map="auto" if self.device == "cuda" else None,
+                    low_cpu_mem_usage=True,
+                    trust_remote_code=True
+                )
+                
+                if self.device == "cpu":
+                    model = self._quantize(model.to(self.device))
+                self.chat_model = model
+                
+                if ModelConfig.SPECULATIVE_DECODING == "draft":
+                    self._load_draft_model()
+                
+                self._set_status('chat', state='loaded', load_seconds=round(time.time() - started, 3))
+                logger.info("Chat model loaded successfully")
+                return self.chat_model, self.chat_tokenizer
+                
+            except Exception as e:
+                self._set_status('chat', state='failed', error=str(e))
+                logger.error(f"Failed to load chat model: {e}")
+                raise
+    
+    def _load_draft_model(self):
+        """Load the speculative decoding draft model; on failure chat runs without it"""
+        try:
+            logger.info(f"Loading draft model: {ModelConfig.SPECULATIVE_DRAFT_MODEL}")
+            model = AutoModelForCausalLM.from_pretrained(
+                ModelConfig.SPECULATIVE_DRAFT_MODEL,
                 cache_dir=ModelConfig.CACHE_DIR,
-                trust_remote_code=True
-            )
+                dtype=self._load_dtype(),
+                low_cpu_mem_usage=True
+            ).to(self.device)
             
-            self.chat_model = AutoModelForCausalLM.from_pretrained(
-                ModelConfig.CHAT_MODEL,
-                cache_dir=ModelConfig.CACHE_DIR,
-                dtype=torch.float16 if self.device == "cuda" else torch.float32,
-                device_map="auto" if self.device == "cuda" else None,
-                low_cpu_mem_usage=True,
-                trust_remote_code=True
-            )
+            if model.config.vocab_size != self.chat_model.config.vocab_size:
+                logger.warning(
+                    f"Draft model vocabulary ({model.config.vocab_size}) does not match the chat model "
+                    f"({self.chat_model.config.vocab_size}); speculative decoding disabled"
+                )
+                return
             
             if self.device == "cpu":
-                self.chat_model = self.chat_model.to(self.device)
-            
-            logger.info("Chat model loaded successfully")
-            return self.chat_model, self.chat_tokenizer
-            
+                model = self._quantize(model)
+            model.generation_config.num_assistant_tokens = ModelConfig.SPECULATIVE_NUM_TOKENS
+            self.draft_model = model.eval()
+            logger.info("Draft model loaded successfully")
         except Exception as e:
-            logger.error(f"Failed to load chat model: {e}")
-            raise
+            logger.warning(f"Failed to load draft model, speculative decoding disabled: {e}")
+    
+    def speculative_kwargs(self) -> Dict:
+        """Extra generate() arguments for assisted decoding of one prompt, or {} when off
+        
+        Assisted generation only handles a batch of one, so batched calls
+        must not use these.
+        """
+        mode = ModelConfig.SPECULATIVE_DECODING
+        if mode == "prompt_lookup":
+            return {
+                'prompt_lookup_num_tokens': ModelConfig.SPECULATIVE_NUM_TOKENS,
+                'max_matching_ngram_size': ModelConfig.SPECULATIVE_NGRAM_SIZE
+            }
+        if mode == "draft" and self.draft_model is not None:
+            return {'assistant_model': self.draft_model}
+        return {}
     
     def load_code_model(self):
         """Load the code analysis model"""
         if self.code_model is not None:
             return self.code_model, self.code_tokenizer
         
-        try:
-            logger.info(f"Loading code model: {ModelConfig.CODE_MODEL}")
+        with self._load_locks['code']:
+            # Another thread (e.g. warm-up) may have finished loading while we waited
+            if self.code_model is not None:
+                return self.code_model, self.code_tokenizer
             
-            self.code_tokenizer = AutoTokenizer.from_pretrained(
-                ModelConfig.CODE_MODEL,
-                cache_dir=ModelConfig.CACHE_DIR,
-                trust_remote_code=True
-            )
+            self._set_status('code', state='loading', error=None)
+            started = time.time()
+            try:
+                logger.info(f"Loading code model: {ModelConfig.CODE_MODEL}")
+                
+                self.code_tokenizer = AutoTokenizer.from_pretrained(
+                    ModelConfig.CODE_MODEL,
+                    cache_dir=ModelConfig.CACHE_DIR,
+                    trust_remote_code=True
+                )
+                
+                model = AutoModelForSeq2SeqLM.from_pretrained(
+                    ModelConfig.CODE_MODEL,
+                    cache_dir=ModelConfig.CACHE_DIR,
+                    dtype=self._load_dtype(),
+                    device_map="auto" if self.device == "cuda" else None,
+                    low_cpu_mem_usage=True,
+                    trust_remote_code=True
+                )
+                
+                if self.device == "cpu":
+                    model = self._quantize(model.to(self.device))
+                self.code_model = model
+                
+                self._set_status('code', state='loaded', load_seconds=round(time.time() - started, 3))
+                logger.info("Code model loaded successfully")
+                return self.code_model, self.code_tokenizer
+                
+            except Exception as e:
+                self._set_status('code', state='failed', error=str(e))
+                logger.error(f"Failed to load code model: {e}")
+                raise
+    
+    def preload(self):
+        """Load both models before workers are forked
+        
+        Forked workers inherit the weight tensors copy-on-write, so N workers
+        share one physical copy as long as nothing writes to the weights.
+        No inference may run here: OpenMP thread pools do not survive fork.
+        """
+        self.load_chat_model()
+        self.load_code_model()
+        
+        # Move everything allocated so far out of the GC's reach, so collections
+        # in the workers don't touch (and thereby un-share) the preloaded objects
+        gc.collect()
+        gc.freeze()
+        logger.info("Models preloaded for copy-on-write sharing")
+    
+    def warm_up(self, background: bool = True) -> List[threading.Thread]:
+        """Load both models concurrently and run a dummy generation on each
+        
+        The first real request then finds weights resident and kernels/buffers
+        already initialised. Progress is visible through get_status().
+        """
+        threads = [
+            threading.Thread(target=self._warm_up_model, args=(name,), name=f'warmup-{name}', daemon=True)
+            for name in ('chat', 'code')
+        ]
+        for thread in threads:
+            thread.start()
+        if not background:
+            for thread in threads:
+                thread.join()
+        return threads
+    
+    def _warm_up_model(self, name: str):
+        """Load one model and push a short prompt through generate"""
+        try:
+            if name == 'chat':
+                model, tokenizer = self.load_chat_model()
+                prompt = "<|user|>\nHello</s>\n<|assistant|>\n"
+            else:
+                model, tokenizer = self.load_code_model()
+                prompt = "Analyze this python code:\n\nprint('hello')"
             
-            self.code_model = AutoModelForSeq2SeqLM.from_pretrained(
-                ModelConfig.CODE_MODEL,
-                cache_dir=ModelConfig.CACHE_DIR,
-                dtype=torch.float16 if self.device == "cuda" else torch.float32,
-                device_map="auto" if self.device == "cuda" else None,
-                low_cpu_mem_usage=True,
-                trust_remote_code=True
-            )
+            self._set_status(name, state='warming_up')
+            started = time.time()
+            inputs = tokenizer(prompt, return_tensors="pt").to(model.device)
+            with torch.no_grad():
+                model.generate(**inputs, max_new_tokens=4, do_sample=False, pad_token_id=tokenizer.eos_token_id)
             
-            if self.device == "cpu":
-                self.code_model = self.code_model.to(self.device)
+            self._set_status(name, state='ready', warmup_seconds=round(time.time() - started, 3))
+            logger.info(f"{name.title()} model warmed up")
+        except Exception as e:
+            self._set_status(name, state='failed', error=str(e))
+            logger.error(f"Warm-up of {name} model failed: {e}")
+    
+    def get_status(self) -> Dict:
+        """Per-model load state and timings"""
+        with self._status_lock:
+            return {name: dict(status) for name, status in self._status.items()}
+    
+    def is_ready(self) -> bool:
+        """Whether requests can be served without waiting on a model load
+        
+        Readiness is only gated when startup warm-up is enabled; otherwise
+        models load lazily on first use and the engine is always ready.
+        """
+        if not ModelConfig.WARMUP_ON_STARTUP:
+            return True
+        return all(status['state'] == 'ready' for status in self.get_status().values())
+    
+    def _set_status(self, name: str, **fields):
+        with self._status_lock:
+            self._status[name].update(fields)
+    
+    def _load_dtype(self) -> torch.dtype:
+        """Weight dtype to load with for the current device and quantization mode"""
+        if self.device == "cuda":
+            return torch.float16
+        if ModelConfig.QUANTIZATION == "bf16":
+            if _cpu_supports_bf16():
+                return torch.bfloat16
+            logger.warning("bf16 requested but this CPU lacks native bf16 support, using float32")
+        return torch.float32
+    
+    def _quantize(self, model):
+        """Apply dynamic int8 quantization to linear layers when configured (CPU only)
+        
+        torch.ao.quantization is deprecated; its replacement is torchao's
+        ``quantize_(model, Int8DynamicActivationInt8WeightConfig())``, which
+        is a separate package. Until that is a dependency, the deprecation
+        warnings are filtered here and the model stays in float32 once the
+        old API is gone.
+        """
+        if ModelConfig.QUANTIZATION != "int8":
+            return model
+        
+        with warnings.catch_warnings():
+            # Raised both when torch.ao.quantization is first imported and while quantizing
+            warnings.filterwarnings("ignore", message=r"torch\.ao\.quantization is deprecated", category=DeprecationWarning)
+            warnings.filterwarnings("ignore", message=r"torch\.quantize_per_tensor", category=UserWarning)
+            quantization = getattr(torch.ao, 'quantization', None)
+            if quantization is None or not hasattr(quantization, 'quantize_dynamic'):
+                logger.warning("torch.ao.quantization is unavailable in this torch build, keeping float32 weights")
+                return model
             
-            logger.info("Code model loaded successfully")
-            return self.code_model, self.code_tokenizer
+            logger.info("Applying dynamic int8 quantization to linear layers")
+            return quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+def process_memory_usage() -> Dict:
+    """Memory report for the current process, in MB
+    
+    On Linux, PSS (proportional set size) splits shared pages between the
+    processes mapping them, so summing PSS across workers gives the real
+    footprint; shared_mb shows how much of RSS is shared with siblings.
+    """
+    report = {'pid': os.getpid()}
+    try:
+        with open('/proc/self/smaps_rollup', 'r') as f:
+            fields = {}
+            for line in f:
+                parts = line.split()
+                if len(parts) >= 2 and parts[0].endswith(':') and parts[1].isdigit():
+                    fields[parts[0][:-1]] = int(parts[1]) / 1024.0
+        report.update({
+            'rss_mb': fields.get('Rss', 0.0),
+            'pss_mb': fields.get('Pss', 0.0),
+            'shared_mb': fields.get('Shared_Clean', 0.0) + fields.get('Shared_Dirty', 0.0),
+            'private_mb': fields.get('Private_Clean', 0.0) + fields.get('Private_Dirty', 0.0)
+        })
+    except OSError:
+        import resource
+        # ru_maxrss is peak RSS in KB on Linux (bytes on macOS)
+        report['max_rss_mb'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+    return report
+
+
+def _cpu_supports_bf16() -> bool:
+    """Whether oneDNN can run bf16 matmuls natively on this CPU"""
+    try:
+        return bool(torch.ops.mkldnn._is_mkldnn_bf16_supported())
+    except Exception:
+        return False
+
+
+class GenerationPolicy:
+    """Picks decoding settings for each request from its prompt, skill level and current load
+    
+    Load is the number of other generations in flight (chat and code share
+    the CPU). Under moderate load replies get shorter and CodeT5 uses fewer
+    beams; past the overload threshold decoding turns greedy with the
+    smallest budget and a tighter time limit, so requests finish with a
+    shorter answer instead of timing out in the queue.
+    """
+    
+    NORMAL, BUSY, OVERLOADED = 'normal', 'busy', 'overloaded'
+    
+    # Beginners get shorter, more focused explanations
+    SKILL_FACTORS = {'beginner': 0.75, 'intermediate': 1.0, 'advanced': 1.0}
+    BUSY_FACTOR = 0.6
+    # Budgets are rounded down to a multiple of this so concurrent requests
+    # usually share generation settings and can be batched together
+    TOKEN_STEP = 32
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._decisions = {self.NORMAL: 0, self.BUSY: 0, self.OVERLOADED: 0}
+    
+    def begin(self) -> int:
+        """Register a generation; returns how many others were already in flight"""
+        with self._lock:
+            load = self._in_flight
+            self._in_flight += 1
+        return load
+    
+    def end(self):
+        with self._lock:
+            self._in_flight = max(0, self._in_flight - 1)
+    
+    def load_level(self, load: int) -> str:
+        if not ModelConfig.ADAPTIVE_BUDGETS or load < ModelConfig.BUDGET_BUSY_IN_FLIGHT:
+            return self.NORMAL
+        if load < ModelConfig.BUDGET_OVERLOAD_IN_FLIGHT:
+            return self.BUSY
+        return self.OVERLOADED
+    
+    def chat_budget(self, user_message: str = '', skill_level: str = 'intermediate', load: int = 0) -> Dict:
+        """max_new_tokens, sampling and time limit for one tutor reply"""
+        level = self._record(load)
+        max_tokens = ModelConfig.CHAT_MAX_NEW_TOKENS
+        min_tokens = min(ModelConfig.CHAT_MIN_NEW_TOKENS, max_tokens)
+        max_time = ModelConfig.CHAT_GENERATION_MAX_SECONDS
+        
+        if not ModelConfig.ADAPTIVE_BUDGETS:
+            tokens = max_tokens
+        elif level == self.OVERLOADED:
+            tokens = min_tokens
+            max_time /= 2
+        else:
+            # Code or multi-part questions need room for examples; one-liners do not
+            if '\n' in user_message or len(user_message) > 400:
+                share = 1.0
+            elif len(user_message) > 120:
+                share = 0.75
+            else:
+                share = 0.5
+            share *= self.SKILL_FACTORS.get(skill_level, 1.0)
+            if level == self.BUSY:
+                share *= self.BUSY_FACTOR
+            tokens = int(max_tokens * share) // self.TOKEN_STEP * self.TOKEN_STEP
+            tokens = max(min_tokens, min(max_tokens, tokens))
+        
+        return {
+            'max_new_tokens': tokens,
+            'do_sample': level != self.OVERLOADED,
+            'max_time': max_time,
+            'load_level': level,
+            'in_flight': load,
+            'degraded': level != self.NORMAL
+        }
+    
+    def code_budget(self, load: int = 0) -> Dict:
+        """Beam count and output length for a CodeT5 analysis"""
+        level = self._record(load)
+        beams = max(1, ModelConfig.CODE_NUM_BEAMS)
+        max_length = ModelConfig.CODE_MAX_LENGTH
+        if level == self.BUSY:
+            beams = max(1, beams // 2)
+            max_length = max_length * 3 // 4
+        elif level == self.OVERLOADED:
+            beams = 1
+            max_length //= 2
+        
+        return {
+            'num_beams': beams,
+            'max_length': max_length,
+            'load_level': level,
+            'in_flight': load,
+            'degraded': level != self.NORMAL
+        }
+    
+    def get_stats(self) -> Dict:
+        """Generations in flight and budgets chosen per load level"""
+        with self._lock:
+            return {'in_flight': self._in_flight, 'decisions': dict(self._decisions)}
+    
+    def _record(self, load: int) -> str:
+        level = self.load_level(load)
+        with self._lock:
+            self._decisions[level] += 1
+        return level
+
+
+class PrefixKVCache:
+    """LRU cache of attention key/values for shared prompt prefixes
+    
+    Every tutor prompt starts with the same personality block, student
+    context and requirements list. Their key/values are computed once per
+    prefix key (personality, skill level, topic) and copied into each
+    generate call, so prefill only has to process the student's message.
+    """
+    
+    def __init__(self, max_entries: int = ModelConfig.PREFIX_CACHE_SIZE):
+        self.max_entries = max(1, max_entries)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'bypassed': 0, 'evictions': 0}
+    
+    def prepare_inputs(self, model, tokenizer, key: Tuple, prefix: str, prompt: str,
+                       reuse_prefix: bool = True) -> Dict:
+        """Build generate() inputs for prompt, reusing the cached prefix when possible
+        
+        Pass reuse_prefix=False for speculative decoding: assisted generation
+        does not continue correctly from a prefilled cache, so it needs the
+        whole prompt.
+        """
+        inputs = tokenizer(
+            prompt,
+            return_tensors="pt",
+            truncation=True,
+            max_length=ModelConfig.MAX_LENGTH
+        ).to(model.device)
+        
+        if not reuse_prefix or not ModelConfig.PREFIX_CACHE_ENABLED or not prompt.startswith(prefix):
+            return dict(inputs)
+        
+        prefix_ids, past_key_values = self._get_or_build(model, tokenizer, key, prefix)
+        input_ids = inputs['input_ids']
+        prefix_length = prefix_ids.shape[1]
+        
+        # The joint tokenization must line up with the cached prefix and leave
+        # at least one token for generate to prefill
+        if input_ids.shape[1] <= prefix_length or not torch.equal(input_ids[:, :prefix_length], prefix_ids):
+            self._count('bypassed')
+            return dict(inputs)
+        
+        return {
+            'input_ids': input_ids,
+            'attention_mask': inputs['attention_mask'],
+            # generate() appends to the cache in place, so each call gets its own copy
+            'past_key_values': copy.deepcopy(past_key_values)
+        }
+    
+    def clear(self):
+        """Drop all cached prefixes (e.g. after the model is reloaded)"""
+        with self._lock:
+            self._entries.clear()
+    
+    def get_stats(self) -> Dict:
+        """Snapshot of cache counters"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['entries'] = len(self._entries)
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_ratio'] = stats['hits'] / lookups if lookups else 0.0
+        return stats
+    
+    def _get_or_build(self, model, tokenizer, key: Tuple, prefix: str):
+        """Return (prefix_ids, past_key_values), running the prefix forward pass on a miss"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == prefix:
+                self._entries.move_to_end(key)
+                self._stats['hits'] += 1
+                return entry[1], entry[2]
+            self._stats['misses'] += 1
+        
+        prefix_ids = tokenizer(prefix, return_tensors="pt")['input_ids'].to(model.device)
+        with torch.no_grad():
+            past_key_values = model(input_ids=prefix_ids, use_cache=True).past_key_values
+        
+        with self._lock:
+            self._entries[key] = (prefix, prefix_ids, past_key_values)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats['evictions'] += 1
+        
+        return prefix_ids, past_key_values
+    
+    def _count(self, name: str):
+        with self._lock:
+            self._stats[name] += 1
+
+
+class _PendingGeneration:
+    """A chat prompt waiting for the batch scheduler"""
+    
+    __slots__ = ('prompt', 'gen_kwargs', 'prefix_key', 'prefix', 'batch_key', 'enqueued_at', 'event', 'result', 'error')
+    
+    def __init__(self, prompt: str, gen_kwargs: Dict, prefix_key: Optional[Tuple] = None, prefix: Optional[str] = None):
+        self.prompt = prompt
+        self.gen_kwargs = gen_kwargs
+        self.prefix_key = prefix_key
+        self.prefix = prefix
+        # Only requests with identical generation settings can share a batch
+        self.batch_key = tuple(sorted(gen_kwargs.items()))
+        self.enqueued_at = time.time()
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class GenerationScheduler:
+    """Dynamic batching scheduler for the chat model
+    
+    Request threads submit prompts and block until their completion is ready.
+    A single worker thread drains the queue into batches of up to
+    ``max_batch_size`` prompts, waiting at most ``max_wait_ms`` for more
+    requests to arrive, runs one left-padded ``generate`` call per batch and
+    hands each decoded completion back to the thread that submitted it.
+    A prompt that ends up alone in its batch reuses the prefix cache instead.
+    """
+    
+    def __init__(self, model_loader: ModelLoader,
+                 max_batch_size: int = ModelConfig.CHAT_BATCH_MAX_SIZE,
+                 max_wait_ms: int = ModelConfig.CHAT_BATCH_MAX_WAIT_MS,
+                 prefix_cache: Optional[PrefixKVCache] = None):
+        self.model_loader = model_loader
+        self.prefix_cache = prefix_cache
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0, max_wait_ms) / 1000.0
+        self._queue = queue.Queue()
+        self._worker = None
+        self._worker_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            'batches': 0,
+            'requests': 0,
+            'generated_tokens': 0,
+            'max_batch_size_seen': 0,
+            'queue_wait_seconds': 0.0,
+            'generate_seconds': 0.0,
+            'speculative_requests': 0
+        }
+    
+    def submit(self, prompt: str, gen_kwargs: Dict, timeout: Optional[float] = None,
+               prefix_key: Optional[Tuple] = None, prefix: Optional[str] = None) -> str:
+        """Queue a prompt and block until its completion text is available"""
+        self._ensure_worker()
+        pending = _PendingGeneration(prompt, gen_kwargs, prefix_key, prefix)
+        self._queue.put(pending)
+        
+        if not pending.event.wait(timeout if timeout is not None else ModelConfig.CHAT_BATCH_TIMEOUT):
+            raise TimeoutError("Timed out waiting for batched generation")
+        if pending.error is not None:
+            raise pending.error
+        return pending.result
+    
+    def queue_depth(self) -> int:
+        """Number of prompts waiting to be scheduled"""
+        return self._queue.qsize()
+    
+    def get_stats(self) -> Dict:
+        """Snapshot of scheduler counters"""
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats['avg_batch_size'] = stats['requests'] / stats['batches'] if stats['batches'] else 0.0
+        stats['queue_depth'] = self.queue_depth()
+        return stats
+    
+    def _ensure_worker(self):
+        """Start the worker thread on first use (after any fork)"""
+        if self._worker is not None and self._worker.is_alive():
+            return
+        with self._worker_lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(
+                    target=self._run, name='chat-batch-scheduler', daemon=True
+                )
+                self._worker.start()
+    
+    def _run(self):
+        """Worker loop: collect a batch, generate, dispatch"""
+        while True:
+            batch = self._collect_batch()
+            groups: Dict[tuple, List[_PendingGeneration]] = {}
+            for pending in batch:
+                groups.setdefault(pending.batch_key, []).append(pending)
             
-        except Exception as e:
-            logger.error(f"Failed to load code model: {e}")
-            raise
+            for group in groups.values():
+                try:
+                    self._generate_batch(group)
+                except Exception as e:
+                    logger.error(f"Batched generation failed: {e}")
+                    for pending in group:
+                        pending.error = e
+                finally:
+                    for pending in group:
+                        pending.event.set()
+    
+    def _collect_batch(self) -> List[_PendingGeneration]:
+        """Block for the first prompt, then gather more until full or the wait window closes"""
+        batch = [self._queue.get()]
+        deadline = time.time() + self.max_wait
+        
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.time()
+            try:
+                if remaining > 0:
+                    batch.append(self._queue.get(timeout=remaining))
+                else:
+                    batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        
+        return batch
+    
+    def _generate_batch(self, batch: List[_PendingGeneration]):
+        """Run one padded generate call for prompts sharing generation settings"""
+        model, tokenizer = self.model_loader.load_chat_model()
+        
+        # Decoder-only models must be left-padded so every row continues from its own prompt
+        if tokenizer.pad_token is None:
+            tokenizer.pad_token = tokenizer.eos_token
+        tokenizer.padding_side = 'left'
+        
+        started = time.time()
+        # Nothing to share a forward pass with - speculate, or skip re-encoding the system prompt
+        speculative = self.model_loader.speculative_kwargs() if len(batch) == 1 else {}
+        if len(batch) == 1 and self.prefix_cache is not None and batch[0].prefix:
+            pending = batch[0]
+            inputs = self.prefix_cache.prepare_inputs(
+                model, tokenizer, pending.prefix_key, pending.prefix, pending.prompt,
+                reuse_prefix=not speculative
+            )
+        else:
+            inputs = tokenizer(
+                [pending.prompt for pending in batch],
+                return_tensors="pt",
+                padding=True,
+                truncation=True,
+                max_length=ModelConfig.MAX_LENGTH
+            ).to(model.device)
+        
+        with torch.no_grad():
+            outputs = model.generate(**inputs, **batch[0].gen_kwargs, **speculative)
+        
+        prompt_length = inputs['input_ids'].shape[1]
+        new_tokens = outputs[:, prompt_length:]
+        texts = tokenizer.batch_decode(new_tokens, skip_special_tokens=True)
+        
+        generated = int((new_tokens != tokenizer.pad_token_id).sum().item())
+        for pending, text in zip(batch, texts):
+            pending.result = text
+        
+        with self._stats_lock:
+            self._stats['batches'] += 1
+            self._stats['requests'] += len(batch)
+            self._stats['generated_tokens'] += generated
+            self._stats['max_batch_size_seen'] = max(self._stats['max_batch_size_seen'], len(batch))
+            self._stats['queue_wait_seconds'] += sum(started - p.enqueued_at for p in batch)
+            self._stats['generate_seconds'] += time.time() - started
+            if speculative:
+                self._stats['speculative_requests'] += 1
+
+
+class _CancelGeneration(StoppingCriteria):
+    """Stop generation once the streaming client has gone away"""
+    
+    def __init__(self, cancelled: threading.Event):
+        self.cancelled = cancelled
+    
+    def __call__(self, input_ids, scores, **kwargs):
+        return torch.full(
+            (input_ids.shape[0],), self.cancelled.is_set(), dtype=torch.bool, device=input_ids.device
+        )
 
 
 class CustomAITutor:
@@ -135,6 +804,9 @@ class CustomAITutor:
     
     def __init__(self):
         self.model_loader = ModelLoader()
+        self.prefix_cache = PrefixKVCache()
+        self.scheduler = GenerationScheduler(self.model_loader, prefix_cache=self.prefix_cache)
+        self.policy = get_generation_policy()
         self.personality_prompts = {
             'encouraging': """You are an encouraging and supportive programming tutor. 
 INSTRUCTIONS:
@@ -173,67 +845,23 @@ INSTRUCTIONS:
     def generate_response(self, user_message: str, context: Dict, personality: str = 'encouraging') -> Dict:
         """Generate AI tutor response using local model"""
         try:
+            load = self.policy.begin()
             model, tokenizer = self.model_loader.load_chat_model()
             
-            # Get personality prompt
-            system_prompt = self.personality_prompts.get(
-                personality, 
-                self.personality_prompts['encouraging']
-            )
-            
-            # Format the conversation for TinyLlama
-            # TinyLlama uses a chat format
-            skill_level = context.get('skill_level', 'beginner')
-            topic = context.get('current_topic', 'general programming')
-            
-            conversation = f"""<|system|>
-{system_prompt}
-
-CONTEXT:
-- Student level: {skill_level}
-- Topic: {topic}
-
-REQUIREMENTS FOR YOUR RESPONSE:
-1. Provide CORRECT, working code with no syntax errors
-2. Use proper variable naming (lowercase with underscores)
-3. Include complete, executable examples
-4. Check your code before responding
-5. Be clear and concise
-6. Verify any code snippets are valid
-
-</s>
-<|user|>
-{user_message}</s>
-<|assistant|>
-"""
-            
-            # Tokenize input
-            inputs = tokenizer(
-                conversation,
-                return_tensors="pt",
-                truncation=True,
-                max_length=ModelConfig.MAX_LENGTH
-            ).to(model.device)
+            prefix_key, prefix = self._build_prefix(context, personality)
+            conversation = prefix + self._format_user_turn(user_message)
+            budget = self.policy.chat_budget(user_message, context.get('skill_level', 'beginner'), load)
+            gen_kwargs = self._generation_kwargs(tokenizer, budget)
             
-            # Generate response with optimized parameters for quality
-            with torch.no_grad():
-                outputs = model.generate(
-                    **inputs,
-                    max_new_tokens=256,
-                    temperature=0.5,  # Lower temperature for more consistent responses
-                    top_p=0.85,  # Slightly lower for better quality
-                    top_k=40,  # Filter out low probability tokens
-                    do_sample=True,
-                    pad_token_id=tokenizer.eos_token_id,
-                    repetition_penalty=1.2  # Avoid repetition
+            if ModelConfig.CHAT_BATCHING_ENABLED:
+                # Share a forward pass with other concurrent chat requests
+                response_text = self.scheduler.submit(
+                    conversation, gen_kwargs, prefix_key=prefix_key, prefix=prefix
+                )
+            else:
+                response_text = self._generate_single(
+                    model, tokenizer, conversation, gen_kwargs, prefix_key, prefix
                 )
-            
-            # Decode response
-            response_text = tokenizer.decode(outputs[0], skip_special_tokens=True)
-            
-            # Extract only the assistant's response
-            if "<|assistant|>" in response_text:
-                response_text = response_text.split("<|assistant|>")[-1].strip()
             
             # Clean up response - remove common generation artifacts
             response_text = self._clean_response(response_text)
@@ -246,7 +874,8 @@ REQUIREMENTS FOR YOUR RESPONSE:
                 'message': response_text,
                 'suggestions': suggestions,
                 'resources': resources,
-                'model_used': 'TinyLlama-1.1B'
+                'model_used': 'TinyLlama-1.1B',
+                'generation': budget
             }
             
         except Exception as e:
@@ -257,6 +886,164 @@ REQUIREMENTS FOR YOUR RESPONSE:
                 'resources': self._recommend_resources(user_message, context),
                 'model_used': 'fallback'
             }
+        finally:
+            self.policy.end()
+    
+    def stream_response(self, user_message: str, context: Dict, personality: str = 'encouraging') -> Iterator[Dict]:
+        """Stream the tutor response as it is generated
+        
+        Yields ``{'event': 'token', 'text': ...}`` chunks followed by a final
+        ``{'event': 'done', ...}`` event carrying the cleaned message,
+        suggestions and resources (the same fields as generate_response).
+        """
+        cancelled = threading.Event()
+        chunks = []
+        
+        try:
+            load = self.policy.begin()
+            model, tokenizer = self.model_loader.load_chat_model()
+            
+            prefix_key, prefix = self._build_prefix(context, personality)
+            conversation = prefix + self._format_user_turn(user_message)
+            budget = self.policy.chat_budget(user_message, context.get('skill_level', 'beginner'), load)
+            gen_kwargs = self._generation_kwargs(tokenizer, budget)
+            
+            speculative = self.model_loader.speculative_kwargs()
+            gen_kwargs.update(speculative)
+            inputs = self.prefix_cache.prepare_inputs(
+                model, tokenizer, prefix_key, prefix, conversation, reuse_prefix=not speculative
+            )
+            
+            streamer = TextIteratorStreamer(
+                tokenizer,
+                skip_prompt=True,
+                skip_special_tokens=True,
+                timeout=ModelConfig.CHAT_STREAM_TOKEN_TIMEOUT
+            )
+            errors = []
+            worker = threading.Thread(
+                target=self._generate_streaming,
+                args=(model, inputs, gen_kwargs, streamer, cancelled, errors),
+                daemon=True
+            )
+            worker.start()
+            
+            for text in streamer:
+                if text:
+                    chunks.append(text)
+                    yield {'event': 'token', 'text': text}
+            
+            worker.join()
+            if errors:
+                raise errors[0]
+            
+            response_text = self._clean_response(''.join(chunks))
+            yield {
+                'event': 'done',
+                'message': response_text,
+                'suggestions': self._extract_suggestions(response_text),
+                'resources': self._recommend_resources(user_message, context),
+                'model_used': 'TinyLlama-1.1B',
+                'generation': budget
+            }
+            
+        except Exception as e:
+            logger.error(f"Custom AI tutor streaming error: {e}")
+            yield {
+                'event': 'done',
+                'message': "I apologize, but I'm having trouble processing your request right now. Let me try to help you with what I understand from your question.",
+                'suggestions': self._extract_suggestions(user_message),
+                'resources': self._recommend_resources(user_message, context),
+                'model_used': 'fallback'
+            }
+        finally:
+            # Client disconnected or stream finished - stop any remaining decoding
+            cancelled.set()
+            self.policy.end()
+    
+    def _generate_streaming(self, model, inputs, gen_kwargs: Dict, streamer, cancelled: threading.Event, errors: List):
+        """Run generate in a background thread, feeding the streamer"""
+        try:
+            with torch.no_grad():
+                model.generate(
+                    **inputs,
+                    **gen_kwargs,
+                    streamer=streamer,
+                    stopping_criteria=StoppingCriteriaList([_CancelGeneration(cancelled)])
+                )
+        except Exception as e:
+            errors.append(e)
+            # Unblock the consumer waiting on the streamer
+            streamer.end()
+    
+    def _build_prefix(self, context: Dict, personality: str) -> Tuple[Tuple, str]:
+        """Format the fixed part of the TinyLlama chat prompt, up to the user's message
+        
+        Returns the prefix cache key along with the prefix text.
+        """
+        if personality not in self.personality_prompts:
+            personality = 'encouraging'
+        system_prompt = self.personality_prompts[personality]
+        
+        skill_level = context.get('skill_level', 'beginner')
+        topic = context.get('current_topic', 'general programming')
+        
+        return (personality, skill_level, topic), f"""<|system|>
+{system_prompt}
+
+CONTEXT:
+- Student level: {skill_level}
+- Topic: {topic}
+
+REQUIREMENTS FOR YOUR RESPONSE:
+1. Provide CORRECT, working code with no syntax errors
+2. Use proper variable naming (lowercase with underscores)
+3. Include complete, executable examples
+4. Check your code before responding
+5. Be clear and concise
+6. Verify any code snippets are valid
+
+</s>
+<|user|>
+"""
+    
+    def _format_user_turn(self, user_message: str) -> str:
+        """Format the student's message and open the assistant turn"""
+        return f"""{user_message}</s>
+<|assistant|>
+"""
+    
+    def _generation_kwargs(self, tokenizer, budget: Dict) -> Dict:
+        """Sampling parameters tuned for tutor response quality, within the request's budget"""
+        kwargs = {
+            'max_new_tokens': budget['max_new_tokens'],
+            'max_time': budget['max_time'],
+            'do_sample': budget['do_sample'],
+            'pad_token_id': tokenizer.eos_token_id,
+            'repetition_penalty': 1.2  # Avoid repetition
+        }
+        if budget['do_sample']:
+            kwargs.update({
+                'temperature': 0.5,  # Lower temperature for more consistent responses
+                'top_p': 0.85,  # Slightly lower for better quality
+                'top_k': 40  # Filter out low probability tokens
+            })
+        return kwargs
+    
+    def _generate_single(self, model, tokenizer, conversation: str, gen_kwargs: Dict,
+                         prefix_key: Tuple, prefix: str) -> str:
+        """Generate a completion for one prompt without batching"""
+        speculative = self.model_loader.speculative_kwargs()
+        inputs = self.prefix_cache.prepare_inputs(
+            model, tokenizer, prefix_key, prefix, conversation, reuse_prefix=not speculative
+        )
+        
+        with torch.no_grad():
+            outputs = model.generate(**inputs, **gen_kwargs, **speculative)
+        
+        # Decode only the assistant's continuation, not the echoed prompt
+        prompt_length = inputs['input_ids'].shape[1]
+        return tokenizer.decode(outputs[0][prompt_length:], skip_special_tokens=True)
     
     def _extract_suggestions(self, response_text: str) -> List[str]:
         """Extract actionable suggestions from AI response"""
@@ -349,20 +1136,34 @@ REQUIREMENTS FOR YOUR RESPONSE:
 class CustomCodeAnalyzer:
     """Enhanced code analyzer using local models"""
     
+    # Bump when the prompt or generation settings change so cached analyses are not reused
+    ANALYSIS_VERSION = '1'
+    
     def __init__(self):
         self.model_loader = ModelLoader()
+        self.cache = get_analysis_cache()
+        self.policy = get_generation_policy()
     
     def analyze_with_ai(self, code: str, language: str) -> Dict:
-        """Use local model to analyze code and provide suggestions"""
+        """Use local model to analyze code and provide suggestions (cached by code hash)"""
+        version = self.cache_version()
+        cached = self.cache.get('ai', version, code, language)
+        if cached is not None:
+            return cached
+        
+        result = self._generate_analysis(code, language)
+        self._store(version, code, language, result)
+        return result
+    
+    def _generate_analysis(self, code: str, language: str) -> Dict:
+        """One uncached CodeT5 generation"""
         try:
+            budget = self.policy.code_budget(self.policy.begin())
             model, tokenizer = self.model_loader.load_code_model()
             
-            # Create analysis prompt
-            prompt = f"Analyze this {language} code and provide suggestions for improvement:\n\n{code}\n\nSuggestions:"
-            
             # Tokenize
             inputs = tokenizer(
-                prompt,
+                self._build_prompt(code, language),
                 return_tensors="pt",
                 truncation=True,
                 max_length=512
@@ -370,34 +1171,131 @@ class CustomCodeAnalyzer:
             
             # Generate analysis
             with torch.no_grad():
-                outputs = model.generate(
-                    **inputs,
-                    max_length=256,
-                    temperature=0.7,
-                    num_beams=4,
-                    early_stopping=True
-                )
-            
-            analysis = tokenizer.decode(outputs[0], skip_special_tokens=True)
+                outputs = model.generate(**inputs, **self._generation_kwargs(budget))
             
-            return {
-                'ai_analysis': analysis,
-                'confidence': 0.85,
-                'model_used': 'CodeT5-small'
-            }
+            return self._result(tokenizer.decode(outputs[0], skip_special_tokens=True), budget)
             
         except Exception as e:
             logger.error(f"AI code analysis error: {e}")
-            return {
-                'ai_analysis': 'Unable to perform AI analysis at this time.',
-                'confidence': 0.0,
-                'model_used': 'none'
-            }
+            return self._unavailable()
+        finally:
+            self.policy.end()
+    
+    def analyze_batch_with_ai(self, items: List[Tuple[str, str]], batch_size: int = None) -> Iterator[List[Dict]]:
+        """Analyze (code, language) pairs, yielding consecutive runs of results in item order
+        
+        Cached items are answered without the model; the rest go through
+        CodeT5 in padded batches. Each yield continues where the last one
+        stopped, as soon as the items before it are done.
+        """
+        batch_size = max(1, batch_size or ModelConfig.CODE_BATCH_SIZE)
+        version = self.cache_version()
+        results = [self.cache.get('ai', version, code, language) for code, language in items]
+        pending = [i for i, result in enumerate(results) if result is None]
+        emitted = 0
+        
+        for start in range(0, len(pending), batch_size):
+            chunk = pending[start:start + batch_size]
+            for i, result in zip(chunk, self._generate_chunk([items[i] for i in chunk])):
+                results[i] = result
+                self._store(version, items[i][0], items[i][1], result)
+            
+            ready = emitted
+            while ready < len(results) and results[ready] is not None:
+                ready += 1
+            if ready > emitted:
+                yield results[emitted:ready]
+                emitted = ready
+        
+        if emitted < len(results):
+            yield results[emitted:]
+    
+    def _generate_chunk(self, chunk: List[Tuple[str, str]]) -> List[Dict]:
+        """One padded CodeT5 generation over a chunk of (code, language) pairs"""
+        try:
+            budget = self.policy.code_budget(self.policy.begin())
+            model, tokenizer = self.model_loader.load_code_model()
+            
+            # Encoder-decoder: right padding is masked out by the attention mask
+            inputs = tokenizer(
+                [self._build_prompt(code, language) for code, language in chunk],
+                return_tensors="pt",
+                padding=True,
+                truncation=True,
+                max_length=512
+            ).to(model.device)
+            
+            with torch.no_grad():
+                outputs = model.generate(**inputs, **self._generation_kwargs(budget))
+            
+            return [self._result(text, budget) for text in tokenizer.batch_decode(outputs, skip_special_tokens=True)]
+            
+        except Exception as e:
+            logger.error(f"AI batch code analysis error: {e}")
+            return [self._unavailable() for _ in chunk]
+        finally:
+            self.policy.end()
+    
+    def _store(self, version: str, code: str, language: str, result: Dict):
+        """Cache a cacheable result without its generation metadata, which describes the load when it ran"""
+        if self.is_cacheable(result):
+            self.cache.set('ai', version, code, language, {k: v for k, v in result.items() if k != 'generation'})
+    
+    @classmethod
+    def cache_version(cls) -> str:
+        """Identifies the model and prompt behind a cached analysis"""
+        return f"{ModelConfig.CODE_MODEL}:{cls.ANALYSIS_VERSION}"
+    
+    @staticmethod
+    def is_cacheable(result: Dict) -> bool:
+        """Fallback results and analyses degraded by load are regenerated next time, not cached"""
+        return result.get('model_used') not in (None, 'none') and not result.get('generation', {}).get('degraded')
+    
+    @staticmethod
+    def _build_prompt(code: str, language: str) -> str:
+        return f"Analyze this {language} code and provide suggestions for improvement:\n\n{code}\n\nSuggestions:"
+    
+    @staticmethod
+    def _generation_kwargs(budget: Dict) -> Dict:
+        # Beam search is deterministic, so no sampling temperature
+        kwargs = {
+            'max_length': budget['max_length'],
+            'num_beams': budget['num_beams']
+        }
+        if budget['num_beams'] > 1:
+            kwargs['early_stopping'] = True
+        return kwargs
+    
+    @staticmethod
+    def _result(analysis: str, budget: Dict) -> Dict:
+        return {
+            'ai_analysis': analysis,
+            'confidence': 0.85,
+            'model_used': 'CodeT5-small',
+            'generation': budget
+        }
+    
+    @staticmethod
+    def _unavailable() -> Dict:
+        return {
+            'ai_analysis': 'Unable to perform AI analysis at this time.',
+            'confidence': 0.0,
+            'model_used': 'none'
+        }
 
 
 # Global instances
 _custom_tutor = None
 _custom_analyzer = None
+_generation_policy = None
+
+
+def get_generation_policy() -> GenerationPolicy:
+    """Policy shared by the tutor and the code analyzer, so both see the same load"""
+    global _generation_policy
+    if _generation_policy is None:
+        _generation_policy = GenerationPolicy()
+    return _generation_policy
 
 
 def get_custom_tutor() -> CustomAITutor:
@@ -0,0 +1,220 @@
+"""
+Sandbox Worker Process
+Long-lived interpreter that runs submitted Python code against test inputs.
+Started by assessment.SandboxPool; not meant to be run by hand.
+
+Works as a fork server: the warm interpreter never runs submitted code
+itself. Each submission runs in a freshly forked child that is thrown away
+afterwards, so nothing one submission changes (modules, threads, the worker's
+own functions) can reach the next.
+
+Usage: python -I sandbox_worker.py <memory_limit_mb>
+
+limit_resources() and confine() are also used by variant_bench_worker.py, so
+submissions and evolved variants run under the same restrictions.
+
+Protocol (one JSON object per line):
+  startup  -> {"ready": true}
+  request  <- {"code": str, "inputs": [str, ...]}
+  response -> {"output": str, "error": str|null, "execution_time": float, "exit_code": int}
+              one line per input, in order
+"""
+
+import io
+import os
+import sys
+import json
+import time
+import signal
+import builtins
+import resource
+import traceback
+
+
+def _open_protocol_channel():
+    """Keep private copies of the pipes and point fds 0/1 at /dev/null
+
+    Submitted code writing straight to file descriptor 1 (os.write, a C
+    extension, a child process) can then never corrupt the protocol stream.
+    """
+    channel_in = os.fdopen(os.dup(0), 'r', encoding='utf-8')
+    channel_out = os.fdopen(os.dup(1), 'w', encoding='utf-8')
+    devnull = os.open(os.devnull, os.O_RDWR)
+    os.dup2(devnull, 0)
+    os.dup2(devnull, 1)
+    os.close(devnull)
+    return channel_in, channel_out
+
+
+def limit_resources(memory_mb: int, cpu_seconds: int = None, file_mb: int = 1):
+    """Cap address space, CPU time (when given) and the size of any file written"""
+    memory = memory_mb * 1024 * 1024
+    resource.setrlimit(resource.RLIMIT_AS, (memory, memory))
+    resource.setrlimit(resource.RLIMIT_FSIZE, (file_mb * 1024 * 1024, file_mb * 1024 * 1024))
+    if cpu_seconds is not None:
+        resource.setrlimit(resource.RLIMIT_CPU, (cpu_seconds, cpu_seconds))
+
+
+_WRITE_FLAGS = os.O_WRONLY | os.O_RDWR | os.O_CREAT | os.O_TRUNC | os.O_APPEND
+
+# Audit events that change the file system; every path argument must be writable
+_PATH_EVENTS = {
+    'os.remove': 1, 'os.rmdir': 1, 'os.mkdir': 1, 'os.chmod': 1, 'os.chown': 1, 'os.truncate': 1,
+    'os.utime': 1, 'os.rename': 2, 'os.link': 2, 'os.symlink': 2, 'shutil.rmtree': 1
+}
+_NETWORK_EVENTS = {'socket.connect', 'socket.sendto', 'socket.sendmsg', 'socket.bind', 'socket.getaddrinfo'}
+_PROCESS_EVENTS = {'subprocess.Popen', 'os.system', 'os.exec', 'os.posix_spawn', 'os.spawn', 'pty.spawn'}
+
+
+def confine(writable_dirs):
+    """Refuse file writes outside writable_dirs, network access and new programs
+
+    This is an audit hook (PEP 578), which Python code cannot remove. It is
+    hardening, not isolation: native code (ctypes, C extensions) is not
+    audited, and reading files is still allowed. Forked children inherit it.
+    """
+    roots = tuple(os.path.realpath(d) for d in writable_dirs)
+
+    def writable(path) -> bool:
+        if isinstance(path, int):
+            return True  # A descriptor opened before, or under, the hook
+        path = os.path.realpath(os.fsdecode(path))
+        return path == os.devnull or any(path == root or path.startswith(root + os.sep) for root in roots)
+
+    def hook(event, args):
+        if event == 'open':
+            path, _, flags = args
+            if path is not None and flags & _WRITE_FLAGS and not writable(path):
+                raise PermissionError(f"Writing {path} is not allowed here")
+        elif event in _PATH_EVENTS:
+            for path in args[:_PATH_EVENTS[event]]:
+                if not writable(path):
+                    raise PermissionError(f"Changing {path} is not allowed here")
+        elif event in _NETWORK_EVENTS:
+            raise PermissionError("Network access is not allowed here")
+        elif event in _PROCESS_EVENTS:
+            raise PermissionError("Starting programs is not allowed here")
+
+    sys.addaudithook(hook)
+
+
+def _run_case(compiled, test_input: str) -> dict:
+    """Execute the compiled submission as __main__ with the given stdin"""
+    stdout, stderr = io.StringIO(), io.StringIO()
+    sys.stdin, sys.stdout, sys.stderr = io.StringIO(test_input), stdout, stderr
+    exit_code = 0
+    start_time = time.time()
+    try:
+        exec(compiled, {'__name__': '__main__', '__builtins__': builtins})
+    except SystemExit as e:
+        if e.code is None or isinstance(e.code, int):
+            exit_code = e.code or 0
+        else:
+            stderr.write(f"{e.code}\n")
+            exit_code = 1
+    except BaseException as e:
+        # Skip this function's frame so the traceback starts at the submission
+        stderr.write(''.join(traceback.format_exception(type(e), e, e.__traceback__.tb_next)))
+        exit_code = 1
+    finally:
+        execution_time = time.time() - start_time
+        sys.stdin, sys.stdout, sys.stderr = sys.__stdin__, sys.__stdout__, sys.__stderr__
+
+    return {
+        'output': stdout.getvalue().strip(),
+        'error': stderr.getvalue().strip() if exit_code != 0 else None,
+        'execution_time': execution_time,
+        'exit_code': exit_code
+    }
+
+
+def _crash_result(status: int) -> dict:
+    return {
+        'output': '',
+        'error': 'Sandbox process exited unexpectedly',
+        'execution_time': 0,
+        'exit_code': os.waitstatus_to_exitcode(status)
+    }
+
+
+def _compile_error_result(error: Exception) -> dict:
+    return {
+        'output': '',
+        'error': ''.join(traceback.format_exception_only(type(error), error)).strip(),
+        'execution_time': 0,
+        'exit_code': 1
+    }
+
+
+def _run_child(compiled, failure, inputs, write_fd: int, channels):
+    """Forked child: run the cases, one result line each, then exit without returning"""
+    try:
+        for channel in channels:
+            os.close(channel.fileno())
+        with os.fdopen(write_fd, 'w', encoding='utf-8') as results:
+            for test_input in inputs:
+                result = _run_case(compiled, test_input) if compiled is not None else failure
+                results.write(json.dumps(result) + '\n')
+                results.flush()
+    finally:
+        os._exit(0)
+
+
+def _run_submission(compiled, failure, inputs, channel_in, channel_out):
+    """Relay one result line per input from forked children, in order
+
+    If a child dies mid-case (os._exit, memory limit, signal) that case gets
+    a crash result and the remaining cases continue in a new child.
+    """
+    pending = list(inputs)
+    while pending:
+        read_fd, write_fd = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            os.close(read_fd)
+            _run_child(compiled, failure, pending, write_fd, (channel_in, channel_out))
+        os.close(write_fd)
+
+        with os.fdopen(read_fd, 'r', encoding='utf-8') as results:
+            for line in results:
+                try:
+                    json.loads(line)
+                except ValueError:
+                    # Submitted code wrote into the result pipe
+                    os.kill(pid, signal.SIGKILL)
+                    break
+                channel_out.write(line)
+                channel_out.flush()
+                pending.pop(0)
+                if not pending:
+                    break
+
+        _, status = os.waitpid(pid, 0)
+        if pending:
+            channel_out.write(json.dumps(_crash_result(status)) + '\n')
+            channel_out.flush()
+            pending.pop(0)
+
+
+def main():
+    if len(sys.argv) > 1:
+        limit_resources(int(sys.argv[1]))
+    channel_in, channel_out = _open_protocol_channel()
+    confine([os.getcwd()])
+    channel_out.write(json.dumps({'ready': True}) + '\n')
+    channel_out.flush()
+
+    for line in channel_in:
+        request = json.loads(line)
+
+        compiled, failure = None, None
+        try:
+            compiled = compile(request['code'], '<submission>', 'exec')
+        except (SyntaxError, ValueError) as e:
+            failure = _compile_error_result(e)
+
+        _run_submission(compiled, failure, request['inputs'], channel_in, channel_out)
+
+
+if __name__ == '__main__':
+    main()
@@ -5,11 +5,28 @@ Supports both GCP Vertex AI (with credits) and local Ollama (post-credits)
 """
 
 import os
+import sys
+import ast
 import json
+import time
+import bisect
+import fcntl
+import heapq
 import logging
+import tempfile
+import threading
+import functools
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from datetime import datetime
-from typing import Dict, List, Optional
+from typing import Dict, Iterator, List, Optional, Tuple
 import hashlib
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from sandbox_worker import limit_resources
 
 logger = logging.getLogger(__name__)
 
@@ -26,69 +43,362 @@ class SelfEvolutionConfig:
     # Local Ollama settings (for eternal self-replication post-credits)
     OLLAMA_BASE_URL = os.getenv('OLLAMA_BASE_URL', 'http://localhost:11434')
     OLLAMA_MODEL = os.getenv('OLLAMA_MODEL', 'llama2')
+    OLLAMA_MAX_CONCURRENCY = int(os.getenv('OLLAMA_MAX_CONCURRENCY', '4'))  # Generations in flight per process
+    OLLAMA_CONNECT_TIMEOUT = float(os.getenv('OLLAMA_CONNECT_TIMEOUT', '5'))
+    OLLAMA_READ_TIMEOUT = float(os.getenv('OLLAMA_READ_TIMEOUT', '120'))  # Longest wait for the next streamed chunk
+    OLLAMA_GENERATION_MAX_SECONDS = float(os.getenv('OLLAMA_GENERATION_MAX_SECONDS', '900'))
+    OLLAMA_RETRIES = int(os.getenv('OLLAMA_RETRIES', '3'))  # Connection errors and 429/502/503/504 answers
+    OLLAMA_RETRY_BACKOFF = float(os.getenv('OLLAMA_RETRY_BACKOFF', '0.5'))
     
     # Evolution settings
-    EVOLUTION_HISTORY_FILE = '/tmp/evolution_history.json'
+    EVOLUTION_HISTORY_FILE = os.getenv('EVOLUTION_HISTORY_FILE', '/tmp/evolution_history.jsonl')  # JSON lines
+    EVOLUTION_HISTORY_KEEP_FULL = int(os.getenv('EVOLUTION_HISTORY_KEEP_FULL', '1000'))  # Recent entries compaction leaves intact
+    EVOLUTION_HISTORY_COMPACT_BYTES = int(os.getenv('EVOLUTION_HISTORY_COMPACT_BYTES', str(256 * 1024 * 1024)))
+    EVOLUTION_TOP_K = int(os.getenv('EVOLUTION_TOP_K', '10'))  # Ranked entries kept in the index per metric
     MAX_EVOLUTION_ITERATIONS = int(os.getenv('MAX_EVOLUTION_ITERATIONS', '100'))
     EVOLUTION_INTERVAL_HOURS = int(os.getenv('EVOLUTION_INTERVAL_HOURS', '24'))
     
+    # Population mode: candidates generated and tested per cycle, best one kept
+    EVOLUTION_POPULATION_SIZE = int(os.getenv('EVOLUTION_POPULATION_SIZE', '1'))
+    EVOLUTION_GENERATION_CONCURRENCY = int(os.getenv('EVOLUTION_GENERATION_CONCURRENCY', '4'))  # Requests in flight
+    # Candidate benchmarks run at once; above 1 they share CPUs and their latencies get noisier
+    EVOLUTION_TEST_WORKERS = int(os.getenv('EVOLUTION_TEST_WORKERS', '1'))
+    
+    # Variant benchmarking: recorded API requests replayed against each variant and the current service
+    EVOLUTION_BENCHMARK_ENABLED = os.getenv('EVOLUTION_BENCHMARK_ENABLED', 'true').lower() == 'true'
+    EVOLUTION_BASELINE_MODULE = os.getenv(
+        'EVOLUTION_BASELINE_MODULE', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'main.py')
+    )
+    EVOLUTION_REPLAY_FILE = os.getenv(
+        'EVOLUTION_REPLAY_FILE', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'evolution_replay.json')
+    )
+    EVOLUTION_BENCH_ROUNDS = int(os.getenv('EVOLUTION_BENCH_ROUNDS', '5'))  # Measured passes over the replay set
+    EVOLUTION_BENCH_WARMUP_ROUNDS = int(os.getenv('EVOLUTION_BENCH_WARMUP_ROUNDS', '1'))  # Unmeasured (model loading, caches)
+    EVOLUTION_BENCH_TIMEOUT = int(os.getenv('EVOLUTION_BENCH_TIMEOUT', '900'))
+    # Address space cap; torch reserves several GB of virtual memory before a model is loaded
+    EVOLUTION_BENCH_MEMORY_MB = int(os.getenv('EVOLUTION_BENCH_MEMORY_MB', '12288'))
+    EVOLUTION_BENCH_CPU_SECONDS = int(os.getenv('EVOLUTION_BENCH_CPU_SECONDS', '1800'))
+    EVOLUTION_BASELINE_TTL = int(os.getenv('EVOLUTION_BASELINE_TTL', '3600'))
+    # Deploy only if p95 latency / throughput / peak RSS are no worse than the baseline by more than this
+    EVOLUTION_MAX_LATENCY_REGRESSION = float(os.getenv('EVOLUTION_MAX_LATENCY_REGRESSION', '0.05'))
+    EVOLUTION_MAX_RSS_REGRESSION = float(os.getenv('EVOLUTION_MAX_RSS_REGRESSION', '0.10'))
+    
     # GCP credits tracking
     GCP_CREDITS_REMAINING = float(os.getenv('GCP_CREDITS_REMAINING', '1000.0'))
     GCP_CREDITS_THRESHOLD = float(os.getenv('GCP_CREDITS_THRESHOLD', '100.0'))
 
 
 class EvolutionHistory:
-    """Track evolution history and variants"""
+    """Track evolution history and variants
+    
+    Entries are appended as JSON lines, so adding a cycle never rewrites
+    earlier ones. A sidecar index keeps the count, the latest entry, the
+    top-k entries per metric and the deployed variants as byte offsets into
+    the log, so status and ranking reads seek to a few lines instead of
+    parsing the history. The index records
+    the log size it covers; if the log has grown past it (another worker
+    appended, or a crash between the two writes) only the new tail is read.
+    """
+    
+    # Variant code and the full analysis dominate entry size and are only
+    # needed for recent cycles and the current best variants
+    BULKY_FIELDS = ('variant', 'analysis')
     
-    def __init__(self, history_file: str = SelfEvolutionConfig.EVOLUTION_HISTORY_FILE):
-        self.history_file = history_file
+    # Metrics ranked ascending; every other metric ranks higher values first
+    LOWER_IS_BETTER = ('tests_failed', 'p95_ms', 'peak_rss_mb')
+    
+    # Bump when the index layout changes so older index files are rebuilt
+    INDEX_VERSION = 2
+    
+    def __init__(self, history_file: str = None):
+        self.history_file = history_file or SelfEvolutionConfig.EVOLUTION_HISTORY_FILE
+        self.index_file = self.history_file + '.index'
+        self._lock = threading.Lock()
+        self._index = None
         self._ensure_history_file()
     
     def _ensure_history_file(self):
-        """Ensure history file exists"""
-        if not os.path.exists(self.history_file):
-            os.makedirs(os.path.dirname(self.history_file), exist_ok=True)
-            self._save_history([])
+        """Ensure history file exists, importing a legacy JSON array (same name, .json) on first run"""
+        if os.path.exists(self.history_file):
+            return
+        os.makedirs(os.path.dirname(self.history_file) or '.', exist_ok=True)
+        
+        with self._file_lock():
+            if os.path.exists(self.history_file):
+                return
+            legacy = self.history_file[:-1] if self.history_file.endswith('.jsonl') else None
+            entries = []
+            if legacy and os.path.exists(legacy):
+                try:
+                    with open(legacy, 'r') as f:
+                        entries = json.load(f)
+                    logger.info(f"Importing {len(entries)} evolutions from {legacy}")
+                except Exception as e:
+                    logger.error(f"Failed to import legacy history {legacy}: {e}")
+            self._rewrite(entries)
+    
+    def iter_history(self) -> Iterator[Dict]:
+        """Stream entries oldest first without loading the whole log"""
+        for _, entry in self._scan(0):
+            yield entry
     
     def load_history(self) -> List[Dict]:
         """Load evolution history"""
-        try:
-            with open(self.history_file, 'r') as f:
-                return json.load(f)
-        except Exception as e:
-            logger.error(f"Failed to load history: {e}")
-            return []
-    
-    def _save_history(self, history: List[Dict]):
-        """Save evolution history"""
-        try:
-            with open(self.history_file, 'w') as f:
-                json.dump(history, f, indent=2)
-        except Exception as e:
-            logger.error(f"Failed to save history: {e}")
+        return list(self.iter_history())
     
     def add_evolution(self, evolution_data: Dict):
         """Add new evolution entry"""
-        history = self.load_history()
         evolution_data['timestamp'] = datetime.now().isoformat()
         evolution_data['id'] = hashlib.md5(
             f"{evolution_data['timestamp']}{evolution_data.get('variant_name', '')}".encode()
         ).hexdigest()[:8]
-        history.append(evolution_data)
-        self._save_history(history)
+        line = (json.dumps(evolution_data, default=str) + '\n').encode()
+        
+        with self._lock, self._file_lock():
+            index = self._current_index()
+            with open(self.history_file, 'ab') as f:
+                offset = f.tell()
+                if offset and not self._ends_with_newline():
+                    # Terminate a line torn by a crashed writer so this entry stays readable
+                    f.write(b'\n')
+                    offset += 1
+                f.write(line)
+            self._index_entry(index, offset, evolution_data)
+            index['size'] = offset + len(line)
+            self._save_index(index)
+            
+            if index['size'] > SelfEvolutionConfig.EVOLUTION_HISTORY_COMPACT_BYTES:
+                self._compact()
+        
         return evolution_data['id']
     
+    def count(self) -> int:
+        with self._lock:
+            return self._current_index()['count']
+    
     def get_latest_evolution(self) -> Optional[Dict]:
         """Get most recent evolution"""
-        history = self.load_history()
-        return history[-1] if history else None
+        with self._lock:
+            offset = self._current_index()['latest']
+        return self._read_at(offset)
     
     def get_best_variant(self, metric: str = 'performance_score') -> Optional[Dict]:
         """Get best performing variant based on metric"""
-        history = self.load_history()
-        if not history:
+        with self._lock:
+            index = self._current_index()
+            top = index['top'].get(metric)
+            # A metric no entry reports scores 0 everywhere, so the first entry wins
+            offset = top[0][1] if top else index['first']
+        return self._read_at(offset)
+    
+    def top_variants(self, metric: str = 'performance_score', k: int = 5, lineage: bool = False) -> List[Dict]:
+        """The k best entries by a metric, best first, optionally with their ancestors
+        
+        Served from the index for k up to EVOLUTION_TOP_K; larger k scans the log.
+        """
+        with self._lock:
+            index = self._current_index()
+            top = index['top'].get(metric, [])
+            deployed = dict(index['deployed'])
+        
+        if k <= SelfEvolutionConfig.EVOLUTION_TOP_K or len(top) < SelfEvolutionConfig.EVOLUTION_TOP_K:
+            entries = [self._read_at(offset) for _, offset, _ in top[:k]]
+        else:
+            ranked = heapq.nsmallest(k, (
+                (self._rank_key(metric, entry['metrics'][metric]), offset, entry)
+                for offset, entry in self._scan(0)
+                if isinstance((entry.get('metrics') or {}).get(metric), (int, float))
+            ), key=lambda item: item[:2])
+            entries = [entry for _, _, entry in ranked]
+        
+        entries = [entry for entry in entries if entry is not None]
+        if lineage:
+            for entry in entries:
+                entry['lineage'] = self._lineage(entry, deployed)
+        return entries
+    
+    def get_lineage(self, entry_id: str) -> List[Dict]:
+        """Ancestors of a deployed or top-ranked variant, nearest first"""
+        with self._lock:
+            index = self._current_index()
+            deployed = dict(index['deployed'])
+            offsets = {row[2]: row[1] for top in index['top'].values() for row in top}
+        offset = deployed.get(entry_id, offsets.get(entry_id))
+        entry = self._read_at(offset) if offset is not None else None
+        return self._lineage(entry, deployed) if entry else []
+    
+    def latest_deployed_id(self) -> Optional[str]:
+        """Id of the most recently deployed variant - the parent of the next one"""
+        with self._lock:
+            return self._current_index()['latest_deployed_id']
+    
+    def compact(self):
+        """Rewrite the log with the bulky payload stripped from older entries"""
+        with self._lock, self._file_lock():
+            self._compact()
+    
+    def _compact(self):
+        index = self._current_index()
+        keep = {row[1] for top in index['top'].values() for row in top} | set(index['deployed'].values())
+        keep_from = max(0, index['count'] - SelfEvolutionConfig.EVOLUTION_HISTORY_KEEP_FULL)
+        
+        def entries():
+            for position, (offset, entry) in enumerate(self._scan(0)):
+                if position < keep_from and offset not in keep:
+                    entry = {k: v for k, v in entry.items() if k not in self.BULKY_FIELDS}
+                    entry['compacted'] = True
+                yield entry
+        
+        self._rewrite(entries())
+        logger.info(f"Compacted evolution history: {index['size']} -> {self._index['size']} bytes")
+    
+    def _rewrite(self, entries):
+        """Replace the log and index atomically with the given entries"""
+        index = self._empty_index()
+        tmp_file = f"{self.history_file}.tmp{os.getpid()}"
+        with open(tmp_file, 'wb') as f:
+            for entry in entries:
+                offset = f.tell()
+                f.write((json.dumps(entry, default=str) + '\n').encode())
+                self._index_entry(index, offset, entry)
+            index['size'] = f.tell()
+        os.replace(tmp_file, self.history_file)
+        self._save_index(index)
+    
+    def _current_index(self) -> Dict:
+        """The index, caught up with whatever the log holds now (caller holds self._lock)"""
+        size = os.path.getsize(self.history_file) if os.path.exists(self.history_file) else 0
+        if self._index is None or self._index['size'] != size:
+            self._index = self._load_index()
+        index = self._index
+        
+        if index is None or index['size'] > size:
+            # Missing, unreadable or newer than a replaced log - rebuild from scratch
+            index = self._empty_index()
+        if index['size'] < size:
+            for offset, entry in self._scan(index['size']):
+                self._index_entry(index, offset, entry)
+            index['size'] = size
+        self._index = index
+        return index
+    
+    @classmethod
+    def _empty_index(cls) -> Dict:
+        return {
+            'version': cls.INDEX_VERSION,
+            'count': 0,
+            'size': 0,
+            'first': None,
+            'latest': None,
+            'latest_id': None,
+            'latest_deployed_id': None,
+            # metric -> up to EVOLUTION_TOP_K [rank key, offset, id] rows, best first
+            'top': {},
+            # id -> offset of every deployed variant, for lineage walks
+            'deployed': {}
+        }
+    
+    @classmethod
+    def _index_entry(cls, index: Dict, offset: int, entry: Dict):
+        """Fold one appended entry into the index"""
+        if index['count'] == 0:
+            index['first'] = offset
+        index['count'] += 1
+        index['latest'] = offset
+        index['latest_id'] = entry.get('id')
+        if entry.get('deployed') and entry.get('id'):
+            index['deployed'][entry['id']] = offset
+            index['latest_deployed_id'] = entry['id']
+        
+        for metric, value in (entry.get('metrics') or {}).items():
+            if not isinstance(value, (int, float)) or isinstance(value, bool):
+                continue
+            top = index['top'].setdefault(metric, [])
+            # Offsets grow through the log, so ties keep the earlier entry first
+            row = [cls._rank_key(metric, value), offset, entry.get('id')]
+            if len(top) < SelfEvolutionConfig.EVOLUTION_TOP_K or row[:2] < top[-1][:2]:
+                bisect.insort(top, row)
+                del top[SelfEvolutionConfig.EVOLUTION_TOP_K:]
+    
+    @classmethod
+    def _rank_key(cls, metric: str, value: float) -> float:
+        """Sort key that puts the best value first"""
+        return value if metric in cls.LOWER_IS_BETTER else -value
+    
+    def _lineage(self, entry: Dict, deployed: Dict[str, int]) -> List[Dict]:
+        """Walk parent_id links through deployed variants"""
+        lineage = []
+        seen = {entry.get('id')}
+        parent_id = entry.get('parent_id')
+        while parent_id and parent_id not in seen and parent_id in deployed:
+            seen.add(parent_id)
+            parent = self._read_at(deployed[parent_id])
+            if parent is None:
+                break
+            lineage.append({
+                'id': parent_id,
+                'variant_name': parent.get('variant_name'),
+                'timestamp': parent.get('timestamp'),
+                'metrics': parent.get('metrics', {})
+            })
+            parent_id = parent.get('parent_id')
+        return lineage
+    
+    def _load_index(self) -> Optional[Dict]:
+        try:
+            with open(self.index_file, 'r') as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return index if index.get('version') == self.INDEX_VERSION else None
+    
+    def _save_index(self, index: Dict):
+        self._index = index
+        try:
+            tmp_file = f"{self.index_file}.tmp{os.getpid()}"
+            with open(tmp_file, 'w') as f:
+                json.dump(index, f)
+            os.replace(tmp_file, self.index_file)
+        except Exception as e:
+            logger.error(f"Failed to save history index: {e}")
+    
+    def _scan(self, start: int) -> Iterator[Tuple[int, Dict]]:
+        """(offset, entry) for each complete line from a byte offset on"""
+        try:
+            with open(self.history_file, 'rb') as f:
+                f.seek(start)
+                offset = start
+                for line in f:
+                    if line.endswith(b'\n'):
+                        try:
+                            yield offset, json.loads(line)
+                        except ValueError:
+                            logger.warning(f"Skipping corrupt evolution entry at byte {offset}")
+                    offset += len(line)
+        except OSError as e:
+            logger.error(f"Failed to load history: {e}")
+    
+    def _read_at(self, offset: Optional[int]) -> Optional[Dict]:
+        if offset is None:
             return None
-        return max(history, key=lambda x: x.get('metrics', {}).get(metric, 0))
+        for _, entry in self._scan(offset):
+            return entry
+        return None
+    
+    def _ends_with_newline(self) -> bool:
+        with open(self.history_file, 'rb') as f:
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) == b'\n'
+    
+    @contextmanager
+    def _file_lock(self):
+        """Serialize appends and compaction across worker processes"""
+        with open(self.index_file + '.lock', 'a') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
 
 
 class SelfAnalyzer:
@@ -148,9 +458,135 @@ class SelfAnalyzer:
         return analysis
 
 
+class OllamaError(Exception):
+    """Raised when an Ollama request fails after retries"""
+
+
+class OllamaClient:
+    """Pooled, bounded client for the Ollama HTTP API
+    
+    One keep-alive session is shared by all generations of the process. At
+    most OLLAMA_MAX_CONCURRENCY requests are in flight; the rest wait for a
+    slot. Failed connections and 429/502/503/504 answers are retried with
+    exponential backoff. Read timeouts are not retried, since Ollama may
+    still be generating the first answer. Responses are streamed, so the
+    read timeout bounds the wait for each chunk rather than the whole
+    generation.
+    """
+    
+    RETRY_STATUSES = (429, 502, 503, 504)
+    
+    def __init__(self, base_url: str = None, model: str = None, max_concurrency: int = None):
+        self.base_url = (base_url or SelfEvolutionConfig.OLLAMA_BASE_URL).rstrip('/')
+        self.model = model or SelfEvolutionConfig.OLLAMA_MODEL
+        self.max_concurrency = max(1, max_concurrency or SelfEvolutionConfig.OLLAMA_MAX_CONCURRENCY)
+        self.timeout = (SelfEvolutionConfig.OLLAMA_CONNECT_TIMEOUT, SelfEvolutionConfig.OLLAMA_READ_TIMEOUT)
+        
+        self._slots = threading.BoundedSemaphore(self.max_concurrency)
+        self._lock = threading.Lock()
+        self._stats = {'requests': 0, 'failed': 0, 'in_flight': 0}
+        self._session, self._session_pid = None, None
+    
+    @property
+    def session(self) -> requests.Session:
+        """Keep-alive session of this process; a forked worker must not reuse its parent's sockets"""
+        with self._lock:
+            if self._session_pid != os.getpid():
+                self._session, self._session_pid = self._new_session(), os.getpid()
+            return self._session
+    
+    def _new_session(self) -> requests.Session:
+        retry = Retry(
+            total=SelfEvolutionConfig.OLLAMA_RETRIES,
+            connect=SelfEvolutionConfig.OLLAMA_RETRIES,
+            read=0,
+            status=SelfEvolutionConfig.OLLAMA_RETRIES,
+            status_forcelist=self.RETRY_STATUSES,
+            allowed_methods=frozenset(['GET', 'POST']),
+            backoff_factor=SelfEvolutionConfig.OLLAMA_RETRY_BACKOFF,
+            raise_on_status=False
+        )
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.max_concurrency, max_retries=retry)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        return session
+    
+    def is_available(self) -> bool:
+        """True if the server answers /api/tags"""
+        try:
+            return self.session.get(f"{self.base_url}/api/tags", timeout=self.timeout).status_code == 200
+        except requests.RequestException:
+            return False
+    
+    def generate(self, prompt: str) -> str:
+        """Complete generation as one string"""
+        return ''.join(self.generate_stream(prompt))
+    
+    def generate_stream(self, prompt: str) -> Iterator[str]:
+        """Yield response text chunks as Ollama produces them
+        
+        The concurrency slot is held until the stream is exhausted or closed.
+        """
+        with self._slots:
+            self._count('requests', 'in_flight')
+            try:
+                yield from self._stream(prompt)
+            except OllamaError:
+                self._count('failed')
+                raise
+            except requests.RequestException as e:
+                self._count('failed')
+                raise OllamaError(f"Ollama request failed: {e}") from e
+            finally:
+                with self._lock:
+                    self._stats['in_flight'] -= 1
+    
+    def get_stats(self) -> Dict:
+        """Request counters for this process"""
+        with self._lock:
+            return dict(self._stats, max_concurrency=self.max_concurrency)
+    
+    def _stream(self, prompt: str) -> Iterator[str]:
+        deadline = time.monotonic() + SelfEvolutionConfig.OLLAMA_GENERATION_MAX_SECONDS
+        with self.session.post(
+            f"{self.base_url}/api/generate",
+            json={'model': self.model, 'prompt': prompt, 'stream': True},
+            timeout=self.timeout,
+            stream=True
+        ) as response:
+            if response.status_code != 200:
+                raise OllamaError(f"Ollama returned {response.status_code}: {response.text[:200]}")
+            
+            for line in response.iter_lines():
+                if not line:
+                    continue
+                try:
+                    chunk = json.loads(line)
+                except ValueError:
+                    raise OllamaError(f"Unexpected Ollama output: {line[:200]!r}")
+                if 'error' in chunk:
+                    raise OllamaError(chunk['error'])
+                if chunk.get('response'):
+                    yield chunk['response']
+                # The final chunk says done; reading on to the end of the body keeps the connection reusable
+                if not chunk.get('done') and time.monotonic() > deadline:
+                    raise OllamaError(
+                        f"Generation exceeded {SelfEvolutionConfig.OLLAMA_GENERATION_MAX_SECONDS:.0f}s"
+                    )
+    
+    def _count(self, *names: str):
+        with self._lock:
+            for name in names:
+                self._stats[name] += 1
+
+
 class VariantGenerator:
     """Generate improved AI variants based on analysis"""
     
+    # Focus given to each candidate in population mode, so they differ
+    POPULATION_FOCUSES = ('general', 'performance', 'accuracy', 'error handling', 'readability')
+    
     def __init__(self):
         self.use_vertex_ai = SelfEvolutionConfig.USE_VERTEX_AI
         self.vertex_client = None
@@ -180,17 +616,12 @@ class VariantGenerator:
     
     def _init_ollama(self):
         """Initialize Ollama client for local generation"""
-        try:
-            import requests
-            self.ollama_client = requests.Session()
-            # Test connection
-            response = self.ollama_client.get(f"{SelfEvolutionConfig.OLLAMA_BASE_URL}/api/tags")
-            if response.status_code == 200:
-                logger.info("Ollama initialized for self-evolution")
-            else:
-                logger.warning("Ollama not available, using fallback")
-        except Exception as e:
-            logger.warning(f"Failed to initialize Ollama: {e}")
+        self.ollama_client = OllamaClient()
+        # Test connection
+        if self.ollama_client.is_available():
+            logger.info("Ollama initialized for self-evolution")
+        else:
+            logger.warning("Ollama not available, using fallback")
     
     def generate_variant(self, analysis: Dict, variant_type: str = 'general') -> Dict:
         """Generate improved code variant based on analysis"""
@@ -209,6 +640,49 @@ class VariantGenerator:
         else:
             return self._generate_fallback_variant()
     
+    def stream_variant(self, analysis: Dict, variant_type: str = 'general') -> Iterator[Dict]:
+        """Stream a variant as it is generated
+        
+        Yields ``{'event': 'token', 'text': ...}`` chunks from Ollama followed
+        by ``{'event': 'done', 'variant': ...}`` with the same variant
+        generate_variant would return. Vertex AI and the fallback produce the
+        whole variant at once and yield only the final event.
+        """
+        if not analysis.get('improvement_suggestions') or (self.use_vertex_ai and self.vertex_client) \
+                or not self.ollama_client:
+            yield {'event': 'done', 'variant': self.generate_variant(analysis, variant_type)}
+            return
+        
+        chunks = []
+        try:
+            for text in self.ollama_client.generate_stream(self._create_generation_prompt(analysis, variant_type)):
+                chunks.append(text)
+                yield {'event': 'token', 'text': text}
+            variant = self._ollama_variant(''.join(chunks), analysis)
+        except OllamaError as e:
+            logger.error(f"Ollama generation failed: {e}")
+            variant = self._generate_fallback_variant()
+        
+        yield {'event': 'done', 'variant': variant}
+    
+    def generate_population(self, analysis: Dict, size: int, concurrency: int = None) -> List[Dict]:
+        """Generate several candidate variants at once, each with a different focus
+        
+        Generation is network-bound (Vertex AI or Ollama), so up to
+        ``concurrency`` requests run at the same time on threads.
+        """
+        concurrency = max(1, min(size, concurrency or SelfEvolutionConfig.EVOLUTION_GENERATION_CONCURRENCY))
+        focuses = [self.POPULATION_FOCUSES[i % len(self.POPULATION_FOCUSES)] for i in range(size)]
+        
+        with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='variant-gen') as executor:
+            variants = list(executor.map(lambda focus: self.generate_variant(analysis, focus), focuses))
+        
+        for i, (variant, focus) in enumerate(zip(variants, focuses)):
+            # Names are timestamped to the second, so candidates of one cycle would collide
+            variant['variant_name'] = f"{variant['variant_name']}_{i}"
+            variant['focus'] = focus
+        return variants
+    
     def _create_generation_prompt(self, analysis: Dict, variant_type: str) -> str:
         """Create prompt for variant generation"""
         suggestions = '\n'.join(f"- {s}" for s in analysis.get('improvement_suggestions', []))
@@ -260,35 +734,22 @@ Generate the improved code module:
     def _generate_with_ollama(self, prompt: str, analysis: Dict) -> Dict:
         """Generate variant using local Ollama"""
         try:
-            import requests
-            
-            response = requests.post(
-                f"{SelfEvolutionConfig.OLLAMA_BASE_URL}/api/generate",
-                json={
-                    'model': SelfEvolutionConfig.OLLAMA_MODEL,
-                    'prompt': prompt,
-                    'stream': False
-                },
-                timeout=120
-            )
-            
-            if response.status_code == 200:
-                result = response.json()
-                generated_code = result.get('response', '')
-                
-                return {
-                    'variant_name': f"ollama_variant_{datetime.now().strftime('%Y%m%d_%H%M%S')}",
-                    'code': generated_code,
-                    'generator': 'ollama',
-                    'model': SelfEvolutionConfig.OLLAMA_MODEL,
-                    'analysis_used': analysis,
-                    'generated_at': datetime.now().isoformat()
-                }
-        except Exception as e:
+            return self._ollama_variant(self.ollama_client.generate(prompt), analysis)
+        except OllamaError as e:
             logger.error(f"Ollama generation failed: {e}")
         
         return self._generate_fallback_variant()
     
+    def _ollama_variant(self, generated_code: str, analysis: Dict) -> Dict:
+        return {
+            'variant_name': f"ollama_variant_{datetime.now().strftime('%Y%m%d_%H%M%S')}",
+            'code': generated_code,
+            'generator': 'ollama',
+            'model': self.ollama_client.model,
+            'analysis_used': analysis,
+            'generated_at': datetime.now().isoformat()
+        }
+    
     def _generate_fallback_variant(self) -> Dict:
         """Generate a basic fallback variant"""
         return {
@@ -301,15 +762,67 @@ Generate the improved code module:
 
 
 class VariantTester:
-    """Test generated variants locally"""
+    """Test generated variants locally
+    
+    Static checks (the code compiles, expected imports, a module-level
+    Flask ``app`` or ``create_app()``) run first. Variants that pass them are then benchmarked:
+    variant_bench_worker.py imports the module in a separate interpreter,
+    replays the recorded API requests against its Flask test client and
+    reports latency percentiles, throughput and peak RSS. The current
+    service is measured the same way as the baseline, but only once a
+    variant has served the replay without errors.
+    """
+    
+    WORKER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'variant_bench_worker.py')
+    
+    # A variant faster than the baseline earns at most this much extra score
+    MAX_SPEEDUP_CREDIT = 2.0
+    
+    # Largest file the benchmarked service may write (session database, history)
+    MAX_FILE_MB = 64
+    
+    # All the benchmarked code sees of our environment; API keys and credentials stay out
+    ENV_ALLOWLIST = (
+        'PATH', 'PYTHONPATH', 'HOME', 'LANG', 'LC_ALL', 'TMPDIR', 'OMP_NUM_THREADS',
+        'MODEL_CACHE_DIR', 'MODEL_QUANTIZATION', 'HF_HOME', 'HF_HUB_CACHE', 'HF_HUB_OFFLINE',
+        'TRANSFORMERS_CACHE', 'TRANSFORMERS_OFFLINE', 'TORCH_HOME', 'XDG_CACHE_HOME'
+    )
+    
+    def __init__(self):
+        self._baseline = None  # (measured_at, key, result)
+        self._baseline_lock = threading.Lock()
+    
+    def test_population(self, variants: List[Dict], workers: int = None, benchmark: bool = True) -> List[Dict]:
+        """Test every candidate, results in input order
+        
+        The static checks are a compile() and a few syntax tree tests, so
+        they run in-process. Up to ``workers`` benchmarks run at once; each
+        is its own subprocess, so threads are enough to drive them. The
+        default is one, because benchmarks competing for CPU skew each
+        other's latencies. ``benchmark=False`` stops after the static checks.
+        """
+        results = [self._static_checks(variant) for variant in variants]
+        if not benchmark:
+            return results
+        workers = max(1, min(len(variants), workers or SelfEvolutionConfig.EVOLUTION_TEST_WORKERS))
+        if workers == 1:
+            return [self._add_benchmark(variant, result) for variant, result in zip(variants, results)]
+        
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='variant-bench') as executor:
+            return list(executor.map(self._add_benchmark, variants, results))
     
     def test_variant(self, variant: Dict) -> Dict:
         """Test variant code for correctness and performance"""
+        return self._add_benchmark(variant, self._static_checks(variant))
+    
+    def _static_checks(self, variant: Dict) -> Dict:
+        """Compile and import checks that need no interpreter"""
         test_results = {
             'variant_id': variant.get('variant_name'),
             'tests_passed': 0,
             'tests_failed': 0,
             'performance_score': 0.0,
+            'compiles': False,
             'errors': []
         }
         
@@ -319,10 +832,20 @@ class VariantTester:
         try:
             compile(code, '<string>', 'exec')
             test_results['tests_passed'] += 1
+            test_results['compiles'] = True
         except SyntaxError as e:
             test_results['tests_failed'] += 1
             test_results['errors'].append(f"Syntax error: {e}")
         
+        # Only a module exposing a Flask app (or create_app) can serve the replayed requests
+        if test_results['compiles'] and _defines_app(code):
+            test_results['tests_passed'] += 1
+            test_results['serves_requests'] = True
+        else:
+            test_results['tests_failed'] += 1
+            test_results['serves_requests'] = False
+            test_results['errors'].append("No module-level Flask app defined")
+        
         # Check for required imports
         required_imports = ['flask', 'logging', 'json']
         for imp in required_imports:
@@ -338,6 +861,152 @@ class VariantTester:
             test_results['performance_score'] = test_results['tests_passed'] / total_tests
         
         return test_results
+    
+    def _add_benchmark(self, variant: Dict, test_results: Dict) -> Dict:
+        """Replay the recorded requests against a compiling variant and score it against the baseline
+        
+        The score becomes the pass rate (static checks plus replayed requests)
+        times the baseline's p95 latency over the variant's: 1.0 means every
+        check passed at the current service's speed.
+        """
+        if not SelfEvolutionConfig.EVOLUTION_BENCHMARK_ENABLED or not test_results.get('serves_requests'):
+            return test_results
+        
+        # The variant goes first: one that cannot serve the replay is not worth a baseline run
+        benchmark = self.benchmark_module_code(variant.get('code', ''))
+        test_results['benchmark'] = benchmark
+        if 'error' in benchmark:
+            test_results['tests_failed'] += 1
+            test_results['errors'].append(f"Benchmark failed: {benchmark['error']}")
+            test_results['performance_score'] = 0.0
+            return test_results
+        
+        baseline = self.baseline()
+        if 'error' in baseline:
+            # Without a baseline there is nothing to compare against; keep the static score
+            test_results['errors'].append(f"Baseline benchmark failed: {baseline['error']}")
+            return test_results
+        test_results['baseline'] = baseline
+        
+        test_results['tests_passed'] += benchmark['passed']
+        test_results['tests_failed'] += benchmark['failed']
+        test_results['errors'].extend(benchmark['failures'])
+        test_results['comparison'] = {
+            'p50_ratio': benchmark['p50_ms'] / max(baseline['p50_ms'], 1e-6),
+            'p95_ratio': benchmark['p95_ms'] / max(baseline['p95_ms'], 1e-6),
+            'throughput_ratio': benchmark['throughput_rps'] / max(baseline['throughput_rps'], 1e-6),
+            'rss_ratio': benchmark['peak_rss_mb'] / max(baseline['peak_rss_mb'], 1e-6)
+        }
+        
+        pass_rate = test_results['tests_passed'] / (test_results['tests_passed'] + test_results['tests_failed'])
+        speedup = min(self.MAX_SPEEDUP_CREDIT, 1.0 / max(test_results['comparison']['p95_ratio'], 1e-6))
+        test_results['performance_score'] = round(pass_rate * speedup, 4)
+        return test_results
+    
+    def baseline(self) -> Dict:
+        """Benchmark of the current service, re-measured after EVOLUTION_BASELINE_TTL or when it changes"""
+        module_path = SelfEvolutionConfig.EVOLUTION_BASELINE_MODULE
+        replay_path = SelfEvolutionConfig.EVOLUTION_REPLAY_FILE
+        try:
+            key = (module_path, os.path.getmtime(module_path), replay_path, os.path.getmtime(replay_path))
+        except OSError as e:
+            return {'error': str(e)}
+        
+        with self._baseline_lock:
+            if self._baseline is not None:
+                measured_at, cached_key, result = self._baseline
+                if cached_key == key and time.time() - measured_at < SelfEvolutionConfig.EVOLUTION_BASELINE_TTL:
+                    return result
+            result = self.benchmark_module(module_path)
+            if 'error' not in result:
+                self._baseline = (time.time(), key, result)
+            return result
+    
+    def benchmark_module_code(self, code: str) -> Dict:
+        """Benchmark variant source by writing it to a scratch module first"""
+        with tempfile.TemporaryDirectory(prefix='variant_') as workdir:
+            module_path = os.path.join(workdir, 'variant.py')
+            with open(module_path, 'w') as f:
+                f.write(code)
+            return self.benchmark_module(module_path, workdir)
+    
+    def benchmark_module(self, module_path: str, workdir: str = None) -> Dict:
+        """Run variant_bench_worker.py on a module and return its measurements"""
+        with tempfile.TemporaryDirectory(prefix='variant_bench_') as scratch:
+            result_path = os.path.join(scratch, 'result.json')
+            env = {name: os.environ[name] for name in self.ENV_ALLOWLIST if name in os.environ}
+            # A scratch home: the variant may only write below its working directory and scratch
+            cache_home = os.environ.get('XDG_CACHE_HOME', os.path.join(os.path.expanduser('~'), '.cache'))
+            env.setdefault('HF_HOME', os.path.join(cache_home, 'huggingface'))
+            env.update(
+                HOME=scratch,
+                TMPDIR=scratch,
+                PYTHONDONTWRITEBYTECODE='1',
+                # Network access is refused, so models come from the local cache only
+                HF_HUB_OFFLINE='1',
+                TRANSFORMERS_OFFLINE='1'
+            )
+            env.update(
+                # Importing the service must not touch the live history or start model warm-up
+                EVOLUTION_HISTORY_FILE=os.path.join(scratch, 'evolution_history.jsonl'),
+                SESSION_DB_PATH=os.path.join(scratch, 'sessions.db'),
+                MODEL_WARMUP='false',
+                PRELOAD_MODELS='false',
+                # Measure the code, not cache hits, and never read or write the production Redis
+                TUTOR_CACHE_ENABLED='false',
+                ANALYSIS_CACHE_ENABLED='false',
+                REDIS_URL=''
+            )
+            try:
+                completed = subprocess.run(
+                    [
+                        sys.executable, self.WORKER_SCRIPT, module_path, SelfEvolutionConfig.EVOLUTION_REPLAY_FILE,
+                        result_path, str(SelfEvolutionConfig.EVOLUTION_BENCH_ROUNDS),
+                        str(SelfEvolutionConfig.EVOLUTION_BENCH_WARMUP_ROUNDS)
+                    ],
+                    cwd=workdir or scratch,
+                    env=env,
+                    # Bound to values now: preexec_fn runs between fork and exec and should do nothing else
+                    preexec_fn=functools.partial(
+                        limit_resources,
+                        SelfEvolutionConfig.EVOLUTION_BENCH_MEMORY_MB,
+                        SelfEvolutionConfig.EVOLUTION_BENCH_CPU_SECONDS,
+                        self.MAX_FILE_MB
+                    ),
+                    stdin=subprocess.DEVNULL,
+                    stdout=subprocess.DEVNULL,
+                    stderr=subprocess.PIPE,
+                    timeout=SelfEvolutionConfig.EVOLUTION_BENCH_TIMEOUT
+                )
+            except subprocess.TimeoutExpired:
+                return {'error': f"Benchmark timed out after {SelfEvolutionConfig.EVOLUTION_BENCH_TIMEOUT}s"}
+            
+            try:
+                with open(result_path, 'r') as f:
+                    return json.load(f)
+            except (OSError, ValueError):
+                stderr = completed.stderr.decode(errors='replace').strip().splitlines()
+                return {'error': f"Benchmark worker exited with {completed.returncode}: {' '.join(stderr[-3:])}"}
+
+
+def _defines_app(code: str) -> bool:
+    """Whether the module binds ``app`` or defines ``create_app()`` at top level, as the benchmark worker expects"""
+    for node in ast.parse(code).body:
+        if isinstance(node, ast.FunctionDef) and node.name == 'create_app':
+            return True
+        if isinstance(node, ast.Assign):
+            targets = node.targets
+        elif isinstance(node, (ast.AnnAssign, ast.AugAssign)):
+            targets = [node.target]
+        elif isinstance(node, (ast.Import, ast.ImportFrom)):
+            if any((alias.asname or alias.name) == 'app' for alias in node.names):
+                return True
+            continue
+        else:
+            continue
+        if any(isinstance(target, ast.Name) and target.id == 'app' for target in targets):
+            return True
+    return False
 
 
 class SelfEvolutionEngine:
@@ -349,20 +1018,33 @@ class SelfEvolutionEngine:
         self.generator = VariantGenerator()
         self.tester = VariantTester()
     
-    def evolve(self, analytics_data: Dict) -> Dict:
-        """Execute one evolution cycle"""
-        logger.info("Starting evolution cycle")
+    def evolve(self, analytics_data: Dict, population_size: int = None, benchmark: bool = True) -> Dict:
+        """Execute one evolution cycle
+        
+        With a population size above 1, that many candidates are generated
+        concurrently and tested, and only the best one goes on to the
+        deployment decision; the others are summarized in its record.
+        ``benchmark=False`` scores the candidates on static checks alone,
+        for callers that cannot wait minutes for the replay.
+        """
+        population_size = max(1, population_size or SelfEvolutionConfig.EVOLUTION_POPULATION_SIZE)
+        logger.info(f"Starting evolution cycle (population {population_size})")
         
         # Step 1: Analyze current system
         analysis = self.analyzer.analyze_system(analytics_data)
         logger.info(f"Analysis complete: {len(analysis['weaknesses'])} weaknesses found")
         
-        # Step 2: Generate variant
-        variant = self.generator.generate_variant(analysis)
-        logger.info(f"Variant generated: {variant['variant_name']}")
+        # Step 2: Generate variants
+        if population_size == 1:
+            variants = [self.generator.generate_variant(analysis)]
+        else:
+            variants = self.generator.generate_population(analysis, population_size)
+        logger.info(f"Variants generated: {', '.join(v['variant_name'] for v in variants)}")
         
-        # Step 3: Test variant
-        test_results = self.tester.test_variant(variant)
+        # Step 3: Test variants and keep the best
+        results = self.tester.test_population(variants, benchmark=benchmark)
+        winner = max(range(len(variants)), key=lambda i: self._tournament_key(results[i]))
+        variant, test_results = variants[winner], results[winner]
         logger.info(f"Testing complete: {test_results['performance_score']:.2f} score")
         
         # Step 4: Decide whether to deploy
@@ -371,6 +1053,8 @@ class SelfEvolutionEngine:
         # Step 5: Record evolution
         evolution_record = {
             'variant_name': variant['variant_name'],
+            # Variants are generated from the system as currently deployed
+            'parent_id': self.history.latest_deployed_id(),
             'analysis': analysis,
             'variant': variant,
             'test_results': test_results,
@@ -381,6 +1065,16 @@ class SelfEvolutionEngine:
                 'tests_failed': test_results['tests_failed']
             }
         }
+        benchmark = test_results.get('benchmark', {})
+        if 'p95_ms' in benchmark:
+            # Ranked by the history index alongside the scores
+            evolution_record['metrics'].update({
+                'p95_ms': benchmark['p95_ms'],
+                'throughput_rps': benchmark['throughput_rps'],
+                'peak_rss_mb': benchmark['peak_rss_mb']
+            })
+        if len(variants) > 1:
+            evolution_record['tournament'] = self._tournament_summary(variants, results)
         
         evolution_id = self.history.add_evolution(evolution_record)
         
@@ -396,13 +1090,45 @@ class SelfEvolutionEngine:
             'success': True,
             'deployed': should_deploy,
             'variant_name': variant['variant_name'],
-            'performance_score': test_results['performance_score']
+            'performance_score': test_results['performance_score'],
+            'population_size': len(variants)
         }
     
+    @staticmethod
+    def _tournament_key(test_results: Dict) -> Tuple:
+        """Higher is better; max() keeps the first candidate on ties"""
+        return test_results['performance_score'], test_results['tests_passed'], -test_results['tests_failed']
+    
+    @staticmethod
+    def _tournament_summary(variants: List[Dict], results: List[Dict]) -> List[Dict]:
+        """Every candidate of a population cycle, without its code"""
+        return [
+            {
+                'variant_name': variant['variant_name'],
+                'generator': variant.get('generator'),
+                'focus': variant.get('focus'),
+                'performance_score': result['performance_score'],
+                'tests_passed': result['tests_passed'],
+                'tests_failed': result['tests_failed']
+            }
+            for variant, result in zip(variants, results)
+        ]
+    
     def _should_deploy_variant(self, test_results: Dict) -> bool:
         """Determine if variant should be deployed"""
-        # Deploy if performance score is above threshold
-        return test_results['performance_score'] >= 0.8
+        comparison = test_results.get('comparison')
+        if comparison is None:
+            # Not benchmarked (disabled or no baseline): deploy if performance score is above threshold
+            return test_results['performance_score'] >= 0.8
+        
+        # Every check and replayed request passed, and no measured regression beyond tolerance
+        latency_slack = SelfEvolutionConfig.EVOLUTION_MAX_LATENCY_REGRESSION
+        return (
+            test_results['tests_failed'] == 0
+            and comparison['p95_ratio'] <= 1 + latency_slack
+            and comparison['throughput_ratio'] >= 1 - latency_slack
+            and comparison['rss_ratio'] <= 1 + SelfEvolutionConfig.EVOLUTION_MAX_RSS_REGRESSION
+        )
     
     def _save_variant_for_deployment(self, variant: Dict):
         """Save variant code for deployment"""
@@ -420,17 +1146,25 @@ class SelfEvolutionEngine:
     
     def get_evolution_status(self) -> Dict:
         """Get current evolution status"""
-        latest = self.history.get_latest_evolution()
-        best = self.history.get_best_variant()
-        all_history = self.history.load_history()
-        
         return {
-            'total_evolutions': len(all_history),
-            'latest_evolution': latest,
-            'best_variant': best,
+            'total_evolutions': self.history.count(),
+            'latest_evolution': self.history.get_latest_evolution(),
+            'best_variant': self.history.get_best_variant(),
             'using_vertex_ai': SelfEvolutionConfig.USE_VERTEX_AI,
             'credits_remaining': SelfEvolutionConfig.GCP_CREDITS_REMAINING
         }
+    
+    def stream_variant(self, analytics_data: Dict, variant_type: str = 'general') -> Iterator[Dict]:
+        """Analyze the system and stream one variant as it is generated (not tested or recorded)"""
+        analysis = self.analyzer.analyze_system(analytics_data)
+        yield from self.generator.stream_variant(analysis, variant_type)
+    
+    def get_top_variants(self, metric: str = 'performance_score', k: int = 5) -> List[Dict]:
+        """Best variants by a metric with their lineage, without generated code"""
+        return [
+            {key: value for key, value in entry.items() if key not in EvolutionHistory.BULKY_FIELDS}
+            for entry in self.history.top_variants(metric, k, lineage=True)
+        ]
 
 
 def migrate_to_local():
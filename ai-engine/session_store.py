@@ -0,0 +1,309 @@
+"""
+Assessment Session Storage
+Pluggable stores for code test and interview sessions, indexed by user so
+reports read only that user's sessions
+"""
+
+import os
+import json
+import fcntl
+import hashlib
+import sqlite3
+import logging
+import threading
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+import redis
+
+logger = logging.getLogger(__name__)
+
+
+class SessionStoreConfig:
+    """Configuration for assessment session storage"""
+    
+    SESSION_STORE = os.getenv('SESSION_STORE', 'sqlite')  # sqlite, redis or json
+    SESSION_DB_PATH = os.getenv('SESSION_DB_PATH', '/tmp/assessment_results/sessions.db')
+    SESSION_JSON_DIR = os.getenv('SESSION_JSON_DIR', '/tmp/assessment_results')  # Legacy one-file-per-session layout
+
+
+def session_type(session: Dict) -> str:
+    """Code test sessions predate the 'type' field, so a missing type means a code test"""
+    return session.get('type', 'code_test')
+
+
+class SessionStore:
+    """Interface shared by the session store backends"""
+    
+    def save(self, session: Dict):
+        raise NotImplementedError
+    
+    def load(self, session_id: str) -> Optional[Dict]:
+        raise NotImplementedError
+    
+    def list_user_sessions(self, user_id: str, status: str = None, session_type: str = None) -> List[Dict]:
+        """All sessions of one user, optionally filtered by status and type"""
+        raise NotImplementedError
+    
+    def load_user_stats(self, user_id: str) -> Optional[Dict]:
+        """Running assessment aggregates for a user, or None if never computed"""
+        raise NotImplementedError
+    
+    def save_user_stats(self, user_id: str, stats: Dict):
+        raise NotImplementedError
+    
+    def update_user_stats(self, user_id: str, update: Callable[[Optional[Dict]], Optional[Dict]]):
+        """Atomically read-modify-write a user's aggregates
+        
+        ``update`` gets the stored aggregates (None if there are none) and
+        returns the aggregates to save, or None to save nothing. It must be
+        safe to call again: backends with optimistic locking retry on a
+        conflicting write from another process.
+        """
+        raise NotImplementedError
+
+
+class JsonFileSessionStore(SessionStore):
+    """Original layout: one JSON file per session, user lookups scan every file"""
+    
+    def __init__(self, directory: str = None):
+        self.directory = directory or SessionStoreConfig.SESSION_JSON_DIR
+        os.makedirs(self.directory, exist_ok=True)
+    
+    def save(self, session: Dict):
+        with open(os.path.join(self.directory, f"{session['session_id']}.json"), 'w') as f:
+            json.dump(session, f, indent=2)
+    
+    def load(self, session_id: str) -> Optional[Dict]:
+        session_file = os.path.join(self.directory, f"{session_id}.json")
+        if os.path.exists(session_file):
+            with open(session_file, 'r') as f:
+                return json.load(f)
+        return None
+    
+    def list_user_sessions(self, user_id: str, status: str = None, session_type: str = None) -> List[Dict]:
+        return [
+            session for session in self.iter_all()
+            if session.get('user_id') == user_id and _matches(session, status, session_type)
+        ]
+    
+    def load_user_stats(self, user_id: str) -> Optional[Dict]:
+        stats_file = self._stats_file(user_id)
+        if os.path.exists(stats_file):
+            with open(stats_file, 'r') as f:
+                return json.load(f)
+        return None
+    
+    def save_user_stats(self, user_id: str, stats: Dict):
+        os.makedirs(os.path.dirname(self._stats_file(user_id)), exist_ok=True)
+        with open(self._stats_file(user_id), 'w') as f:
+            json.dump(stats, f)
+    
+    def update_user_stats(self, user_id: str, update: Callable[[Optional[Dict]], Optional[Dict]]):
+        os.makedirs(os.path.dirname(self._stats_file(user_id)), exist_ok=True)
+        # An exclusive lock on a sidecar file serializes workers on this machine
+        with open(self._stats_file(user_id) + '.lock', 'a') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            stats = update(self.load_user_stats(user_id))
+            if stats is not None:
+                self.save_user_stats(user_id, stats)
+    
+    def _stats_file(self, user_id: str) -> str:
+        # Hashed so arbitrary user ids are safe file names
+        return os.path.join(self.directory, 'user_stats', hashlib.sha1(user_id.encode()).hexdigest() + '.json')
+    
+    def iter_all(self):
+        """Every readable session file in the directory"""
+        for filename in sorted(os.listdir(self.directory)):
+            if not filename.endswith('.json'):
+                continue
+            try:
+                session = self.load(filename[:-5])
+            except (OSError, ValueError) as e:
+                logger.warning(f"Skipping unreadable session file {filename}: {e}")
+                continue
+            if session and session.get('session_id'):
+                yield session
+
+
+class SQLiteSessionStore(SessionStore):
+    """Sessions in a SQLite table indexed by user, status and type"""
+    
+    def __init__(self, path: str = None):
+        self.path = path or SessionStoreConfig.SESSION_DB_PATH
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # sqlite3 connections are not shared between threads
+        self._local = threading.local()
+        
+        conn = self._connection()
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.executescript('''
+            CREATE TABLE IF NOT EXISTS sessions (
+                session_id TEXT PRIMARY KEY,
+                user_id TEXT NOT NULL,
+                status TEXT,
+                type TEXT NOT NULL,
+                updated_at TEXT NOT NULL,
+                data TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_sessions_user ON sessions (user_id, type, status);
+            CREATE INDEX IF NOT EXISTS idx_sessions_status ON sessions (status, type);
+            CREATE TABLE IF NOT EXISTS user_stats (
+                user_id TEXT PRIMARY KEY,
+                updated_at TEXT NOT NULL,
+                data TEXT NOT NULL
+            );
+        ''')
+        conn.commit()
+    
+    def save(self, session: Dict):
+        conn = self._connection()
+        conn.execute(
+            'INSERT OR REPLACE INTO sessions (session_id, user_id, status, type, updated_at, data) '
+            'VALUES (?, ?, ?, ?, ?, ?)',
+            (
+                session['session_id'],
+                session.get('user_id', ''),
+                session.get('status'),
+                session_type(session),
+                datetime.now().isoformat(),
+                json.dumps(session)
+            )
+        )
+        conn.commit()
+    
+    def load(self, session_id: str) -> Optional[Dict]:
+        row = self._connection().execute(
+            'SELECT data FROM sessions WHERE session_id = ?', (session_id,)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+    
+    def list_user_sessions(self, user_id: str, status: str = None, session_type: str = None) -> List[Dict]:
+        query = 'SELECT data FROM sessions WHERE user_id = ?'
+        params = [user_id]
+        if session_type is not None:
+            query += ' AND type = ?'
+            params.append(session_type)
+        if status is not None:
+            query += ' AND status = ?'
+            params.append(status)
+        return [json.loads(row[0]) for row in self._connection().execute(query, params)]
+    
+    def load_user_stats(self, user_id: str) -> Optional[Dict]:
+        row = self._connection().execute(
+            'SELECT data FROM user_stats WHERE user_id = ?', (user_id,)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+    
+    def save_user_stats(self, user_id: str, stats: Dict):
+        conn = self._connection()
+        conn.execute(
+            'INSERT OR REPLACE INTO user_stats (user_id, updated_at, data) VALUES (?, ?, ?)',
+            (user_id, datetime.now().isoformat(), json.dumps(stats))
+        )
+        conn.commit()
+    
+    def update_user_stats(self, user_id: str, update: Callable[[Optional[Dict]], Optional[Dict]]):
+        conn = self._connection()
+        # Takes the database write lock up front, so concurrent updates from other workers wait
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = conn.execute('SELECT data FROM user_stats WHERE user_id = ?', (user_id,)).fetchone()
+            stats = update(json.loads(row[0]) if row else None)
+            if stats is not None:
+                conn.execute(
+                    'INSERT OR REPLACE INTO user_stats (user_id, updated_at, data) VALUES (?, ?, ?)',
+                    (user_id, datetime.now().isoformat(), json.dumps(stats))
+                )
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+    
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        # A connection must not cross a fork (gunicorn --preload, worker processes)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=30)
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+
+class RedisSessionStore(SessionStore):
+    """Sessions as Redis strings plus a set of session ids per user"""
+    
+    KEY_PREFIX = 'assessment:session:'
+    USER_PREFIX = 'assessment:user:'
+    
+    def __init__(self, redis_client):
+        self.redis = redis_client
+    
+    def save(self, session: Dict):
+        pipe = self.redis.pipeline()
+        pipe.set(self.KEY_PREFIX + session['session_id'], json.dumps(session))
+        pipe.sadd(f"{self.USER_PREFIX}{session.get('user_id', '')}:sessions", session['session_id'])
+        pipe.execute()
+    
+    def load(self, session_id: str) -> Optional[Dict]:
+        raw = self.redis.get(self.KEY_PREFIX + session_id)
+        return json.loads(raw) if raw is not None else None
+    
+    def list_user_sessions(self, user_id: str, status: str = None, session_type: str = None) -> List[Dict]:
+        session_ids = sorted(
+            s.decode() if isinstance(s, bytes) else s
+            for s in self.redis.smembers(f"{self.USER_PREFIX}{user_id}:sessions")
+        )
+        if not session_ids:
+            return []
+        
+        sessions = [json.loads(raw) for raw in self.redis.mget([self.KEY_PREFIX + s for s in session_ids]) if raw]
+        return [session for session in sessions if _matches(session, status, session_type)]
+    
+    def load_user_stats(self, user_id: str) -> Optional[Dict]:
+        raw = self.redis.get(f"{self.USER_PREFIX}{user_id}:stats")
+        return json.loads(raw) if raw is not None else None
+    
+    def save_user_stats(self, user_id: str, stats: Dict):
+        self.redis.set(f"{self.USER_PREFIX}{user_id}:stats", json.dumps(stats))
+    
+    def update_user_stats(self, user_id: str, update: Callable[[Optional[Dict]], Optional[Dict]]):
+        key = f"{self.USER_PREFIX}{user_id}:stats"
+        with self.redis.pipeline() as pipe:
+            while True:
+                try:
+                    # WATCH/MULTI: the write fails if another worker changed the key meanwhile
+                    pipe.watch(key)
+                    raw = pipe.get(key)
+                    stats = update(json.loads(raw) if raw is not None else None)
+                    if stats is None:
+                        pipe.unwatch()
+                        return
+                    pipe.multi()
+                    pipe.set(key, json.dumps(stats))
+                    pipe.execute()
+                    return
+                except redis.WatchError:
+                    continue
+
+
+def _matches(session: Dict, status: Optional[str], kind: Optional[str]) -> bool:
+    return (status is None or session.get('status') == status) and (kind is None or session_type(session) == kind)
+
+
+def create_session_store(backend: str = None, redis_client=None) -> SessionStore:
+    """Build the configured session store, falling back to SQLite if Redis is unavailable"""
+    backend = (backend or SessionStoreConfig.SESSION_STORE).lower()
+    
+    if backend == 'redis':
+        if redis_client is not None:
+            return RedisSessionStore(redis_client)
+        logger.warning("SESSION_STORE=redis but Redis is not connected; using SQLite")
+        backend = 'sqlite'
+    
+    if backend == 'json':
+        return JsonFileSessionStore()
+    if backend != 'sqlite':
+        logger.warning(f"Unknown SESSION_STORE '{backend}'; using SQLite")
+    return SQLiteSessionStore()
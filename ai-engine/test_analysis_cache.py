@@ -0,0 +1,164 @@
+"""
+Tests for the content-addressed code analysis cache
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from caching import AnalysisCache
+from models import CustomCodeAnalyzer, ModelConfig
+
+try:
+    import fakeredis
+except ImportError:
+    fakeredis = None
+
+CODE = "def add(a, b):\n    return a + b"
+
+
+class CountingAnalyzer(CustomCodeAnalyzer):
+    """CodeT5 replaced by a counter so tests need no model download"""
+
+    def __init__(self, cache):
+        super().__init__()
+        self.cache = cache
+        self.generated = []
+
+    def _generate_analysis(self, code, language):
+        self.generated.append(code)
+        return self._result(f"analysis of {len(code)} chars", self.policy.code_budget())
+
+    def _generate_chunk(self, chunk):
+        self.generated.extend(code for code, _ in chunk)
+        return [self._result(f"analysis of {len(code)} chars", self.policy.code_budget()) for code, _ in chunk]
+
+
+def test_local_tier_returns_copies():
+    cache = AnalysisCache(max_entries=2)
+    cache.set('analysis', '1', CODE, 'python', {'suggestions': ['a']})
+
+    first = cache.get('analysis', '1', CODE, 'python')
+    first['suggestions'].append('mutated')
+    assert cache.get('analysis', '1', CODE, 'python') == {'suggestions': ['a']}
+
+    # Other versions, languages and code are different entries
+    assert cache.get('analysis', '2', CODE, 'python') is None
+    assert cache.get('analysis', '1', CODE, 'javascript') is None
+
+    # Least recently used entries are evicted first
+    cache.set('analysis', '1', 'x = 1', 'python', {})
+    cache.set('analysis', '1', 'x = 2', 'python', {})
+    assert cache.get('analysis', '1', CODE, 'python') is None
+
+    stats = cache.get_stats()
+    assert stats['local_entries'] == 2
+    assert stats['kinds']['analysis']['hits_local'] == 2
+    assert stats['kinds']['analysis']['misses'] == 3
+
+
+def test_redis_tier_shared_between_processes():
+    if fakeredis is None:
+        print("  (skipped: fakeredis not installed)")
+        return
+    redis_client = fakeredis.FakeRedis()
+    worker_a = AnalysisCache(redis_client)
+    worker_b = AnalysisCache(redis_client)
+
+    worker_a.set('ai', 'codet5:1', CODE, 'python', {'ai_analysis': 'ok'})
+    assert worker_b.get('ai', 'codet5:1', CODE, 'python') == {'ai_analysis': 'ok'}
+    assert worker_b.get('ai', 'codet5:1', CODE, 'python') == {'ai_analysis': 'ok'}  # Now from its LRU
+    assert worker_b.get_stats()['kinds']['ai']['hits_redis'] == 1
+    assert worker_b.get_stats()['kinds']['ai']['hits_local'] == 1
+
+    # Local-only entries never reach Redis
+    worker_a.set('score', '1', CODE, 'python', {'code_quality': 10}, shared=False)
+    assert worker_b.get('score', '1', CODE, 'python') is None
+
+
+def test_ai_analysis_generated_once_per_code():
+    analyzer = CountingAnalyzer(AnalysisCache())
+
+    first = analyzer.analyze_with_ai(CODE, 'python')
+    cached = analyzer.analyze_with_ai(CODE, 'python')
+    assert cached == {k: v for k, v in first.items() if k != 'generation'}
+    assert analyzer.generated == [CODE]
+
+
+def test_generation_metadata_not_replayed():
+    """Hits do not report the in-flight count and budget of the request that generated them"""
+    analyzer = CountingAnalyzer(AnalysisCache())
+    assert 'generation' in analyzer.analyze_with_ai(CODE, 'python')
+    assert 'generation' not in analyzer.analyze_with_ai(CODE, 'python')
+
+    list(analyzer.analyze_batch_with_ai([('x = 1', 'python')]))
+    cached = [r for batch in analyzer.analyze_batch_with_ai([('x = 1', 'python')]) for r in batch]
+    assert cached[0]['ai_analysis'] == 'analysis of 5 chars' and 'generation' not in cached[0]
+
+
+def test_batch_skips_cached_items_and_keeps_order():
+    analyzer = CountingAnalyzer(AnalysisCache())
+    codes = [f"x = {i}" for i in range(5)]
+    analyzer.analyze_with_ai(codes[1], 'python')
+    analyzer.analyze_with_ai(codes[3], 'python')
+    analyzer.generated.clear()
+
+    results = [r for batch in analyzer.analyze_batch_with_ai([(c, 'python') for c in codes], batch_size=2) for r in batch]
+
+    assert analyzer.generated == [codes[0], codes[2], codes[4]]
+    assert [r['ai_analysis'] for r in results] == [f"analysis of {len(c)} chars" for c in codes]
+
+
+def test_failed_analysis_not_cached():
+    cache = AnalysisCache()
+    analyzer = CountingAnalyzer(cache)
+    analyzer._generate_analysis = lambda code, language: analyzer._unavailable()
+
+    analyzer.analyze_with_ai(CODE, 'python')
+    assert cache.get('ai', analyzer.cache_version(), CODE, 'python') is None
+
+
+def test_degraded_analysis_not_cached():
+    """An analysis shortened because the server was busy is redone at normal load"""
+    cache = AnalysisCache()
+    analyzer = CountingAnalyzer(cache)
+    analyzer._generate_analysis = lambda code, language: analyzer._result(
+        'short', analyzer.policy.code_budget(ModelConfig.BUDGET_OVERLOAD_IN_FLIGHT)
+    )
+
+    assert analyzer.analyze_with_ai(CODE, 'python')['generation']['num_beams'] == 1
+    assert cache.get('ai', analyzer.cache_version(), CODE, 'python') is None
+
+
+def main():
+    """Run all tests"""
+    print("=" * 60)
+    print("Analysis Cache Tests")
+    print("=" * 60)
+
+    tests = [
+        test_local_tier_returns_copies,
+        test_redis_tier_shared_between_processes,
+        test_ai_analysis_generated_once_per_code,
+        test_generation_metadata_not_replayed,
+        test_batch_skips_cached_items_and_keeps_order,
+        test_failed_analysis_not_cached,
+        test_degraded_analysis_not_cached
+    ]
+
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✓ {test.__name__}")
+        except Exception as e:
+            failed += 1
+            print(f"✗ {test.__name__}: {e}")
+
+    print(f"\nTest Results: {len(tests) - failed}/{len(tests)} passed")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,131 @@
+"""
+Tests for the shared challenge and interview question bank
+"""
+
+import json
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from assessment import AssessmentBank, CodingChallenge, MockInterview, get_assessment_bank
+
+
+def test_bank_built_once_and_shared():
+    """Every challenge/interview instance reuses the same indexed bank"""
+    assert CodingChallenge('junior', 'arrays').bank is get_assessment_bank()
+    assert MockInterview('middle').bank is get_assessment_bank()
+
+
+def test_lookups_by_level_topic_and_id():
+    bank = get_assessment_bank()
+
+    arrays = bank.challenges_for('junior', 'arrays')
+    assert arrays and all(c['difficulty'] == 'junior' for c in arrays)
+    assert bank.challenge(arrays[0]['id']) is arrays[0]
+    assert bank.challenges_for('junior', 'no-such-topic') == ()
+
+    assert bank.question('int_m_002')['category'] == 'algorithms'
+    assert bank.questions_for('no-such-level') == bank.questions_for('junior')
+
+
+def test_indexes_are_read_only():
+    bank = get_assessment_bank()
+    try:
+        bank._challenges['junior'] = {}
+        assert False, "expected TypeError"
+    except TypeError:
+        pass
+
+
+def test_external_bank_file():
+    """A configured JSON file replaces the built-in challenges"""
+    challenges = {
+        'junior': {
+            'strings': [
+                {'id': f'ext_{i}', 'title': 'T', 'description': 'D', 'difficulty': 'junior',
+                 'time_limit': 60, 'test_cases': [], 'scoring_rubric': {'correctness': 100}}
+                for i in range(1000)
+            ]
+        }
+    }
+    with tempfile.NamedTemporaryFile('w', suffix='.json', delete=False) as f:
+        json.dump(challenges, f)
+    try:
+        bank = AssessmentBank.load(f.name, None)
+        assert len(bank.challenges_for('junior', 'strings')) == 1000
+        assert bank.challenge('ext_999')['title'] == 'T'
+        assert bank.challenges_for('junior', 'arrays') == ()
+        assert bank.question('int_j_001') is not None  # Questions still built in
+
+        challenges['junior']['strings'].append({'id': 'ext_1'})
+        with open(f.name, 'w') as out:
+            json.dump(challenges, out)
+        try:
+            AssessmentBank.load(f.name, None)
+            assert False, "expected ValueError for duplicate id"
+        except ValueError as e:
+            assert 'ext_1' in str(e)
+    finally:
+        os.unlink(f.name)
+
+
+def test_answer_scoring_matches_points_not_stray_words():
+    """A point is covered by its weighted terms, in any order or inflection"""
+    interview = MockInterview('junior')
+
+    full = interview.score_answer(
+        'int_j_001', 'Arrays use contiguous memory with O(1) access time vs O(n) for lists, whose size is dynamic.'
+    )
+    assert full['points_covered'] == 3 and full['score'] == 100
+
+    # One shared word ("memory", "time") is not enough to cover a point
+    stray = interview.score_answer('int_j_001', 'Memory matters and it takes time.')
+    assert stray['points_covered'] == 0
+    assert 'contiguous memory' in stray['feedback']
+
+    assert interview.score_answer('missing', 'anything') == {'error': 'Question not found'}
+
+
+def test_batch_scoring_matches_single_answers():
+    interview = MockInterview('middle')
+    answers = [
+        ('int_m_001', 'Hashing the key, then collisions need handling; lookups are O(1)'),
+        ('int_m_002', 'Quicksort O(n log n)'),
+        ('int_j_002', ''),
+        ('missing', 'x')
+    ]
+    assert interview.score_answers(answers) == [interview.score_answer(q, a) for q, a in answers]
+
+
+def main():
+    """Run all tests"""
+    print("=" * 60)
+    print("Assessment Bank Tests")
+    print("=" * 60)
+
+    tests = [
+        test_bank_built_once_and_shared,
+        test_lookups_by_level_topic_and_id,
+        test_indexes_are_read_only,
+        test_external_bank_file,
+        test_answer_scoring_matches_points_not_stray_words,
+        test_batch_scoring_matches_single_answers
+    ]
+
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✓ {test.__name__}")
+        except Exception as e:
+            failed += 1
+            print(f"✗ {test.__name__}: {e}")
+
+    print(f"\nTest Results: {len(tests) - failed}/{len(tests)} passed")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
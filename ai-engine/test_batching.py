@@ -0,0 +1,177 @@
+"""
+Tests for the chat generation batch scheduler
+Uses a tiny fake model/tokenizer so no model download is required
+"""
+
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import torch
+from transformers import BatchEncoding
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from models import GenerationScheduler
+
+
+class FakeTokenizer:
+    """Character-level tokenizer: token id = ord(char), 0 = pad/eos"""
+
+    pad_token = None
+    eos_token = '\0'
+    eos_token_id = 0
+    padding_side = 'right'
+
+    @property
+    def pad_token_id(self):
+        return 0
+
+    def __call__(self, texts, return_tensors=None, padding=False, truncation=False, max_length=None):
+        if isinstance(texts, str):
+            texts = [texts]
+        rows = [[ord(c) for c in text] for text in texts]
+        width = max(len(r) for r in rows)
+        assert self.padding_side == 'left', "batched prompts must be left-padded"
+        ids = [[0] * (width - len(r)) + r for r in rows]
+        mask = [[0] * (width - len(r)) + [1] * len(r) for r in rows]
+        return BatchEncoding({'input_ids': torch.tensor(ids), 'attention_mask': torch.tensor(mask)})
+
+    def batch_decode(self, rows, skip_special_tokens=True):
+        return [''.join(chr(int(t)) for t in row if int(t) != 0) for row in rows]
+
+
+class FakeModel:
+    """Echoes each prompt's last character as its completion and records batch sizes"""
+
+    device = 'cpu'
+
+    def __init__(self):
+        self.batch_sizes = []
+        self.speculative_batch_sizes = []
+        self.lock = threading.Lock()
+
+    def generate(self, input_ids, attention_mask, max_new_tokens=4, **kwargs):
+        with self.lock:
+            self.batch_sizes.append(input_ids.shape[0])
+            if 'prompt_lookup_num_tokens' in kwargs:
+                self.speculative_batch_sizes.append(input_ids.shape[0])
+        new_tokens = input_ids[:, -1:].repeat(1, max_new_tokens)
+        return torch.cat([input_ids, new_tokens], dim=1)
+
+
+class FakeLoader:
+    def __init__(self, speculative=None):
+        self.model = FakeModel()
+        self.tokenizer = FakeTokenizer()
+        self.speculative = speculative or {}
+
+    def load_chat_model(self):
+        return self.model, self.tokenizer
+
+    def speculative_kwargs(self):
+        return dict(self.speculative)
+
+
+def test_results_dispatched_to_callers():
+    """Each submitting thread gets the completion for its own prompt"""
+    loader = FakeLoader()
+    scheduler = GenerationScheduler(loader, max_batch_size=4, max_wait_ms=50)
+
+    prompts = [f"prompt-{i}{chr(ord('a') + i)}" for i in range(8)]
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(executor.map(lambda p: scheduler.submit(p, {'max_new_tokens': 3}), prompts))
+
+    assert results == [p[-1] * 3 for p in prompts]
+    assert max(loader.model.batch_sizes) <= 4
+    assert sum(loader.model.batch_sizes) == 8
+
+
+def test_concurrent_requests_share_batches():
+    """Concurrent submissions are grouped instead of generated one by one"""
+    loader = FakeLoader()
+    scheduler = GenerationScheduler(loader, max_batch_size=8, max_wait_ms=200)
+
+    with ThreadPoolExecutor(max_workers=6) as executor:
+        list(executor.map(lambda i: scheduler.submit(f"q{i}", {'max_new_tokens': 2}), range(6)))
+
+    stats = scheduler.get_stats()
+    assert stats['requests'] == 6
+    assert stats['batches'] < 6
+    assert stats['avg_batch_size'] > 1
+
+
+def test_different_generation_settings_not_mixed():
+    """Prompts with different generate kwargs never share a forward pass"""
+    loader = FakeLoader()
+    scheduler = GenerationScheduler(loader, max_batch_size=8, max_wait_ms=200)
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        results = list(executor.map(
+            lambda i: scheduler.submit(f"x{i}", {'max_new_tokens': 1 + i % 2}), range(4)
+        ))
+
+    assert [len(r) for r in results] == [1, 2, 1, 2]
+
+
+def test_generation_error_propagates():
+    """A failing batch raises in every waiting caller"""
+    loader = FakeLoader()
+
+    def broken_generate(*args, **kwargs):
+        raise RuntimeError("out of memory")
+
+    loader.model.generate = broken_generate
+    scheduler = GenerationScheduler(loader, max_batch_size=2, max_wait_ms=0)
+
+    try:
+        scheduler.submit("hello", {'max_new_tokens': 2})
+        assert False, "expected RuntimeError"
+    except RuntimeError as e:
+        assert 'out of memory' in str(e)
+
+
+def test_speculation_only_for_single_prompts():
+    """Assisted decoding handles one prompt at a time, so batches generate normally"""
+    loader = FakeLoader(speculative={'prompt_lookup_num_tokens': 4})
+    scheduler = GenerationScheduler(loader, max_batch_size=8, max_wait_ms=200)
+
+    assert scheduler.submit("alone", {'max_new_tokens': 2}) == 'ee'
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        list(executor.map(lambda i: scheduler.submit(f"q{i}", {'max_new_tokens': 2}), range(4)))
+
+    assert loader.model.speculative_batch_sizes[0] == 1
+    assert all(size == 1 for size in loader.model.speculative_batch_sizes)
+    assert scheduler.get_stats()['speculative_requests'] == len(loader.model.speculative_batch_sizes)
+
+
+def main():
+    """Run all tests"""
+    print("=" * 60)
+    print("Chat Batch Scheduler Tests")
+    print("=" * 60)
+
+    tests = [
+        test_results_dispatched_to_callers,
+        test_concurrent_requests_share_batches,
+        test_different_generation_settings_not_mixed,
+        test_generation_error_propagates,
+        test_speculation_only_for_single_prompts
+    ]
+
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✓ {test.__name__}")
+        except Exception as e:
+            failed += 1
+            print(f"✗ {test.__name__}: {e}")
+
+    print(f"\nTest Results: {len(tests) - failed}/{len(tests)} passed")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
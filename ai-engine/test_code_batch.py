@@ -0,0 +1,114 @@
+"""
+Tests for the /code/analyze/batch streaming endpoint
+CodeT5 is replaced by the counting analyzer from test_analysis_cache.py
+"""
+
+import json
+import os
+import sys
+from contextlib import contextmanager
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+import main as engine
+from caching import AnalysisCache
+from models import ModelConfig
+from test_analysis_cache import CountingAnalyzer
+
+
+@contextmanager
+def batch_client(batch_size=2):
+    """Flask test client whose analyzer counts generations instead of running CodeT5"""
+    analyzer = CountingAnalyzer(AnalysisCache())
+    saved = engine.get_custom_analyzer, ModelConfig.CODE_BATCH_SIZE
+    engine.get_custom_analyzer = lambda: analyzer
+    ModelConfig.CODE_BATCH_SIZE = batch_size
+    try:
+        yield engine.app.test_client(), analyzer
+    finally:
+        engine.get_custom_analyzer, ModelConfig.CODE_BATCH_SIZE = saved
+
+
+def events(response):
+    """(event, data) pairs of a Server-Sent Events response"""
+    parsed = []
+    for block in response.get_data(as_text=True).strip().split('\n\n'):
+        name, data = block.split('\n')
+        parsed.append((name[len('event: '):], json.loads(data[len('data: '):])))
+    return parsed
+
+
+def test_results_stream_in_order_then_done():
+    items = [{'id': f'sub-{i}', 'code': f"x = {i}"} for i in range(5)]
+    with batch_client() as (client, analyzer):
+        response = client.post('/code/analyze/batch', json={'items': items})
+        stream = events(response)
+
+    assert response.status_code == 200 and response.mimetype == 'text/event-stream'
+    assert [name for name, _ in stream] == ['result'] * 5 + ['done']
+    assert [data['index'] for _, data in stream[:-1]] == list(range(5))
+    assert [data['id'] for _, data in stream[:-1]] == [item['id'] for item in items]
+    assert stream[0][1]['analysis']['ai_insights']['ai_analysis'] == 'analysis of 5 chars'
+    assert stream[-1][1]['count'] == 5
+    assert len(analyzer.generated) == 5
+
+
+def test_cached_items_skip_the_model():
+    codes = [f"x = {i}" for i in range(4)]
+    with batch_client() as (client, analyzer):
+        analyzer.analyze_with_ai(codes[2], 'python')
+        analyzer.generated.clear()
+        stream = events(client.post('/code/analyze/batch', json={'items': [{'code': c} for c in codes]}))
+
+    assert analyzer.generated == [codes[0], codes[1], codes[3]]
+    assert [data['index'] for name, data in stream if name == 'result'] == [0, 1, 2, 3]
+
+
+def test_batch_size_validated_and_capped():
+    items = [{'code': f"x = {i}"} for i in range(6)]
+    with batch_client(batch_size=2) as (client, analyzer):
+        for bad in ('many', 2.5, True, [4]):
+            response = client.post('/code/analyze/batch', json={'items': items, 'batch_size': bad})
+            assert response.status_code == 400, bad
+            assert 'batch_size' in response.get_json()['error']
+        assert analyzer.generated == []
+
+        chunks = []
+        generate_chunk = analyzer._generate_chunk
+        analyzer._generate_chunk = lambda chunk: chunks.append(len(chunk)) or generate_chunk(chunk)
+        events(client.post('/code/analyze/batch', json={'items': items, 'batch_size': '1000'}))
+        assert chunks == [2, 2, 2]
+
+        chunks.clear()
+        analyzer.cache = AnalysisCache()
+        events(client.post('/code/analyze/batch', json={'items': items, 'batch_size': -3}))
+        assert chunks == [1] * 6
+
+
+def main():
+    """Run all tests"""
+    print("=" * 60)
+    print("Batch Analysis Endpoint Tests")
+    print("=" * 60)
+
+    tests = [
+        test_results_stream_in_order_then_done,
+        test_cached_items_skip_the_model,
+        test_batch_size_validated_and_capped
+    ]
+
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✓ {test.__name__}")
+        except Exception as e:
+            failed += 1
+            print(f"✗ {test.__name__}: {e}")
+
+    print(f"\nTest Results: {len(tests) - failed}/{len(tests)} passed")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
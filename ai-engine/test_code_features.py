@@ -0,0 +1,116 @@
+"""
+Tests for the single-pass static code feature extraction
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from code_features import extract_features
+
+NESTED = """def pairs(items):
+    # Every ordered pair
+    result = []
+    for a in items:
+        for b in items:
+            if a != b and a > 0:
+                result.append((a, b))
+    return result
+"""
+
+SEQUENTIAL = """def summary(values):
+    total = 0
+    for v in values:
+        total += v
+    for v in values:
+        print(format(v))
+    return information(total)
+"""
+
+
+def test_keywords_inside_identifiers_are_not_counted():
+    """format/information/ifelse are names, not loops or branches"""
+    features = extract_features("x = format(information)\nifelse = forward", 'python')
+    assert features['parser'] == 'ast'
+    assert features['loops'] == 0 and features['branches'] == 0 and features['functions'] == 0
+
+
+def test_loop_nesting_depth_not_loop_count():
+    nested = extract_features(NESTED, 'python')
+    assert nested['loops'] == 2 and nested['max_loop_depth'] == 2
+    assert nested['branches'] == 1 and nested['bool_ops'] == 1
+    assert nested['has_comments'] and nested['collection_growth']
+
+    sequential = extract_features(SEQUENTIAL, 'python')
+    assert sequential['loops'] == 2 and sequential['max_loop_depth'] == 1
+    assert sequential['prints'] == 1 and sequential['returns'] == 1
+    assert not sequential['has_comments']
+
+    comprehension = extract_features("grid = [[0 for _ in row] for row in rows]", 'python')
+    assert comprehension['comprehensions'] == 2 and comprehension['max_loop_depth'] == 2
+
+
+def test_unparseable_python_falls_back_to_indentation():
+    features = extract_features("def f(a)\n    for x in a:\n        while x:\n            x -= 1\n", 'python')
+    assert features['parser'] == 'tokens'
+    assert features['loops'] == 2 and features['max_loop_depth'] == 2
+
+
+def test_brace_languages_ignore_strings_and_comments():
+    code = """// for each item
+function total(items) {
+    const label = "while loop";
+    let sum = 0;
+    for (const item of items) {
+        if (item > 0 && item < 10) { sum += item; }
+    }
+    return sum;
+}"""
+    features = extract_features(code, 'javascript')
+    assert features['parser'] == 'tokens'
+    assert features['loops'] == 1 and features['max_loop_depth'] == 1
+    assert features['branches'] == 1 and features['bool_ops'] == 1
+    assert features['functions'] == 1 and features['has_comments']
+
+
+def test_features_cached_per_code_hash():
+    first = extract_features(NESTED, 'python')
+    assert extract_features(NESTED, 'python') is first
+    assert extract_features(NESTED, 'javascript') is not first
+    try:
+        first['loops'] = 0
+        assert False, "expected TypeError"
+    except TypeError:
+        pass
+
+
+def main():
+    """Run all tests"""
+    print("=" * 60)
+    print("Code Feature Tests")
+    print("=" * 60)
+
+    tests = [
+        test_keywords_inside_identifiers_are_not_counted,
+        test_loop_nesting_depth_not_loop_count,
+        test_unparseable_python_falls_back_to_indentation,
+        test_brace_languages_ignore_strings_and_comments,
+        test_features_cached_per_code_hash
+    ]
+
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✓ {test.__name__}")
+        except Exception as e:
+            failed += 1
+            print(f"✗ {test.__name__}: {e}")
+
+    print(f"\nTest Results: {len(tests) - failed}/{len(tests)} passed")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,173 @@
+"""
+Tests for the append-only evolution history log and its sidecar index
+"""
+
+import json
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from self_evolve import EvolutionHistory, SelfEvolutionConfig
+
+
+def record(name, score, passed=1):
+    return {
+        'variant_name': name,
+        'variant': {'code': 'x = 1\n' * 200},
+        'analysis': {'weaknesses': ['slow']},
+        'metrics': {'performance_score': score, 'tests_passed': passed}
+    }
+
+
+def test_appends_and_indexed_reads():
+    with tempfile.TemporaryDirectory() as tmp:
+        history = EvolutionHistory(os.path.join(tmp, 'history.jsonl'))
+        assert history.count() == 0
+        assert history.get_latest_evolution() is None and history.get_best_variant() is None
+
+        ids = [history.add_evolution(record(f"v{i}", score)) for i, score in enumerate([0.5, 0.9, 0.9, 0.2])]
+
+        assert history.count() == 4
+        assert history.get_latest_evolution()['id'] == ids[3]
+        assert history.get_best_variant()['variant_name'] == 'v1'  # Earliest of the tied best, as max() picks
+        assert history.get_best_variant('no_such_metric')['variant_name'] == 'v0'
+        assert [e['id'] for e in history.iter_history()] == ids
+
+        # Each entry is one JSON line
+        with open(history.history_file) as f:
+            assert [json.loads(line)['id'] for line in f] == ids
+
+
+def test_other_writers_and_crashes_are_caught_up():
+    """The index follows appends from another worker and rebuilds after a lost or torn write"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'history.jsonl')
+        reader, writer = EvolutionHistory(path), EvolutionHistory(path)
+        writer.add_evolution(record('a', 0.1))
+        assert reader.count() == 1
+
+        # Appended without an index update, then a torn final line
+        with open(path, 'a') as f:
+            f.write(json.dumps(dict(record('b', 0.8), id='b')) + '\n')
+            f.write('{"variant_name": "torn"')
+        assert reader.count() == 2
+        assert reader.get_best_variant()['id'] == 'b'
+
+        # The next append starts on a fresh line instead of extending the torn one
+        latest = writer.add_evolution(record('c', 0.3))
+        assert reader.count() == 3
+
+        os.unlink(reader.index_file)
+        assert EvolutionHistory(path).get_latest_evolution()['id'] == latest
+
+
+def test_legacy_json_history_imported():
+    with tempfile.TemporaryDirectory() as tmp:
+        with open(os.path.join(tmp, 'history.json'), 'w') as f:
+            json.dump([dict(record('old', 0.7), id='old1')], f, indent=2)
+
+        history = EvolutionHistory(os.path.join(tmp, 'history.jsonl'))
+        assert history.count() == 1
+        assert history.get_best_variant()['id'] == 'old1'
+
+
+def test_compaction_keeps_recent_and_best_entries():
+    keep_full, top_k = SelfEvolutionConfig.EVOLUTION_HISTORY_KEEP_FULL, SelfEvolutionConfig.EVOLUTION_TOP_K
+    SelfEvolutionConfig.EVOLUTION_HISTORY_KEEP_FULL, SelfEvolutionConfig.EVOLUTION_TOP_K = 2, 1
+    try:
+        check_compaction()
+    finally:
+        SelfEvolutionConfig.EVOLUTION_HISTORY_KEEP_FULL, SelfEvolutionConfig.EVOLUTION_TOP_K = keep_full, top_k
+
+
+def check_compaction():
+    with tempfile.TemporaryDirectory() as tmp:
+        history = EvolutionHistory(os.path.join(tmp, 'history.jsonl'))
+        for i, score in enumerate([0.95, 0.1, 0.2, 0.3, 0.4]):
+            history.add_evolution(record(f"v{i}", score, passed=i))
+        size = os.path.getsize(history.history_file)
+
+        history.compact()
+
+        entries = list(history.iter_history())
+        assert [e['variant_name'] for e in entries] == ['v0', 'v1', 'v2', 'v3', 'v4']
+        assert 'variant' in entries[0]  # Best performance_score
+        assert [e.get('compacted', False) for e in entries[1:]] == [True, True, False, False]
+        assert entries[1]['metrics']['performance_score'] == 0.1
+        assert os.path.getsize(history.history_file) < size
+        assert history.count() == 5
+        assert history.get_best_variant('tests_passed')['variant_name'] == 'v4'
+
+
+def test_top_k_matches_a_full_sort():
+    with tempfile.TemporaryDirectory() as tmp:
+        history = EvolutionHistory(os.path.join(tmp, 'history.jsonl'))
+        for i in range(60):
+            entry = record(f"v{i}", (i * 37 % 23) / 23, passed=i % 7)
+            entry['metrics']['tests_failed'] = i % 5
+            history.add_evolution(entry)
+        entries = history.load_history()
+
+        def expected(metric, k, reverse=True):
+            ranked = sorted(entries, key=lambda e: e['metrics'][metric] * (-1 if reverse else 1))
+            return [e['id'] for e in ranked[:k]]  # sorted() is stable: ties stay oldest first
+
+        assert [e['id'] for e in history.top_variants('performance_score', 5)] == expected('performance_score', 5)
+        assert [e['id'] for e in history.top_variants('tests_passed', 8)] == expected('tests_passed', 8)
+        assert [e['id'] for e in history.top_variants('tests_failed', 3)] == expected('tests_failed', 3, reverse=False)
+        # Beyond the indexed rows the log is scanned instead
+        k = SelfEvolutionConfig.EVOLUTION_TOP_K + 15
+        assert [e['id'] for e in history.top_variants('performance_score', k)] == expected('performance_score', k)
+        assert history.top_variants('no_such_metric') == []
+
+
+def test_lineage_follows_deployed_parents():
+    with tempfile.TemporaryDirectory() as tmp:
+        history = EvolutionHistory(os.path.join(tmp, 'history.jsonl'))
+        assert history.latest_deployed_id() is None
+
+        root = history.add_evolution(dict(record('root', 0.85), deployed=True, parent_id=None))
+        history.add_evolution(dict(record('rejected', 0.2), deployed=False, parent_id=root))
+        child = history.add_evolution(dict(record('child', 0.9), deployed=True, parent_id=root))
+        assert history.latest_deployed_id() == child
+        best = history.add_evolution(dict(record('grandchild', 0.99), deployed=False, parent_id=child))
+
+        top = history.top_variants('performance_score', 1, lineage=True)[0]
+        assert top['id'] == best
+        assert [a['variant_name'] for a in top['lineage']] == ['child', 'root']
+        assert [a['id'] for a in history.get_lineage(child)] == [root]
+        assert history.get_lineage('unknown') == []
+
+
+def main():
+    """Run all tests"""
+    print("=" * 60)
+    print("Evolution History Tests")
+    print("=" * 60)
+
+    tests = [
+        test_appends_and_indexed_reads,
+        test_other_writers_and_crashes_are_caught_up,
+        test_legacy_json_history_imported,
+        test_compaction_keeps_recent_and_best_entries,
+        test_top_k_matches_a_full_sort,
+        test_lineage_follows_deployed_parents
+    ]
+
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✓ {test.__name__}")
+        except Exception as e:
+            failed += 1
+            print(f"✗ {test.__name__}: {e}")
+
+    print(f"\nTest Results: {len(tests) - failed}/{len(tests)} passed")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
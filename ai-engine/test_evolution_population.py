@@ -0,0 +1,178 @@
+"""
+Tests for population-mode and background evolution against a local stub Ollama server
+"""
+
+import os
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from jobs import EvolutionJobQueue
+from self_evolve import EvolutionHistory, SelfEvolutionConfig, SelfEvolutionEngine, VariantTester
+from test_ollama_client import FakeOllama, start_fake_ollama
+
+GOOD_CODE = "import flask\nimport logging\nimport json\n\napp = flask.Flask(__name__)\n"
+PARTIAL_CODE = "import logging\n\nlogger = logging.getLogger(__name__)\n"
+GENERATE_DELAY = 0.5
+
+
+class StubOllama(FakeOllama):
+    """Answers /api/generate after a delay; only the 'performance' focus gets complete code"""
+
+    def answer(self, prompt):
+        time.sleep(GENERATE_DELAY)
+        return GOOD_CODE if 'Focus on: performance' in prompt else PARTIAL_CODE
+
+
+ANALYTICS = {'user_performance': {'avg_success_rate': 0.5}}
+
+
+@contextmanager
+def static_checks_only():
+    """The stub variants are not runnable services; benchmarking is covered by test_variant_benchmark.py"""
+    enabled = SelfEvolutionConfig.EVOLUTION_BENCHMARK_ENABLED
+    SelfEvolutionConfig.EVOLUTION_BENCHMARK_ENABLED = False
+    try:
+        yield
+    finally:
+        SelfEvolutionConfig.EVOLUTION_BENCHMARK_ENABLED = enabled
+
+
+def make_engine(tmp):
+    """Engine wired to a stub server and a throwaway history"""
+    server = start_fake_ollama(StubOllama)
+    SelfEvolutionConfig.OLLAMA_BASE_URL = server.url
+    engine = SelfEvolutionEngine()
+    engine.history = EvolutionHistory(os.path.join(tmp, 'history.jsonl'))
+    engine._save_variant_for_deployment = lambda variant: None
+    return engine, server
+
+
+def test_population_generated_concurrently_and_best_kept():
+    base_url = SelfEvolutionConfig.OLLAMA_BASE_URL
+    with tempfile.TemporaryDirectory() as tmp:
+        engine, server = make_engine(tmp)
+        try:
+            with static_checks_only():
+                started = time.time()
+                result = engine.evolve(ANALYTICS, population_size=4)
+                elapsed = time.time() - started
+        finally:
+            server.shutdown()
+            SelfEvolutionConfig.OLLAMA_BASE_URL = base_url
+
+        assert elapsed < 4 * GENERATE_DELAY, f"population took {elapsed:.2f}s"
+        assert result['population_size'] == 4
+        assert result['performance_score'] == 1.0 and result['deployed']
+
+        record = engine.history.get_latest_evolution()
+        assert record['variant']['focus'] == 'performance'
+        names = [c['variant_name'] for c in record['tournament']]
+        assert len(set(names)) == 4
+        assert sorted(c['performance_score'] for c in record['tournament']) == [0.4, 0.4, 0.4, 1.0]
+
+
+def test_single_variant_cycle_unchanged():
+    base_url = SelfEvolutionConfig.OLLAMA_BASE_URL
+    with tempfile.TemporaryDirectory() as tmp:
+        engine, server = make_engine(tmp)
+        try:
+            with static_checks_only():
+                result = engine.evolve(ANALYTICS, population_size=1)
+        finally:
+            server.shutdown()
+            SelfEvolutionConfig.OLLAMA_BASE_URL = base_url
+
+        assert result['population_size'] == 1
+        assert 'tournament' not in engine.history.get_latest_evolution()
+
+
+def test_parallel_testing_matches_serial():
+    variants = [
+        {'variant_name': f"v{i}", 'code': code}
+        for i, code in enumerate([GOOD_CODE, PARTIAL_CODE, "def broken(:", GOOD_CODE])
+    ]
+    tester = VariantTester()
+    with static_checks_only():
+        assert tester.test_population(variants, workers=2) == [tester.test_variant(v) for v in variants]
+
+
+def test_cycle_runs_as_background_job():
+    """Submitting a cycle returns at once; the result is polled like an analysis job"""
+    base_url = SelfEvolutionConfig.OLLAMA_BASE_URL
+    with tempfile.TemporaryDirectory() as tmp:
+        engine, server = make_engine(tmp)
+        jobs = EvolutionJobQueue(engine.evolve)
+        try:
+            with static_checks_only():
+                started = time.time()
+                job_id = jobs.submit(analytics_data=ANALYTICS, population_size=2)
+                assert time.time() - started < GENERATE_DELAY / 5
+                assert jobs.get(job_id)['status'] in ('queued', 'running')
+
+                while jobs.get(job_id)['status'] in ('queued', 'running'):
+                    time.sleep(0.05)
+        finally:
+            server.shutdown()
+            SelfEvolutionConfig.OLLAMA_BASE_URL = base_url
+
+        job = jobs.get(job_id)
+        assert job['status'] == 'completed', job
+        assert job['result']['population_size'] == 2 and job['result']['deployed']
+        assert engine.history.count() == 1
+
+
+def test_evolve_route_validates_population_size():
+    """Bad sizes get a 400; good ones are clamped and the synchronous cycle skips benchmarks"""
+    import main as service
+
+    calls = []
+    evolve = service.self_evolution_engine.evolve
+    service.self_evolution_engine.evolve = lambda analytics, size, benchmark=True: calls.append((size, benchmark)) or {}
+    try:
+        client = service.app.test_client()
+        for bad in ('abc', [], {}, True, 2.5):
+            response = client.post('/evolution/evolve', json={'population_size': bad})
+            assert response.status_code == 400, bad
+            assert 'population_size' in response.get_json()['error']
+
+        for size in (0, '3', 100):
+            assert client.post('/evolution/evolve', json={'population_size': size}).status_code == 200
+    finally:
+        service.self_evolution_engine.evolve = evolve
+
+    assert calls == [(1, False), (3, False), (32, False)]
+
+
+def main():
+    """Run all tests"""
+    print("=" * 60)
+    print("Evolution Population Tests")
+    print("=" * 60)
+
+    tests = [
+        test_population_generated_concurrently_and_best_kept,
+        test_single_variant_cycle_unchanged,
+        test_parallel_testing_matches_serial,
+        test_cycle_runs_as_background_job,
+        test_evolve_route_validates_population_size
+    ]
+
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✓ {test.__name__}")
+        except Exception as e:
+            failed += 1
+            print(f"✗ {test.__name__}: {e}")
+
+    print(f"\nTest Results: {len(tests) - failed}/{len(tests)} passed")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,131 @@
+"""
+Tests for per-request generation budgets under load
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from models import CustomAITutor, CustomCodeAnalyzer, GenerationPolicy, GenerationScheduler, ModelConfig
+from test_batching import FakeLoader
+
+BUSY = ModelConfig.BUDGET_BUSY_IN_FLIGHT
+OVERLOADED = ModelConfig.BUDGET_OVERLOAD_IN_FLIGHT
+CODE_QUESTION = "Why does this fail?\nfor i in range(len(items)):\n    print(items[i + 1])"
+
+
+def test_chat_budget_follows_prompt_and_level():
+    policy = GenerationPolicy()
+
+    full = policy.chat_budget(CODE_QUESTION, 'advanced')
+    assert full['max_new_tokens'] == ModelConfig.CHAT_MAX_NEW_TOKENS
+    assert full['do_sample'] and not full['degraded']
+
+    short = policy.chat_budget('What is a loop?', 'advanced')
+    beginner = policy.chat_budget('What is a loop?', 'beginner')
+    assert ModelConfig.CHAT_MIN_NEW_TOKENS <= beginner['max_new_tokens'] <= short['max_new_tokens'] < full['max_new_tokens']
+    assert all(b['max_new_tokens'] % GenerationPolicy.TOKEN_STEP == 0 for b in (full, short, beginner))
+
+
+def test_chat_degrades_with_load_instead_of_timing_out():
+    policy = GenerationPolicy()
+    normal, busy, overloaded = (policy.chat_budget(CODE_QUESTION, 'advanced', load) for load in (0, BUSY, OVERLOADED))
+
+    assert normal['load_level'] == 'normal' and busy['load_level'] == 'busy'
+    assert busy['max_new_tokens'] < normal['max_new_tokens'] and busy['do_sample']
+    assert overloaded['max_new_tokens'] == ModelConfig.CHAT_MIN_NEW_TOKENS
+    assert not overloaded['do_sample'] and overloaded['degraded']
+    assert overloaded['max_time'] < normal['max_time']
+    assert policy.get_stats()['decisions'] == {'normal': 1, 'busy': 1, 'overloaded': 1}
+
+
+def test_code_beams_shrink_with_load():
+    policy = GenerationPolicy()
+    beams = [policy.code_budget(load)['num_beams'] for load in (0, BUSY, OVERLOADED)]
+    assert beams == [ModelConfig.CODE_NUM_BEAMS, ModelConfig.CODE_NUM_BEAMS // 2, 1]
+
+
+def test_fixed_budget_when_disabled():
+    policy = GenerationPolicy()
+    ModelConfig.ADAPTIVE_BUDGETS = False
+    try:
+        budget = policy.chat_budget('hi', 'beginner', OVERLOADED)
+        assert budget['max_new_tokens'] == ModelConfig.CHAT_MAX_NEW_TOKENS
+        assert budget['do_sample'] and not budget['degraded']
+        assert policy.code_budget(OVERLOADED)['num_beams'] == ModelConfig.CODE_NUM_BEAMS
+    finally:
+        ModelConfig.ADAPTIVE_BUDGETS = True
+
+
+def test_tutor_response_reports_budget():
+    """The chosen budget is returned with the reply and the request leaves the in-flight count"""
+    tutor = CustomAITutor()
+    tutor.model_loader = FakeLoader()
+    tutor.scheduler = GenerationScheduler(tutor.model_loader)
+    tutor.policy = GenerationPolicy()
+    for _ in range(OVERLOADED):
+        tutor.policy.begin()
+
+    response = tutor.generate_response('What is a loop?', {'skill_level': 'beginner'})
+
+    assert response['generation']['load_level'] == 'overloaded'
+    assert len(response['message']) <= response['generation']['max_new_tokens']
+    assert tutor.policy.get_stats()['in_flight'] == OVERLOADED
+
+    kwargs = tutor._generation_kwargs(tutor.model_loader.tokenizer, response['generation'])
+    assert not kwargs['do_sample'] and 'temperature' not in kwargs
+
+
+def test_failed_budget_leaves_in_flight_count():
+    """A request that fails while choosing its budget still ends its generation"""
+    class BrokenPolicy(GenerationPolicy):
+        def chat_budget(self, *args):
+            raise RuntimeError("no budget")
+
+        def code_budget(self, *args):
+            raise RuntimeError("no budget")
+
+    tutor = CustomAITutor()
+    tutor.model_loader = FakeLoader()
+    tutor.policy = BrokenPolicy()
+    analyzer = CustomCodeAnalyzer()
+    analyzer.policy = tutor.policy
+
+    assert tutor.generate_response('What is a loop?', {})['model_used'] == 'fallback'
+    assert list(tutor.stream_response('What is a loop?', {}))[-1]['model_used'] == 'fallback'
+    assert analyzer._generate_analysis(CODE_QUESTION, 'python')['model_used'] == 'none'
+    assert [r['model_used'] for r in analyzer._generate_chunk([(CODE_QUESTION, 'python')] * 2)] == ['none', 'none']
+    assert tutor.policy.get_stats()['in_flight'] == 0
+
+
+def main():
+    """Run all tests"""
+    print("=" * 60)
+    print("Generation Policy Tests")
+    print("=" * 60)
+
+    tests = [
+        test_chat_budget_follows_prompt_and_level,
+        test_chat_degrades_with_load_instead_of_timing_out,
+        test_code_beams_shrink_with_load,
+        test_fixed_budget_when_disabled,
+        test_tutor_response_reports_budget,
+        test_failed_budget_leaves_in_flight_count
+    ]
+
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✓ {test.__name__}")
+        except Exception as e:
+            failed += 1
+            print(f"✗ {test.__name__}: {e}")
+
+    print(f"\nTest Results: {len(tests) - failed}/{len(tests)} passed")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,132 @@
+"""
+Tests for the background analysis job queue
+Runs without Redis, using the in-process job store (plus fakeredis where installed)
+"""
+
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from jobs import AnalysisJobQueue, JobQueueFull
+
+try:
+    import fakeredis
+except ImportError:
+    fakeredis = None
+
+
+def wait_for(queue, job_id, timeout=5.0):
+    """Poll a job until it leaves the queued/running states"""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = queue.get(job_id)
+        if job['status'] in ('completed', 'failed'):
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"job {job_id} did not finish")
+
+
+def test_job_result_available_by_id():
+    """Submit returns at once and the result can be polled later"""
+    release = threading.Event()
+
+    def handler(code, language):
+        release.wait(5)
+        return {'length': len(code), 'language': language}
+
+    queue = AnalysisJobQueue(handler, max_workers=1)
+    job_id = queue.submit(code='print(1)', language='python')
+
+    assert queue.get(job_id)['status'] in ('queued', 'running')
+    release.set()
+
+    job = wait_for(queue, job_id)
+    assert job['status'] == 'completed'
+    assert job['result'] == {'length': 8, 'language': 'python'}
+    assert queue.get_stats()['completed'] == 1
+
+
+def test_failed_job_records_error():
+    """A handler exception marks the job failed instead of killing the worker"""
+    def handler(code):
+        raise ValueError("model not loaded")
+
+    queue = AnalysisJobQueue(handler, max_workers=1)
+    job = wait_for(queue, queue.submit(code='x'))
+
+    assert job['status'] == 'failed'
+    assert 'model not loaded' in job['error']
+    assert queue.get_stats()['pending'] == 0
+
+
+def test_unserializable_result_fails_job_in_redis():
+    """A result that cannot be stored as JSON marks the shared record failed, not 'running' forever"""
+    if fakeredis is None:
+        print("  (skipped: fakeredis not installed)")
+        return
+
+    redis_client = fakeredis.FakeRedis()
+    queue = AnalysisJobQueue(lambda code: {'model': object()}, redis_client=redis_client, max_workers=1)
+    job_id = queue.submit(code='x')
+    job = wait_for(queue, job_id)
+
+    assert job['status'] == 'failed' and 'not JSON serializable' in job['error']
+    assert AnalysisJobQueue(lambda: None, redis_client=redis_client).get(job_id)['status'] == 'failed'
+    assert queue.get_stats()['failed'] == 1
+
+
+def test_queue_rejects_when_full():
+    """Submissions beyond max_pending are refused rather than queued forever"""
+    release = threading.Event()
+    queue = AnalysisJobQueue(lambda code: release.wait(5), max_workers=1, max_pending=2)
+
+    queue.submit(code='a')
+    queue.submit(code='b')
+    try:
+        queue.submit(code='c')
+        assert False, "expected JobQueueFull"
+    except JobQueueFull:
+        pass
+    finally:
+        release.set()
+
+    assert queue.get_stats()['rejected'] == 1
+
+
+def test_unknown_job_returns_none():
+    queue = AnalysisJobQueue(lambda: None)
+    assert queue.get('does-not-exist') is None
+
+
+def main():
+    """Run all tests"""
+    print("=" * 60)
+    print("Analysis Job Queue Tests")
+    print("=" * 60)
+
+    tests = [
+        test_job_result_available_by_id,
+        test_failed_job_records_error,
+        test_unserializable_result_fails_job_in_redis,
+        test_queue_rejects_when_full,
+        test_unknown_job_returns_none
+    ]
+
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✓ {test.__name__}")
+        except Exception as e:
+            failed += 1
+            print(f"✗ {test.__name__}: {e}")
+
+    print(f"\nTest Results: {len(tests) - failed}/{len(tests)} passed")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,199 @@
+"""
+Tests for the pooled Ollama client against a local fake Ollama server
+"""
+
+import json
+import os
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from self_evolve import OllamaClient, OllamaError, SelfEvolutionConfig, VariantGenerator
+
+ANSWER = "import flask\nimport logging\nimport json\n\napp = flask.Flask(__name__)\n"
+
+
+class FakeOllama(BaseHTTPRequestHandler):
+    """Local stand-in for the Ollama API: /api/tags and /api/generate
+
+    Generations are streamed as JSON lines over chunked keep-alive responses,
+    like the real server. Behaviour and counters live on the server object
+    (see start_fake_ollama); subclasses may override answer().
+    """
+
+    protocol_version = 'HTTP/1.1'
+
+    def answer(self, prompt):
+        return self.server.answer
+
+    def do_GET(self):
+        self._send_json({'models': [{'name': 'fake'}]})
+
+    def do_POST(self):
+        server = self.server
+        body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        with server.lock:
+            server.requests += 1
+            server.connections.add(self.client_address)
+            fail = server.fail_next > 0
+            server.fail_next -= 1 if fail else 0
+            server.in_flight += 1
+            server.peak_in_flight = max(server.peak_in_flight, server.in_flight)
+
+        try:
+            if fail:
+                self._send_json({'error': 'model is loading'}, 503)
+                return
+            text = self.answer(body['prompt'])
+            if not body.get('stream', True):
+                self._send_json({'response': text, 'done': True})
+                return
+
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/x-ndjson')
+            self.send_header('Transfer-Encoding', 'chunked')
+            self.end_headers()
+            for token in [t for t in re.findall(r'\S*\s*', text) if t]:
+                time.sleep(server.token_delay)
+                self._send_chunk({'response': token, 'done': False})
+            self._send_chunk({'response': '', 'done': True})
+            self.wfile.write(b'0\r\n\r\n')
+        finally:
+            with server.lock:
+                server.in_flight -= 1
+
+    def _send_chunk(self, payload):
+        data = json.dumps(payload).encode() + b'\n'
+        self.wfile.write(f"{len(data):x}\r\n".encode() + data + b'\r\n')
+        self.wfile.flush()
+
+    def _send_json(self, payload, status=200):
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+def start_fake_ollama(handler=FakeOllama, answer=ANSWER, token_delay=0.0, fail_next=0):
+    """Serve the fake API on a free local port; stop it with server.shutdown()"""
+    server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+    server.daemon_threads = True
+    server.url = f"http://127.0.0.1:{server.server_address[1]}"
+    server.lock = threading.Lock()
+    server.answer, server.token_delay, server.fail_next = answer, token_delay, fail_next
+    server.requests, server.in_flight, server.peak_in_flight = 0, 0, 0
+    server.connections = set()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def test_streams_tokens_over_one_connection():
+    server = start_fake_ollama()
+    try:
+        client = OllamaClient(server.url)
+        assert client.is_available()
+        chunks = list(client.generate_stream('write code'))
+        assert len(chunks) > 1 and ''.join(chunks) == ANSWER
+        assert client.generate('again') == ANSWER and client.generate('and again') == ANSWER
+    finally:
+        server.shutdown()
+
+    assert server.requests == 3
+    assert len(server.connections) == 1  # Keep-alive: every generation reused the first connection
+    assert client.get_stats() == {'requests': 3, 'failed': 0, 'in_flight': 0, 'max_concurrency': 4}
+
+
+def test_concurrency_is_bounded():
+    server = start_fake_ollama(token_delay=0.02)
+    try:
+        client = OllamaClient(server.url, max_concurrency=2)
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(client.generate('x'))) for _ in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        server.shutdown()
+
+    assert results == [ANSWER] * 6
+    assert server.peak_in_flight == 2
+    assert len(server.connections) <= 2
+
+
+def test_unavailable_server_retried_with_backoff():
+    backoff = SelfEvolutionConfig.OLLAMA_RETRY_BACKOFF
+    SelfEvolutionConfig.OLLAMA_RETRY_BACKOFF = 0.01
+    server = start_fake_ollama(fail_next=2)
+    try:
+        client = OllamaClient(server.url)
+        assert client.generate('x') == ANSWER
+        assert server.requests == 3
+
+        server.fail_next = SelfEvolutionConfig.OLLAMA_RETRIES + 1
+        try:
+            client.generate('x')
+            assert False, "expected OllamaError"
+        except OllamaError as e:
+            assert '503' in str(e)
+        assert client.get_stats()['failed'] == 1
+    finally:
+        server.shutdown()
+        SelfEvolutionConfig.OLLAMA_RETRY_BACKOFF = backoff
+
+
+def test_generator_streams_variant():
+    base_url = SelfEvolutionConfig.OLLAMA_BASE_URL
+    server = start_fake_ollama()
+    SelfEvolutionConfig.OLLAMA_BASE_URL = server.url
+    try:
+        generator = VariantGenerator()
+        events = list(generator.stream_variant({'improvement_suggestions': ['Cache responses']}, 'performance'))
+        fallback = list(generator.stream_variant({}))
+    finally:
+        server.shutdown()
+        SelfEvolutionConfig.OLLAMA_BASE_URL = base_url
+
+    tokens = [e['text'] for e in events if e['event'] == 'token']
+    assert ''.join(tokens) == ANSWER and events[-1]['event'] == 'done'
+    assert events[-1]['variant']['code'] == ANSWER and events[-1]['variant']['generator'] == 'ollama'
+    assert [e['event'] for e in fallback] == ['done'] and fallback[0]['variant']['generator'] == 'fallback'
+
+
+def main():
+    """Run all tests"""
+    print("=" * 60)
+    print("Ollama Client Tests")
+    print("=" * 60)
+
+    tests = [
+        test_streams_tokens_over_one_connection,
+        test_concurrency_is_bounded,
+        test_unavailable_server_retried_with_backoff,
+        test_generator_streams_variant
+    ]
+
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✓ {test.__name__}")
+        except Exception as e:
+            failed += 1
+            print(f"✗ {test.__name__}: {e}")
+
+    print(f"\nTest Results: {len(tests) - failed}/{len(tests)} passed")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
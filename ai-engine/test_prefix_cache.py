@@ -0,0 +1,179 @@
+"""
+Tests for the tutor prompt prefix KV cache
+Uses a tiny randomly initialised Llama with a character-level tokenizer, so no model download is required
+"""
+
+import os
+import sys
+from contextlib import contextmanager
+
+import torch
+from tokenizers import Tokenizer, models as tokenizer_models, pre_tokenizers
+from transformers import LlamaConfig, LlamaForCausalLM, PreTrainedTokenizerFast
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from models import ModelConfig, PrefixKVCache
+
+PREFIX = "<|system|>\nYou are a patient tutor.\n</s>\n<|user|>\n"
+
+
+def tiny_llama():
+    """Two-layer Llama over printable ASCII, seeded so every run sees the same weights"""
+    vocab = ["<unk>", "<s>", "</s>"] + [chr(c) for c in range(32, 127)] + ["\n"]
+    tokenizer_object = Tokenizer(tokenizer_models.WordLevel({w: i for i, w in enumerate(vocab)}, unk_token="<unk>"))
+    tokenizer_object.pre_tokenizer = pre_tokenizers.Split("", "isolated")
+    tokenizer = PreTrainedTokenizerFast(
+        tokenizer_object=tokenizer_object, unk_token="<unk>", bos_token="<s>", eos_token="</s>"
+    )
+
+    torch.manual_seed(0)
+    config = LlamaConfig(
+        vocab_size=len(vocab), hidden_size=64, intermediate_size=128, num_hidden_layers=2,
+        num_attention_heads=4, num_key_value_heads=4, max_position_embeddings=1024,
+        bos_token_id=1, eos_token_id=2
+    )
+    return LlamaForCausalLM(config).eval(), tokenizer
+
+
+MODEL, TOKENIZER = tiny_llama()
+
+
+@contextmanager
+def prefix_cache_enabled(enabled=True):
+    saved = ModelConfig.PREFIX_CACHE_ENABLED
+    ModelConfig.PREFIX_CACHE_ENABLED = enabled
+    try:
+        yield
+    finally:
+        ModelConfig.PREFIX_CACHE_ENABLED = saved
+
+
+def prompt(message):
+    return PREFIX + f"{message}</s>\n<|assistant|>\n"
+
+
+def kv_tensors(past_key_values):
+    """Key/value tensors of a cache object or legacy tuple"""
+    if hasattr(past_key_values, 'layers'):
+        return [t for layer in past_key_values.layers for t in (layer.keys, layer.values)]
+    if hasattr(past_key_values, 'to_legacy_cache'):
+        past_key_values = past_key_values.to_legacy_cache()
+    return [t for layer in past_key_values for t in layer]
+
+
+def greedy(inputs, max_new_tokens=12):
+    with torch.no_grad():
+        outputs = MODEL.generate(
+            **inputs, max_new_tokens=max_new_tokens, do_sample=False, pad_token_id=TOKENIZER.eos_token_id
+        )
+    return outputs[0, inputs['input_ids'].shape[1]:].tolist()
+
+
+def test_repeated_system_prompt_hits():
+    cache = PrefixKVCache()
+    with prefix_cache_enabled():
+        first = cache.prepare_inputs(MODEL, TOKENIZER, ('patient',), PREFIX, prompt("What is a loop?"))
+        second = cache.prepare_inputs(MODEL, TOKENIZER, ('patient',), PREFIX, prompt("And recursion?"))
+
+    assert 'past_key_values' in first and 'past_key_values' in second
+    prefix_length = len(TOKENIZER(PREFIX)['input_ids'])
+    assert kv_tensors(second['past_key_values'])[0].shape[-2] == prefix_length
+    stats = cache.get_stats()
+    assert (stats['hits'], stats['misses'], stats['entries']) == (1, 1, 1)
+
+
+def test_bypassed_for_other_prefixes_or_when_disabled():
+    cache = PrefixKVCache()
+    other = "<|system|>\nYou are a strict tutor.\n</s>\n<|user|>\nHi</s>\n"
+    with prefix_cache_enabled():
+        # The prompt does not start with the prefix, or speculative decoding needs the whole prompt
+        assert 'past_key_values' not in cache.prepare_inputs(MODEL, TOKENIZER, ('patient',), PREFIX, other)
+        assert 'past_key_values' not in cache.prepare_inputs(
+            MODEL, TOKENIZER, ('patient',), PREFIX, prompt("Hi"), reuse_prefix=False
+        )
+        # Nothing after the prefix is left for generate to prefill
+        assert 'past_key_values' not in cache.prepare_inputs(MODEL, TOKENIZER, ('patient',), PREFIX, PREFIX)
+        assert cache.get_stats()['bypassed'] == 1
+
+        # Same key with a changed prefix text is rebuilt rather than reused
+        cache.prepare_inputs(MODEL, TOKENIZER, ('patient',), PREFIX + "Note: ", prompt("Hi").replace(PREFIX, PREFIX + "Note: "))
+        assert cache.get_stats()['misses'] == 2 and cache.get_stats()['hits'] == 0
+
+    with prefix_cache_enabled(False):
+        inputs = cache.prepare_inputs(MODEL, TOKENIZER, ('patient',), PREFIX, prompt("Hi"))
+    assert 'past_key_values' not in inputs
+    assert cache.get_stats()['misses'] == 2
+
+
+def test_least_recently_used_prefix_evicted():
+    cache = PrefixKVCache(max_entries=2)
+    with prefix_cache_enabled():
+        for key in ('a', 'b', 'a', 'c'):
+            prefix = PREFIX.replace('patient', key)
+            cache.prepare_inputs(MODEL, TOKENIZER, (key,), prefix, prefix + "Hi")
+        stats = cache.get_stats()
+        assert (stats['entries'], stats['evictions'], stats['hits']) == (2, 1, 1)
+
+        # 'b' was least recently used; 'a' is still cached
+        cache.prepare_inputs(MODEL, TOKENIZER, ('a',), PREFIX.replace('patient', 'a'), PREFIX.replace('patient', 'a') + "Hi")
+        cache.prepare_inputs(MODEL, TOKENIZER, ('b',), PREFIX.replace('patient', 'b'), PREFIX.replace('patient', 'b') + "Hi")
+    stats = cache.get_stats()
+    assert (stats['hits'], stats['misses']) == (2, 4)
+
+
+def test_cached_prefix_not_modified_by_generation():
+    cache = PrefixKVCache()
+    with prefix_cache_enabled():
+        cache.prepare_inputs(MODEL, TOKENIZER, ('patient',), PREFIX, prompt("Warm up"))
+        _, _, cached = cache._entries[('patient',)]
+        before = [t.clone() for t in kv_tensors(cached)]
+
+        for message in ("What is a loop?", "What is a list comprehension?"):
+            greedy(cache.prepare_inputs(MODEL, TOKENIZER, ('patient',), PREFIX, prompt(message)))
+
+    after = kv_tensors(cached)
+    assert len(after) == len(before)
+    assert all(torch.equal(a, b) for a, b in zip(after, before))
+
+
+def test_greedy_output_matches_uncached():
+    cache = PrefixKVCache()
+    for message in ("What is a loop?", "Explain recursion with an example"):
+        with prefix_cache_enabled(False):
+            expected = greedy(cache.prepare_inputs(MODEL, TOKENIZER, ('patient',), PREFIX, prompt(message)))
+        with prefix_cache_enabled():
+            reused = greedy(cache.prepare_inputs(MODEL, TOKENIZER, ('patient',), PREFIX, prompt(message)))
+        assert reused == expected, message
+    assert cache.get_stats()['hits'] == 1
+
+
+def main():
+    """Run all tests"""
+    print("=" * 60)
+    print("Prefix KV Cache Tests")
+    print("=" * 60)
+
+    tests = [
+        test_repeated_system_prompt_hits,
+        test_bypassed_for_other_prefixes_or_when_disabled,
+        test_least_recently_used_prefix_evicted,
+        test_cached_prefix_not_modified_by_generation,
+        test_greedy_output_matches_uncached
+    ]
+
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✓ {test.__name__}")
+        except Exception as e:
+            failed += 1
+            print(f"✗ {test.__name__}: {e}")
+
+    print(f"\nTest Results: {len(tests) - failed}/{len(tests)} passed")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,88 @@
+"""
+Tests for the MODEL_QUANTIZATION setting and int8 quantization in ModelLoader
+"""
+
+import logging
+import os
+import sys
+import warnings
+
+import torch
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from models import ModelConfig, ModelLoader, _quantization_mode
+
+
+class RecordingHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.messages = []
+
+    def emit(self, record):
+        self.messages.append(record.getMessage())
+
+
+def test_unknown_mode_warns_and_falls_back():
+    handler = RecordingHandler()
+    models_logger = logging.getLogger('models')
+    models_logger.addHandler(handler)
+    try:
+        assert _quantization_mode(' INT8 ') == 'int8'
+        assert _quantization_mode('bf16') == 'bf16'
+        assert handler.messages == []
+
+        assert _quantization_mode('fp16') == 'none'
+    finally:
+        models_logger.removeHandler(handler)
+
+    assert len(handler.messages) == 1
+    assert "MODEL_QUANTIZATION='fp16'" in handler.messages[0] and 'none, int8, bf16' in handler.messages[0]
+
+
+def test_int8_quantizes_linear_layers_without_deprecation_warnings():
+    mode = ModelConfig.QUANTIZATION
+    model = torch.nn.Sequential(torch.nn.Linear(8, 8), torch.nn.ReLU(), torch.nn.Linear(8, 2)).eval()
+    inputs = torch.randn(3, 8)
+    expected = model(inputs)
+    try:
+        ModelConfig.QUANTIZATION = 'int8'
+        with warnings.catch_warnings():
+            warnings.simplefilter('error')
+            quantized = ModelLoader()._quantize(model)
+
+        ModelConfig.QUANTIZATION = 'none'
+        assert ModelLoader()._quantize(model) is model
+    finally:
+        ModelConfig.QUANTIZATION = mode
+
+    assert type(quantized[0]) is not torch.nn.Linear
+    assert torch.allclose(quantized(inputs), expected, atol=0.1)
+
+
+def main():
+    """Run all tests"""
+    print("=" * 60)
+    print("Quantization Tests")
+    print("=" * 60)
+
+    tests = [
+        test_unknown_mode_warns_and_falls_back,
+        test_int8_quantizes_linear_layers_without_deprecation_warnings
+    ]
+
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✓ {test.__name__}")
+        except Exception as e:
+            failed += 1
+            print(f"✗ {test.__name__}: {e}")
+
+    print(f"\nTest Results: {len(tests) - failed}/{len(tests)} passed")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
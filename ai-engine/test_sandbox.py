@@ -0,0 +1,212 @@
+"""
+Tests for pooled sandbox execution of code test submissions
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from assessment import CodeExecutor, SandboxPool
+
+MAX_OF_LIST = "import ast\nnums = ast.literal_eval(input())\nprint(max(nums))"
+
+
+def test_all_inputs_run_in_order():
+    """Each test input gets its own result, in submission order"""
+    executor = CodeExecutor()
+    results = executor.execute_tests(MAX_OF_LIST, 'python', ['[1, 5, 3]', '[-1, -5]', '[42]'])
+
+    assert [r['output'] for r in results] == ['5', '-1', '42']
+    assert all(r['error'] is None and r['exit_code'] == 0 for r in results)
+
+
+def test_errors_match_subprocess_conventions():
+    """Exceptions, sys.exit codes and syntax errors are reported like a real run"""
+    executor = CodeExecutor()
+
+    raised = executor.execute_code("raise ValueError('bad input')", 'python')
+    assert raised['exit_code'] == 1
+    assert 'ValueError: bad input' in raised['error']
+
+    exited = executor.execute_code("import sys\nprint('partial')\nsys.exit(3)", 'python')
+    assert exited['exit_code'] == 3
+    assert exited['output'] == 'partial'
+
+    broken = executor.execute_code("def (:", 'python')
+    assert 'SyntaxError' in broken['error']
+
+
+def test_timeout_only_fails_the_slow_case():
+    """A hanging case is killed and the remaining cases still run"""
+    executor = CodeExecutor()
+    executor.timeout = 1
+    code = "x = input()\nif x == 'hang':\n    while True:\n        pass\nprint(x)"
+
+    results = executor.execute_tests(code, 'python', ['a', 'hang', 'b'])
+
+    assert [r['output'] for r in results] == ['a', '', 'b']
+    assert results[1]['error'] == 'Execution timeout exceeded'
+
+
+def test_submissions_confined_to_their_directory():
+    """Writes outside the worker's directory, network access and new programs are refused"""
+    executor = CodeExecutor()
+    with tempfile.TemporaryDirectory() as outside:
+        target = os.path.join(outside, 'escaped.txt')
+        results = executor.execute_tests(
+            "import os, socket, subprocess\n"
+            "action = input()\n"
+            "if action == 'local':\n"
+            "    open('notes.txt', 'w').write('ok')\n"
+            "    print(open('notes.txt').read())\n"
+            "elif action == 'outside':\n"
+            f"    open({target!r}, 'w')\n"
+            "elif action == 'network':\n"
+            "    socket.create_connection(('127.0.0.1', 9))\n"
+            "else:\n"
+            "    subprocess.run(['true'])\n",
+            'python', ['local', 'outside', 'network', 'program']
+        )
+        assert not os.path.exists(target)
+
+    assert results[0]['output'] == 'ok' and results[0]['exit_code'] == 0
+    assert all(r['exit_code'] == 1 and 'PermissionError' in r['error'] for r in results[1:])
+
+
+def test_submissions_do_not_leak_state():
+    """Changes to builtins by one submission are gone for the next"""
+    pool = SandboxPool(size=1, max_uses=10)
+    try:
+        pool.run("import builtins\nbuiltins.print = None", [''], 5)
+        assert pool.run("print('still here')", [''], 5)[0]['output'] == 'still here'
+    finally:
+        pool.shutdown()
+
+
+def test_submissions_cannot_tamper_with_later_ones():
+    """Patched worker internals and leftover threads die with the submission's child"""
+    pool = SandboxPool(size=1, max_uses=10)
+    doubled = "print(int(input()) * 2)"
+    try:
+        pool.run("import sys\nsys.modules['__main__']._run_case = lambda *a: {'output': '42', 'error': None, "
+                 "'execution_time': 0, 'exit_code': 0}", [''], 5)
+        assert pool.run(doubled, ['3'], 5)[0]['output'] == '6'
+
+        pool.run("import sys, threading, time\n"
+                 "def inject():\n"
+                 "    while True:\n"
+                 "        sys.stdout.write('INJECT')\n"
+                 "        time.sleep(0.001)\n"
+                 "threading.Thread(target=inject, daemon=True).start()", [''], 5)
+        assert pool.run("import time\ntime.sleep(0.1)\n" + doubled, ['3'], 5)[0]['output'] == '6'
+    finally:
+        pool.shutdown()
+
+
+def test_crashing_case_does_not_stop_the_rest():
+    """A case that kills its process gets an error; later cases run in a new child"""
+    executor = CodeExecutor()
+    executor.max_parallel = 1
+    code = "import os\nx = input()\nif x == 'die':\n    os._exit(7)\nprint(x)"
+
+    results = executor.execute_tests(code, 'python', ['a', 'die', 'b'])
+
+    assert [r['output'] for r in results] == ['a', '', 'b']
+    assert results[1]['error'] == 'Sandbox process exited unexpectedly' and results[1]['exit_code'] == 7
+
+
+def test_workers_recycled_after_max_uses():
+    """A worker is replaced once it has served max_uses submissions"""
+    pool = SandboxPool(size=1, max_uses=2)
+    try:
+        # Submissions run in forked children; the parent is the worker
+        pids = [pool.run("import os\nprint(os.getppid())", [''], 5)[0]['output'] for _ in range(4)]
+        assert pids[0] == pids[1]
+        assert pids[1] != pids[2]
+        assert pids[2] == pids[3]
+    finally:
+        pool.shutdown()
+
+
+def test_cases_run_concurrently():
+    """Wall time follows the slowest case, not the sum of all cases"""
+    executor = CodeExecutor()
+    code = "import time\ntime.sleep(float(input()))\nprint('done')"
+
+    started = time.time()
+    results = executor.execute_tests(code, 'python', ['0.5', '0.5', '0.5', '0.5'])
+    elapsed = time.time() - started
+
+    assert [r['output'] for r in results] == ['done'] * 4
+    assert elapsed < 1.5, f"cases took {elapsed:.2f}s"
+
+
+def test_deadline_fails_unfinished_cases():
+    """Cases still running at the submission deadline are reported, in order"""
+    executor = CodeExecutor()
+    executor.max_parallel = 1
+    executor.deadline = 1.5
+    code = "import time\nx = input()\ntime.sleep(1)\nprint(x)"
+
+    results = executor.execute_tests(code, 'python', ['a', 'b', 'c'])
+
+    assert results[0]['output'] == 'a'
+    assert [r['error'] for r in results[1:]] == ['Submission deadline exceeded'] * 2
+
+
+def test_fail_fast_skips_remaining_cases():
+    """After an erroring case, cases not yet started are marked skipped"""
+    executor = CodeExecutor()
+    executor.max_parallel = 1
+    code = "x = input()\nif x == 'bad':\n    raise ValueError(x)\nprint(x)"
+
+    results = executor.execute_tests(code, 'python', ['a', 'bad', 'c', 'd'], fail_fast=True)
+
+    assert results[0]['output'] == 'a'
+    assert 'ValueError' in results[1]['error']
+    assert all(r.get('skipped') for r in results[2:])
+
+    # The same cases, run in a different order, come back in input order
+    reordered = executor.execute_tests(code, 'python', ['a', 'bad', 'c', 'd'], fail_fast=True, order=[3, 2, 1, 0])
+    assert [r['output'] for r in reordered] == ['', '', 'c', 'd']
+    assert reordered[0].get('skipped')
+
+
+def main():
+    """Run all tests"""
+    print("=" * 60)
+    print("Sandbox Pool Tests")
+    print("=" * 60)
+
+    tests = [
+        test_all_inputs_run_in_order,
+        test_errors_match_subprocess_conventions,
+        test_submissions_confined_to_their_directory,
+        test_timeout_only_fails_the_slow_case,
+        test_submissions_do_not_leak_state,
+        test_submissions_cannot_tamper_with_later_ones,
+        test_crashing_case_does_not_stop_the_rest,
+        test_workers_recycled_after_max_uses,
+        test_cases_run_concurrently,
+        test_deadline_fails_unfinished_cases,
+        test_fail_fast_skips_remaining_cases
+    ]
+
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✓ {test.__name__}")
+        except Exception as e:
+            failed += 1
+            print(f"✗ {test.__name__}: {e}")
+
+    print(f"\nTest Results: {len(tests) - failed}/{len(tests)} passed")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,227 @@
+"""
+Tests for the assessment session stores and JSON migration
+"""
+
+import multiprocessing
+import os
+import subprocess
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from session_store import JsonFileSessionStore, RedisSessionStore, SQLiteSessionStore
+
+try:
+    import fakeredis
+except ImportError:
+    fakeredis = None
+
+SESSIONS = [
+    {'session_id': 'a1', 'user_id': 'alice', 'status': 'completed', 'score': {'percentage': 80}},
+    {'session_id': 'a2', 'user_id': 'alice', 'status': 'in_progress', 'type': 'interview'},
+    {'session_id': 'a3', 'user_id': 'alice', 'status': 'completed', 'type': 'interview', 'total_score': 70},
+    {'session_id': 'b1', 'user_id': 'bob', 'status': 'completed'}
+]
+
+
+def check_store(store):
+    """Behaviour every backend must share"""
+    for session in SESSIONS:
+        store.save(session)
+
+    assert store.load('a1')['score'] == {'percentage': 80}
+    assert store.load('missing') is None
+
+    assert sorted(s['session_id'] for s in store.list_user_sessions('alice')) == ['a1', 'a2', 'a3']
+    assert [s['session_id'] for s in store.list_user_sessions('alice', status='completed', session_type='interview')] == ['a3']
+    assert [s['session_id'] for s in store.list_user_sessions('alice', session_type='code_test')] == ['a1']
+    assert store.list_user_sessions('nobody') == []
+
+    # Saving again updates in place
+    store.save(dict(SESSIONS[1], status='completed'))
+    assert store.load('a2')['status'] == 'completed'
+    assert len(store.list_user_sessions('alice')) == 3
+
+
+def test_sqlite_store():
+    with tempfile.TemporaryDirectory() as tmp:
+        check_store(SQLiteSessionStore(os.path.join(tmp, 'sessions.db')))
+
+
+def test_sqlite_uses_user_index():
+    """User lookups hit the index instead of scanning the table"""
+    with tempfile.TemporaryDirectory() as tmp:
+        store = SQLiteSessionStore(os.path.join(tmp, 'sessions.db'))
+        plan = store._connection().execute(
+            'EXPLAIN QUERY PLAN SELECT data FROM sessions WHERE user_id = ? AND type = ?', ('alice', 'interview')
+        ).fetchall()
+        assert any('idx_sessions_user' in row[-1] for row in plan), plan
+
+
+def test_json_store():
+    with tempfile.TemporaryDirectory() as tmp:
+        check_store(JsonFileSessionStore(tmp))
+
+
+def test_redis_store():
+    if fakeredis is None:
+        print("  (skipped: fakeredis not installed)")
+        return
+    check_store(RedisSessionStore(fakeredis.FakeRedis()))
+
+
+def test_migration_imports_json_files():
+    """migrate_sessions.py copies every JSON session into SQLite and rebuilds the users' aggregates"""
+    with tempfile.TemporaryDirectory() as tmp:
+        source = os.path.join(tmp, 'json')
+        db_path = os.path.join(tmp, 'sessions.db')
+        legacy = JsonFileSessionStore(source)
+        for session in SESSIONS:
+            legacy.save(session)
+        with open(os.path.join(source, 'corrupt.json'), 'w') as f:
+            f.write('{not json')
+        # Aggregates from using the SQLite store before migrating, which know nothing of the JSON sessions
+        SQLiteSessionStore(db_path).save_user_stats('alice', {'user_id': 'alice', 'total_assessments': 1})
+
+        script = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'migrate_sessions.py')
+        for _ in range(2):  # Re-running must not duplicate sessions
+            result = subprocess.run(
+                [sys.executable, script, '--source', source, '--db', db_path],
+                capture_output=True, text=True
+            )
+            assert result.returncode == 0, result.stderr
+            assert 'Migrated 4 sessions for 2 users' in result.stdout
+            assert 'Rebuilt report aggregates for 2 users' in result.stdout
+
+        store = SQLiteSessionStore(db_path)
+        assert len(store.list_user_sessions('alice')) == 3
+        assert store.load('b1')['user_id'] == 'bob'
+
+        alice = store.load_user_stats('alice')
+        assert alice['total_assessments'] == 3
+        assert alice['code_tests']['count'] == 1 and alice['interviews']['count'] == 1
+        assert store.load_user_stats('bob')['total_assessments'] == 1
+
+
+def increment(stats):
+    stats = stats or {'count': 0}
+    stats['count'] += 1
+    return stats
+
+
+def increment_many(store, times):
+    for _ in range(times):
+        store.update_user_stats('dana', increment)
+
+
+def check_concurrent_stats_updates(store):
+    """Processes updating the same user's aggregates lose no update"""
+    processes = [multiprocessing.get_context('fork').Process(target=increment_many, args=(store, 25)) for _ in range(4)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+    assert store.load_user_stats('dana') == {'count': 100}
+
+    store.update_user_stats('dana', lambda stats: None)  # Nothing to save
+    assert store.load_user_stats('dana') == {'count': 100}
+
+
+def test_sqlite_stats_updates_are_atomic():
+    with tempfile.TemporaryDirectory() as tmp:
+        check_concurrent_stats_updates(SQLiteSessionStore(os.path.join(tmp, 'sessions.db')))
+
+
+def test_json_stats_updates_are_atomic():
+    with tempfile.TemporaryDirectory() as tmp:
+        check_concurrent_stats_updates(JsonFileSessionStore(tmp))
+
+
+def test_redis_stats_update_retries_on_conflict():
+    if fakeredis is None:
+        print("  (skipped: fakeredis not installed)")
+        return
+    server = fakeredis.FakeServer()
+    store, other_worker = RedisSessionStore(fakeredis.FakeRedis(server=server)), RedisSessionStore(fakeredis.FakeRedis(server=server))
+    store.save_user_stats('dana', {'count': 1})
+    calls = []
+
+    def conflicting_increment(stats):
+        calls.append(stats['count'])
+        if len(calls) == 1:
+            other_worker.save_user_stats('dana', {'count': 10})  # Lands between our read and write
+        return increment(stats)
+
+    store.update_user_stats('dana', conflicting_increment)
+    assert calls == [1, 10]
+    assert store.load_user_stats('dana') == {'count': 11}
+
+
+def test_report_aggregates_are_incremental():
+    """Reports come from running aggregates that match a full rebuild"""
+    from assessment import AssessmentEngine
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = SQLiteSessionStore(os.path.join(tmp, 'sessions.db'))
+        engine = AssessmentEngine(session_store=store)
+
+        session_id = engine.start_code_test('carol', 'junior', 'arrays')['session_id']
+        engine.submit_code_test(session_id, "print('wrong')", 'python')
+        engine.submit_code_test(session_id, "print('still wrong')", 'python')  # Replaces, not adds
+        interview = engine.start_interview('carol', 'junior')
+        question = interview['questions'][0]
+        engine.submit_interview_answer(interview['session_id'], question['id'], 'memory and access time')
+        engine.complete_interview(interview['session_id'])
+
+        report = engine.get_user_report('carol')
+        assert report['total_assessments'] == 2
+        assert report['completed_tests'] == 1
+        assert report['completed_interviews'] == 1
+        assert [h['type'] for h in report['recent_assessments']] == ['code_test', 'interview']
+        assert 'Problem solving' in report['weak_areas']
+
+        # Dropping the aggregates forces a rebuild from the sessions
+        store._connection().execute('DELETE FROM user_stats')
+        store._connection().commit()
+        rebuilt = engine.get_user_report('carol')
+        for key in ('total_assessments', 'average_test_score', 'average_interview_score',
+                    'topic_scores', 'strong_areas', 'weak_areas'):
+            assert rebuilt[key] == report[key], key
+
+        assert 'error' in engine.get_user_report('nobody')
+
+
+def main():
+    """Run all tests"""
+    print("=" * 60)
+    print("Session Store Tests")
+    print("=" * 60)
+
+    tests = [
+        test_sqlite_store,
+        test_sqlite_uses_user_index,
+        test_json_store,
+        test_redis_store,
+        test_migration_imports_json_files,
+        test_sqlite_stats_updates_are_atomic,
+        test_json_stats_updates_are_atomic,
+        test_redis_stats_update_retries_on_conflict,
+        test_report_aggregates_are_incremental
+    ]
+
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✓ {test.__name__}")
+        except Exception as e:
+            failed += 1
+            print(f"✗ {test.__name__}: {e}")
+
+    print(f"\nTest Results: {len(tests) - failed}/{len(tests)} passed")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,145 @@
+"""
+Tests for the Redis-backed tutor response cache
+"""
+
+import os
+import sys
+from contextlib import contextmanager
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from caching import CacheConfig, TutorResponseCache
+
+try:
+    import fakeredis
+except ImportError:
+    fakeredis = None
+
+CONTEXT = {'skill_level': 'beginner', 'current_topic': 'lists'}
+QUESTION = "How do I reverse a list in Python?"
+RESPONSE = {'response': 'Use reversed() or slicing.', 'model_used': 'custom-tutor', 'generation': {'degraded': False}}
+
+
+@contextmanager
+def tutor_cache(similarity=False, threshold=0.8):
+    """A fresh cache over fakeredis, with the similarity settings given"""
+    names = ('TUTOR_CACHE_ENABLED', 'TUTOR_CACHE_SIMILARITY_ENABLED', 'TUTOR_CACHE_SIMILARITY_THRESHOLD')
+    saved = {name: getattr(CacheConfig, name) for name in names}
+    CacheConfig.TUTOR_CACHE_ENABLED = True
+    CacheConfig.TUTOR_CACHE_SIMILARITY_ENABLED = similarity
+    CacheConfig.TUTOR_CACHE_SIMILARITY_THRESHOLD = threshold
+    try:
+        yield TutorResponseCache(fakeredis.FakeRedis())
+    finally:
+        for name, value in saved.items():
+            setattr(CacheConfig, name, value)
+
+
+def skip_without_fakeredis():
+    if fakeredis is None:
+        print("  (skipped: fakeredis not installed)")
+        return True
+    return False
+
+
+def test_exact_hit_after_normalization():
+    if skip_without_fakeredis():
+        return
+    with tutor_cache() as cache:
+        assert cache.get(QUESTION, CONTEXT, 'encouraging') is None
+        cache.set(QUESTION, CONTEXT, 'encouraging', RESPONSE)
+
+        hit = cache.get("  how do i REVERSE a list in python ", CONTEXT, 'encouraging')
+        # The generation budget of the original request is not replayed
+        assert hit == {'response': RESPONSE['response'], 'model_used': 'custom-tutor', 'cache': 'exact'}
+        # Without similarity lookup a reworded question is a miss
+        assert cache.get("How do I reverse lists in Python?", CONTEXT, 'encouraging') is None
+
+
+def test_similar_question_hits_above_threshold_only():
+    if skip_without_fakeredis():
+        return
+    with tutor_cache(similarity=True) as cache:
+        cache.set(QUESTION, CONTEXT, 'encouraging', RESPONSE)
+        cache.set("What does a dictionary comprehension look like?", CONTEXT, 'encouraging', dict(RESPONSE, response='dict'))
+
+        hit = cache.get("how can I reverse lists in python", CONTEXT, 'encouraging')
+        assert hit is not None and hit['cache'] == 'similar' and hit['response'] == RESPONSE['response']
+        assert cache.get("How do I reverse a string?", CONTEXT, 'encouraging') is None
+
+    with tutor_cache(similarity=True, threshold=1.01) as cache:
+        cache.set(QUESTION, CONTEXT, 'encouraging', RESPONSE)
+        assert cache.get("how can I reverse lists in python", CONTEXT, 'encouraging') is None
+
+
+def test_personality_and_context_isolated():
+    if skip_without_fakeredis():
+        return
+    with tutor_cache(similarity=True) as cache:
+        cache.set(QUESTION, CONTEXT, 'encouraging', RESPONSE)
+
+        assert cache.get(QUESTION, CONTEXT, 'socratic') is None
+        assert cache.get(QUESTION, dict(CONTEXT, skill_level='advanced'), 'encouraging') is None
+        assert cache.get(QUESTION, dict(CONTEXT, current_topic='recursion'), 'encouraging') is None
+        assert cache.get(QUESTION, CONTEXT, 'encouraging') is not None
+
+
+def test_fallback_and_degraded_responses_not_stored():
+    if skip_without_fakeredis():
+        return
+    with tutor_cache() as cache:
+        cache.set(QUESTION, CONTEXT, 'encouraging', dict(RESPONSE, model_used='fallback'))
+        cache.set(QUESTION, CONTEXT, 'encouraging', {'response': 'no model recorded'})
+        cache.set(QUESTION, CONTEXT, 'encouraging', dict(RESPONSE, generation={'degraded': True}))
+
+        assert cache.get(QUESTION, CONTEXT, 'encouraging') is None
+        assert cache.get_stats()['stores'] == 0
+
+
+def test_stats_count_hits_and_misses():
+    if skip_without_fakeredis():
+        return
+    with tutor_cache(similarity=True) as cache:
+        cache.get(QUESTION, CONTEXT, 'encouraging')
+        cache.set(QUESTION, CONTEXT, 'encouraging', RESPONSE)
+        cache.get(QUESTION, CONTEXT, 'encouraging')
+        cache.get("how can I reverse lists in python", CONTEXT, 'encouraging')
+        cache.get("Explain recursion", CONTEXT, 'encouraging')
+
+        # Counters live in Redis, so every worker sees the same numbers
+        stats = TutorResponseCache(cache.redis).get_stats()
+
+    assert stats['enabled'] and stats['similarity_enabled']
+    assert (stats['hits_exact'], stats['hits_similar'], stats['misses'], stats['stores']) == (1, 1, 2, 1)
+    assert stats['hit_ratio'] == 0.5
+
+
+def main():
+    """Run all tests"""
+    print("=" * 60)
+    print("Tutor Response Cache Tests")
+    print("=" * 60)
+
+    tests = [
+        test_exact_hit_after_normalization,
+        test_similar_question_hits_above_threshold_only,
+        test_personality_and_context_isolated,
+        test_fallback_and_degraded_responses_not_stored,
+        test_stats_count_hits_and_misses
+    ]
+
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✓ {test.__name__}")
+        except Exception as e:
+            failed += 1
+            print(f"✗ {test.__name__}: {e}")
+
+    print(f"\nTest Results: {len(tests) - failed}/{len(tests)} passed")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,167 @@
+"""
+Tests for streaming tutor responses and the /ai-tutor/chat/stream route
+Builds on the fake model/tokenizer from test_batching.py, so no model download is required
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+import torch
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from models import CustomAITutor, ModelConfig
+from test_batching import FakeLoader, FakeModel, FakeTokenizer
+
+ANSWER = "Use a for loop and write a test for each function. "
+
+
+class StreamingTokenizer(FakeTokenizer):
+    padding_side = 'left'
+
+    def decode(self, ids, skip_special_tokens=True, **kwargs):
+        return self.batch_decode([ids])[0]
+
+
+class StreamingModel(FakeModel):
+    """Feeds ANSWER to the streamer one character per step, honouring the stopping criteria"""
+
+    def __init__(self, answer=ANSWER, token_delay=0.0):
+        super().__init__()
+        self.answer = answer
+        self.token_delay = token_delay
+        self.steps = 0
+        self.finished = threading.Event()
+
+    def generate(self, input_ids, attention_mask, streamer=None, stopping_criteria=None, **kwargs):
+        streamer.put(input_ids)
+        try:
+            for char in self.answer:
+                if stopping_criteria(input_ids, None).all():
+                    break
+                time.sleep(self.token_delay)
+                token = torch.tensor([[ord(char)]])
+                input_ids = torch.cat([input_ids, token], dim=1)
+                streamer.put(token[0])
+                self.steps += 1
+            streamer.end()
+            return input_ids
+        finally:
+            self.finished.set()
+
+
+class StreamingLoader(FakeLoader):
+    def __init__(self, model):
+        super().__init__()
+        self.model = model
+        self.tokenizer = StreamingTokenizer()
+
+
+@contextmanager
+def streaming_tutor(answer=ANSWER, token_delay=0.0):
+    """CustomAITutor over the streaming fake model (prefix reuse needs a real model)"""
+    enabled = ModelConfig.PREFIX_CACHE_ENABLED
+    ModelConfig.PREFIX_CACHE_ENABLED = False
+    model = StreamingModel(answer, token_delay)
+    tutor = CustomAITutor()
+    tutor.model_loader = StreamingLoader(model)
+    try:
+        yield tutor, model
+    finally:
+        ModelConfig.PREFIX_CACHE_ENABLED = enabled
+
+
+def sse_events(chunks):
+    """(event, data) pairs from an iterable of Server-Sent Events chunks"""
+    for block in b''.join(chunks).decode().strip().split('\n\n'):
+        name, data = block.split('\n')
+        yield name[len('event: '):], json.loads(data[len('data: '):])
+
+
+def test_tokens_then_done_with_metadata():
+    with streaming_tutor() as (tutor, model):
+        events = list(tutor.stream_response("How do loops work?", {'skill_level': 'beginner'}))
+
+    tokens = [e for e in events if e['event'] == 'token']
+    assert len(tokens) > 1 and all(e['text'] for e in tokens)
+    assert ''.join(e['text'] for e in tokens) == ANSWER
+    assert [e['event'] for e in events] == ['token'] * len(tokens) + ['done']
+
+    done = events[-1]
+    assert done['message'] == tutor._clean_response(ANSWER) and done['model_used'] == 'TinyLlama-1.1B'
+    assert "Consider using appropriate loop structures" in done['suggestions']
+    assert done['resources'] and done['generation']['max_new_tokens'] > 0
+    assert model.steps == len(ANSWER)
+
+
+def test_disconnect_cancels_generation():
+    with streaming_tutor(answer='word ' * 200, token_delay=0.005) as (tutor, model):
+        stream = tutor.stream_response("How do loops work?", {})
+        assert next(stream)['event'] == 'token'
+        stream.close()  # What Flask does when the client goes away
+
+        assert model.finished.wait(5)
+    assert model.steps < 100  # Stopped by _CancelGeneration, not by running out of answer
+
+
+def test_stream_route_sends_sse_and_stops_on_disconnect():
+    import main as engine
+
+    saved = engine.get_custom_tutor, engine.ai_tutor.response_cache.enabled
+    engine.ai_tutor.response_cache.enabled = False
+    try:
+        with streaming_tutor() as (tutor, model):
+            engine.get_custom_tutor = lambda: tutor
+            client = engine.app.test_client()
+
+            assert client.post('/ai-tutor/chat/stream', json={}).status_code == 400
+
+            response = client.post('/ai-tutor/chat/stream', json={'message': 'How do loops work?'})
+            assert response.mimetype == 'text/event-stream'
+            events = list(sse_events(response.response))
+            assert events[-1][0] == 'done' and events[-1][1]['message'] == tutor._clean_response(ANSWER)
+            assert ''.join(data['text'] for name, data in events if name == 'token') == ANSWER
+
+        with streaming_tutor(answer='word ' * 200, token_delay=0.005) as (tutor, model):
+            engine.get_custom_tutor = lambda: tutor
+            response = client.post('/ai-tutor/chat/stream', json={'message': 'How do loops work?'}, buffered=False)
+            assert next(iter(response.response)).startswith(b'event: token')
+            response.close()
+
+            assert model.finished.wait(5)
+        assert model.steps < 100  # Stopped by _CancelGeneration, not by running out of answer
+    finally:
+        engine.get_custom_tutor, engine.ai_tutor.response_cache.enabled = saved
+
+
+def main():
+    """Run all tests"""
+    print("=" * 60)
+    print("Tutor Streaming Tests")
+    print("=" * 60)
+
+    tests = [
+        test_tokens_then_done_with_metadata,
+        test_disconnect_cancels_generation,
+        test_stream_route_sends_sse_and_stops_on_disconnect
+    ]
+
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✓ {test.__name__}")
+        except Exception as e:
+            failed += 1
+            print(f"✗ {test.__name__}: {e}")
+
+    print(f"\nTest Results: {len(tests) - failed}/{len(tests)} passed")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
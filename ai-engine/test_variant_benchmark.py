@@ -0,0 +1,267 @@
+"""
+Tests for measured variant benchmarking in VariantTester
+Small Flask modules stand in for the service: the baseline answers each route
+after a fixed delay and the variants are faster, slower, heavier or broken.
+"""
+
+import json
+import os
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from self_evolve import SelfEvolutionConfig, SelfEvolutionEngine, VariantTester
+
+SERVICE = '''import json
+import logging
+import time
+from flask import Flask, jsonify, request
+
+app = Flask(__name__)
+BALLAST = b'x' * ({ballast_mb} * 1024 * 1024)
+
+
+@app.route('/health')
+def health():
+    time.sleep({delay})
+    return jsonify({{'status': 'healthy'}})
+
+
+@app.route('/echo', methods=['POST'])
+def echo():
+    time.sleep({delay})
+    message = (request.get_json() or {{}}).get('message')
+    if not message:
+        return jsonify({{'error': 'Message is required'}}), 400
+    return jsonify({{'message': message}})
+'''
+
+REPLAY = [
+    {'method': 'GET', 'path': '/health', 'status': 200},
+    {'method': 'POST', 'path': '/echo', 'json': {'message': 'hi'}, 'status': 200},
+    {'method': 'POST', 'path': '/echo', 'json': {'message': ''}, 'status': 400}
+]
+
+
+def service(delay=0.005, ballast_mb=0):
+    return SERVICE.format(delay=delay, ballast_mb=ballast_mb)
+
+
+@contextmanager
+def benchmark_setup():
+    """Point the tester at a temporary baseline module and replay file"""
+    names = ('EVOLUTION_BENCHMARK_ENABLED', 'EVOLUTION_BASELINE_MODULE', 'EVOLUTION_REPLAY_FILE',
+             'EVOLUTION_BENCH_ROUNDS', 'EVOLUTION_BENCH_WARMUP_ROUNDS')
+    saved = {name: getattr(SelfEvolutionConfig, name) for name in names}
+    with tempfile.TemporaryDirectory() as tmp:
+        baseline_path = os.path.join(tmp, 'baseline.py')
+        with open(baseline_path, 'w') as f:
+            f.write(service())
+        replay_path = os.path.join(tmp, 'replay.json')
+        with open(replay_path, 'w') as f:
+            json.dump(REPLAY, f)
+
+        SelfEvolutionConfig.EVOLUTION_BENCHMARK_ENABLED = True
+        SelfEvolutionConfig.EVOLUTION_BASELINE_MODULE = baseline_path
+        SelfEvolutionConfig.EVOLUTION_REPLAY_FILE = replay_path
+        SelfEvolutionConfig.EVOLUTION_BENCH_ROUNDS = 10
+        SelfEvolutionConfig.EVOLUTION_BENCH_WARMUP_ROUNDS = 1
+        try:
+            yield replay_path
+        finally:
+            for name, value in saved.items():
+                setattr(SelfEvolutionConfig, name, value)
+
+
+def should_deploy(test_results):
+    # _should_deploy_variant only reads the test results
+    return SelfEvolutionEngine._should_deploy_variant(None, test_results)
+
+
+def test_faster_variant_measured_and_deployed():
+    with benchmark_setup():
+        results = VariantTester().test_variant({'variant_name': 'fast', 'code': service(delay=0.001)})
+
+    benchmark = results['benchmark']
+    assert benchmark['requests'] == 30 and benchmark['failed'] == 0
+    assert set(benchmark['endpoints']) == {'/health', '/echo'}
+    assert benchmark['p50_ms'] <= benchmark['p95_ms'] and benchmark['peak_rss_mb'] > 0
+    assert results['tests_passed'] == 5 + 30 and results['tests_failed'] == 0
+    assert results['comparison']['p95_ratio'] < 1 < results['comparison']['throughput_ratio']
+    assert results['performance_score'] > 1.0
+    assert should_deploy(results)
+
+
+def test_regressions_rejected():
+    with benchmark_setup():
+        tester = VariantTester()
+        slower = tester.test_variant({'variant_name': 'slow', 'code': service(delay=0.02)})
+        heavier = tester.test_variant({'variant_name': 'heavy', 'code': service(ballast_mb=200)})
+        wrong = tester.test_variant({'variant_name': 'wrong', 'code': service().replace("), 400", "), 200")})
+
+    assert slower['comparison']['p95_ratio'] > 1.5 and slower['performance_score'] < 1.0
+    assert not should_deploy(slower)
+    assert heavier['comparison']['rss_ratio'] > 1 + SelfEvolutionConfig.EVOLUTION_MAX_RSS_REGRESSION
+    assert not should_deploy(heavier)
+    assert wrong['benchmark']['failed'] == 10 and wrong['tests_failed'] == 10
+    assert any('/echo: status 200, expected 400' in e for e in wrong['errors'])
+    assert not should_deploy(wrong)
+
+
+def test_variant_that_fails_to_import_scores_zero():
+    with benchmark_setup():
+        tester = VariantTester()
+        results = tester.test_variant({'variant_name': 'broken', 'code': 'import flask, logging, json\nimport no_such_module\napp = None\n'})
+
+    assert results['compiles'] and results['performance_score'] == 0.0
+    assert 'no_such_module' in results['benchmark']['error']
+    assert not should_deploy(results)
+    # The variant failed, so the baseline was never run
+    assert 'baseline' not in results and tester._baseline is None
+
+
+def test_variants_without_an_app_not_benchmarked():
+    fallback = {'variant_name': 'fallback', 'code': '# Fallback variant - no improvements available'}
+    with benchmark_setup():
+        tester = VariantTester()
+        results = tester.test_variant(fallback)
+        factory = tester.test_population([{
+            'variant_name': 'factory',
+            'code': service().replace('app = Flask(__name__)', 'def create_app():\n    return Flask(__name__)')
+        }], benchmark=False)[0]
+
+    assert results['compiles'] and not results['serves_requests']
+    assert 'No module-level Flask app defined' in results['errors']
+    assert 'benchmark' not in results and tester._baseline is None
+    assert factory['serves_requests'] and 'benchmark' not in factory
+
+
+def test_fallback_replies_and_caches_do_not_count():
+    """Replies built without a model fail, and the service runs with caches and Redis off"""
+    environment_check = (
+        "import os\n"
+        "assert os.environ['TUTOR_CACHE_ENABLED'] == os.environ['ANALYSIS_CACHE_ENABLED'] == 'false'\n"
+        "assert os.environ['REDIS_URL'] == ''\n"
+    )
+    with benchmark_setup():
+        tester = VariantTester()
+        fallback = tester.test_variant({
+            'variant_name': 'fallback',
+            'code': service().replace("{'message': message}", "{'message': message, 'model_used': 'fallback'}")
+        })
+        isolated = tester.test_variant({'variant_name': 'isolated', 'code': environment_check + service()})
+
+    assert fallback['benchmark']['failed'] == 10
+    assert any('model_used=fallback' in e for e in fallback['errors'])
+    assert not should_deploy(fallback)
+    assert 'error' not in isolated['benchmark'] and isolated['benchmark']['failed'] == 0
+
+
+def test_variants_get_no_secrets_and_bounded_memory():
+    """Only allow-listed environment reaches the worker, and its address space is capped"""
+    os.environ['BENCH_TEST_API_KEY'] = 'secret'
+    memory_mb = SelfEvolutionConfig.EVOLUTION_BENCH_MEMORY_MB
+    try:
+        with benchmark_setup():
+            tester = VariantTester()
+            snooping = tester.test_variant({
+                'variant_name': 'snooping',
+                'code': "import os\nassert 'BENCH_TEST_API_KEY' not in os.environ\n" + service()
+            })
+            SelfEvolutionConfig.EVOLUTION_BENCH_MEMORY_MB = 1024
+            greedy = tester.test_variant({'variant_name': 'greedy', 'code': service(ballast_mb=2048)})
+    finally:
+        del os.environ['BENCH_TEST_API_KEY']
+        SelfEvolutionConfig.EVOLUTION_BENCH_MEMORY_MB = memory_mb
+
+    assert 'error' not in snooping['benchmark'] and snooping['benchmark']['failed'] == 0
+    assert 'MemoryError' in greedy['benchmark']['error']
+    assert not should_deploy(greedy)
+
+
+def test_variants_confined_to_scratch():
+    """The variant gets a scratch HOME and cwd, and cannot write elsewhere or reach the network"""
+    with tempfile.TemporaryDirectory() as outside:
+        target = os.path.join(outside, 'escaped.txt')
+        probes = {
+            'home': "assert os.environ['HOME'] == tempfile.gettempdir()\n"
+                    "open('notes.txt', 'w').close()\n",
+            'outside': f"open({target!r}, 'w')\n",
+            'network': "import socket\nsocket.create_connection(('127.0.0.1', 9))\n",
+            'program': "import subprocess\nsubprocess.run(['true'])\n"
+        }
+        with benchmark_setup():
+            tester = VariantTester()
+            results = {
+                name: tester.test_variant({'variant_name': name, 'code': "import os, tempfile\n" + probe + service()})
+                for name, probe in probes.items()
+            }
+        assert not os.path.exists(target)
+
+    assert 'error' not in results['home']['benchmark'] and results['home']['benchmark']['failed'] == 0
+    for name in ('outside', 'network', 'program'):
+        assert 'PermissionError' in results[name]['benchmark']['error'], name
+
+
+def test_population_benchmarks_keep_input_order():
+    variants = [
+        {'variant_name': 'fast', 'code': service(delay=0.001)},
+        {'variant_name': 'broken', 'code': 'import flask, logging, json\nimport no_such_module\napp = None\n'},
+        {'variant_name': 'wrong', 'code': service().replace("), 400", "), 200")}
+    ]
+    with benchmark_setup():
+        results = VariantTester().test_population(variants, workers=2)
+
+    assert [r['variant_id'] for r in results] == ['fast', 'broken', 'wrong']
+    assert results[0]['benchmark']['failed'] == 0
+    assert 'no_such_module' in results[1]['benchmark']['error']
+    assert results[2]['benchmark']['failed'] == 10
+
+
+def test_baseline_cached_until_inputs_change():
+    with benchmark_setup() as replay_path:
+        tester = VariantTester()
+        first = tester.baseline()
+        assert 'error' not in first and tester.baseline() is first
+
+        later = time.time() + 5
+        os.utime(replay_path, (later, later))
+        assert tester.baseline() is not first
+
+
+def main():
+    """Run all tests"""
+    print("=" * 60)
+    print("Variant Benchmark Tests")
+    print("=" * 60)
+
+    tests = [
+        test_faster_variant_measured_and_deployed,
+        test_regressions_rejected,
+        test_variant_that_fails_to_import_scores_zero,
+        test_variants_without_an_app_not_benchmarked,
+        test_fallback_replies_and_caches_do_not_count,
+        test_variants_get_no_secrets_and_bounded_memory,
+        test_variants_confined_to_scratch,
+        test_population_benchmarks_keep_input_order,
+        test_baseline_cached_until_inputs_change
+    ]
+
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✓ {test.__name__}")
+        except Exception as e:
+            failed += 1
+            print(f"✗ {test.__name__}: {e}")
+
+    print(f"\nTest Results: {len(tests) - failed}/{len(tests)} passed")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,165 @@
+"""
+Variant Benchmark Worker
+Imports one service module (an evolved variant or the current main.py) in a
+fresh interpreter and replays recorded API requests against its Flask test
+client. Started by self_evolve.VariantTester; not meant to be run by hand.
+
+Usage: python variant_bench_worker.py <module_path> <replay_json> <result_json> <rounds> <warmup_rounds>
+
+The caller sets the environment (an allow-list), the resource limits and a
+scratch working directory, HOME and TMPDIR. Before the module is imported,
+sandbox_worker.confine() refuses writes outside the working and temp
+directories, network access and new programs, as for assessment
+submissions. That is hardening against mistakes in generated code, not
+isolation: see confine().
+
+The module must expose a Flask ``app`` or a ``create_app()`` factory. The
+result file receives one JSON object:
+  {"requests": int, "passed": int, "failed": int, "p50_ms": float, "p95_ms": float,
+   "throughput_rps": float, "peak_rss_mb": float, "endpoints": {path: {...}}, "failures": [...]}
+or {"error": str} if the module could not be loaded.
+"""
+
+import os
+import sys
+import json
+import math
+import time
+import resource
+import importlib.util
+import tempfile
+import traceback
+
+from sandbox_worker import confine
+
+ENGINE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# model_used values of replies produced because the model failed to load or run
+FALLBACK_MODELS = ('fallback', 'none')
+
+
+def _load_app(module_path: str):
+    """Import the module under test and return its Flask app"""
+    # Variants may import the engine's own modules (models, caching, ...)
+    sys.path.insert(0, ENGINE_DIR)
+    sys.path.insert(0, os.path.dirname(os.path.abspath(module_path)))
+    spec = importlib.util.spec_from_file_location('variant_under_test', module_path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+
+    app = getattr(module, 'app', None)
+    if app is None and callable(getattr(module, 'create_app', None)):
+        app = module.create_app()
+    if app is None or not hasattr(app, 'test_client'):
+        raise ValueError("module defines neither a Flask 'app' nor create_app()")
+    app.testing = True
+    return app
+
+
+def _peak_rss_mb() -> float:
+    """Peak resident memory of this process"""
+    # ru_maxrss survives exec, so it would report a larger parent's peak; VmHWM starts fresh
+    try:
+        with open('/proc/self/status', 'r') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024.0
+    except OSError:
+        pass
+    # ru_maxrss is in KB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+
+
+def _fallback_model(payload):
+    """The model_used value of a reply served without a model, if any"""
+    if isinstance(payload, dict):
+        if payload.get('model_used') in FALLBACK_MODELS:
+            return payload['model_used']
+        payload = list(payload.values())
+    if isinstance(payload, list):
+        for value in payload:
+            found = _fallback_model(value)
+            if found is not None:
+                return found
+    return None
+
+
+def _percentile(values, pct: float) -> float:
+    """Nearest-rank percentile of a non-empty list"""
+    ordered = sorted(values)
+    return ordered[max(1, math.ceil(pct / 100.0 * len(ordered))) - 1]
+
+
+def _replay(client, replay, rounds: int, warmup_rounds: int) -> dict:
+    for _ in range(warmup_rounds):
+        for entry in replay:
+            client.open(entry['path'], method=entry.get('method', 'GET'), json=entry.get('json'))
+
+    latencies, per_path, failures = [], {}, []
+    started = time.perf_counter()
+    for _ in range(rounds):
+        for entry in replay:
+            t0 = time.perf_counter()
+            try:
+                response = client.open(entry['path'], method=entry.get('method', 'GET'), json=entry.get('json'))
+                status = response.status_code
+            except Exception as e:
+                response, status = None, None
+                failures.append(f"{entry['path']}: {type(e).__name__}: {e}")
+            elapsed_ms = (time.perf_counter() - t0) * 1000
+
+            ok = status is not None and status < 500 and status == entry.get('status', status)
+            if status is not None and not ok:
+                failures.append(f"{entry['path']}: status {status}, expected {entry.get('status', '< 500')}")
+            elif ok:
+                # A 200 built from a fallback says nothing about the variant's model path
+                fallback = _fallback_model(response.get_json(silent=True))
+                if fallback is not None:
+                    ok = False
+                    failures.append(f"{entry['path']}: answered without a model (model_used={fallback})")
+            latencies.append(elapsed_ms)
+            stats = per_path.setdefault(entry['path'], {'latencies': [], 'failed': 0})
+            stats['latencies'].append(elapsed_ms)
+            stats['failed'] += 0 if ok else 1
+    total = time.perf_counter() - started
+
+    return {
+        'requests': len(latencies),
+        'passed': len(latencies) - sum(s['failed'] for s in per_path.values()),
+        'failed': sum(s['failed'] for s in per_path.values()),
+        'p50_ms': _percentile(latencies, 50),
+        'p95_ms': _percentile(latencies, 95),
+        'throughput_rps': len(latencies) / total if total > 0 else 0.0,
+        'endpoints': {
+            path: {
+                'p50_ms': _percentile(s['latencies'], 50),
+                'p95_ms': _percentile(s['latencies'], 95),
+                'failed': s['failed']
+            }
+            for path, s in per_path.items()
+        },
+        'failures': failures[:20]
+    }
+
+
+def main():
+    module_path, replay_path, result_path = sys.argv[1:4]
+    rounds, warmup_rounds = int(sys.argv[4]), int(sys.argv[5])
+
+    with open(replay_path, 'r') as f:
+        replay = json.load(f)
+    confine([os.getcwd(), tempfile.gettempdir()])
+
+    try:
+        app = _load_app(module_path)
+        result = _replay(app.test_client(), replay, max(1, rounds), max(0, warmup_rounds))
+    except BaseException as e:
+        result = {'error': ''.join(traceback.format_exception_only(type(e), e)).strip()}
+    result['peak_rss_mb'] = _peak_rss_mb()
+
+    with open(result_path, 'w') as f:
+        json.dump(result, f)
+
+
+if __name__ == '__main__':
+    main()